@@ -1,5 +1,6 @@
 import json
 import signal
+import sys
 import threading
 from argparse import ArgumentParser, ArgumentDefaultsHelpFormatter, Namespace
 
@@ -25,6 +26,13 @@ def get_execution_arguments() -> Namespace:
 def get_config_path(args: Namespace) -> str:
     return args.config
 
+def get_qt_application():
+    """Returns the Qt application created by display nodes, if any. Its events must be processed in the main thread.
+    """
+    if 'PyQt5.QtWidgets' not in sys.modules:
+        return None
+    return sys.modules['PyQt5.QtWidgets'].QApplication.instance()
+
 def get_config_data(config_path:str):
     configuration_file = open(config_path, 'r', encoding='utf-8')
     config_data = json.load(configuration_file)
@@ -45,8 +53,15 @@ if __name__ == '__main__':
 
     stop_event = threading.Event()
 
+    qt_application = get_qt_application()
+
     # Use a loop to poll the event status
     while not stop_event.is_set():
-        stop_event.wait(0.1)  # Check every 100ms
+        if qt_application is not None:
+            # Display nodes draw their frames on Qt timers, which only run while the Qt events are processed
+            qt_application.processEvents()
+            stop_event.wait(0.005)
+        else:
+            stop_event.wait(0.1)  # Check every 100ms
 
     app.dispose()
\ No newline at end of file
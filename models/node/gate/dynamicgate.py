@@ -4,6 +4,7 @@ from typing import Final
 from models.exception.invalid_parameter_value import InvalidParameterValue
 from models.exception.missing_parameter import MissingParameterError
 from models.node.gate.gate_node import Gate
+from models.utils.condition_expression import compile_condition_expression
 
 
 class DynamicGate(Gate):
@@ -26,21 +27,37 @@ class DynamicGate(Gate):
                 parameter='condition',
                 cause='must_be_str'
             )
+        if 'allow_legacy_condition' not in parameters:
+            parameters['allow_legacy_condition'] = False
+        if type(parameters['allow_legacy_condition']) is not bool:
+            raise InvalidParameterValue(
+                module=self._MODULE_NAME, name=self.name,
+                parameter='allow_legacy_condition',
+                cause='must_be_bool'
+            )
 
     @abc.abstractmethod
     def _initialize_parameter_fields(self, parameters: dict):
         super()._initialize_parameter_fields(parameters)
-        condition = parameters['condition']
-        self._condition_script = f'condition_result={condition}'
+        try:
+            self._condition = compile_condition_expression(parameters['condition'],
+                                                           parameters['allow_legacy_condition'])
+        except SyntaxError:
+            raise InvalidParameterValue(
+                module=self._MODULE_NAME, name=self.name,
+                parameter='condition',
+                cause='must_be_valid_expression'
+            )
+        if not self._condition.is_vectorized:
+            self.print(f'Warning: condition "{parameters["condition"]}" is evaluated by Python on every call, which '
+                       f'is much slower than the supported expressions')
 
     def _initialize_buffer_options(self, buffer_options: dict) -> None:
         super()._initialize_buffer_options(buffer_options)
 
     @abc.abstractmethod
     def _check_gate_condition(self) -> bool:
-        local_variables = {"condition_data": self._input_buffer[self.INPUT_CONDITION]}
-        exec(self._condition_script, globals(), local_variables)
-        condition_result = local_variables['condition_result']
+        condition_result = self._condition.evaluate(self._input_buffer[self.INPUT_CONDITION])
         if type(condition_result) is not bool:
             raise InvalidParameterValue(
                 module=self._MODULE_NAME,
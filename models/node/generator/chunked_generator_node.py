@@ -0,0 +1,185 @@
+import abc
+import time
+from queue import Queue, Empty, Full
+from threading import Thread, Event
+from typing import List, Dict, Iterator, Final, Union
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.framework_data import FrameworkData
+from models.node.generator.single_run_generator_node import SingleRunGeneratorNode
+
+
+class ChunkedGeneratorNode(SingleRunGeneratorNode):
+    """This node generates all its data in a single run, like ``SingleRunGeneratorNode``, but hands it out in chunks:
+    each chunk is output to the children as soon as it is generated, instead of generating everything before the
+    first output. This is not meant to be used directly, but to be inherited by other nodes that implement the
+    ``_iterate_chunks`` method.
+
+    The chunks are generated ahead of time by a prefetch thread, up to ``prefetch_chunks`` chunks, so generating the
+    next chunk overlaps with the children processing the current one. If ``replay_speed`` is set, the chunks are output
+    paced by the wall clock, as a live stream would deliver them: each chunk is output after the duration of the
+    previous chunks, divided by ``replay_speed``, has passed.
+
+    Every chunk is output by itself, so the output buffer is always cleared before each chunk, regardless of the
+    ``clear_output_buffer_on_generate`` option. Nodes inheriting from this one must call ``_stop_chunk_iteration`` in
+    their ``dispose`` method, before releasing the resources used by ``_iterate_chunks``.
+
+    configuration.json usage:
+        **replay_speed** (*float, optional*): Speed multiplier of the replay, where ``1`` outputs the chunks in real time. This is a optional parameter, the default value is ``null``, that outputs the chunks as fast as possible.\n
+        **prefetch_chunks** (*int, optional*): Maximum number of chunks generated ahead of the output. This is a optional parameter, the default value is 2.\n
+
+    :param parameters: The parameters of the node(default: None).
+    :type parameters: dict
+    """
+    _MODULE_NAME: Final[str] = 'node.generator.chunked_generator_node'
+
+    _END_OF_CHUNKS: Final[object] = object()
+    _QUEUE_POLL_INTERVAL: Final[float] = 0.1
+
+    def _validate_parameters(self, parameters: dict):
+        super()._validate_parameters(parameters)
+        if 'replay_speed' in parameters and parameters['replay_speed'] is not None:
+            if type(parameters['replay_speed']) is not float and type(parameters['replay_speed']) is not int:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='replay_speed',
+                                            cause='must_be_number')
+            if parameters['replay_speed'] < 0:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='replay_speed',
+                                            cause='must_be_greater_or_equal_to_0')
+        if 'prefetch_chunks' in parameters \
+                and (type(parameters['prefetch_chunks']) is not int or parameters['prefetch_chunks'] < 1):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='prefetch_chunks',
+                                        cause='must_be_int_greater_than_0')
+
+    def _initialize_parameter_fields(self, parameters: dict):
+        super()._initialize_parameter_fields(parameters)
+        replay_speed = parameters['replay_speed'] if 'replay_speed' in parameters else None
+        # A replay speed of 0 is the same as not setting it: as fast as possible
+        self.replay_speed = replay_speed if replay_speed else None
+        self.prefetch_chunks = parameters['prefetch_chunks'] if 'prefetch_chunks' in parameters else 2
+        self._stop_chunks = Event()
+        self._prefetch_thread = None
+
+    def _run(self, data: FrameworkData, input_name: str) -> None:
+        """Outputs each chunk returned by ``_iterate_chunks`` to the children, until the chunks end or the node is
+        disposed.
+        """
+        if not self._is_generate_data_condition_satisfied():
+            return
+        chunks = Queue(maxsize=self.prefetch_chunks)
+        self._prefetch_thread = Thread(target=self._prefetch_chunks, args=(chunks,), daemon=True)
+        self._prefetch_thread.start()
+        replay_start = None
+        replayed_duration = 0.0
+        while True:
+            chunk = self._get_prefetched_chunk(chunks)
+            if chunk is self._END_OF_CHUNKS:
+                break
+            if isinstance(chunk, Exception):
+                raise chunk
+            if self.replay_speed is not None:
+                if replay_start is None:
+                    replay_start = time.perf_counter()
+                remaining_time = replay_start + replayed_duration / self.replay_speed - time.perf_counter()
+                if remaining_time > 0 and self._stop_chunks.wait(remaining_time):
+                    break
+                replayed_duration += self._get_chunk_duration(chunk)
+            self._clear_output_buffer()
+            for output_name in self._get_outputs():
+                self._insert_new_output_data(chunk[output_name], output_name)
+            if self._is_next_node_call_enabled():
+                self._call_children()
+        # The last chunk was already output, so it must not be output again after this run
+        self._clear_output_buffer()
+
+    def _prefetch_chunks(self, chunks: Queue) -> None:
+        """Runs ``_iterate_chunks`` on the prefetch thread, putting each chunk in the ``chunks`` queue, followed by
+        the end of chunks mark. If ``_iterate_chunks`` raises an exception, it is put in the queue instead, to be raised
+        by the node thread.
+        """
+        iterator = self._iterate_chunks()
+        try:
+            for chunk in iterator:
+                if not self._put_prefetched_chunk(chunks, chunk):
+                    return
+            self._put_prefetched_chunk(chunks, self._END_OF_CHUNKS)
+        except Exception as exception:
+            self._put_prefetched_chunk(chunks, exception)
+        finally:
+            iterator.close()
+
+    def _put_prefetched_chunk(self, chunks: Queue, chunk: object) -> bool:
+        """Puts a chunk in the queue, waiting for a free slot until the chunk iteration is stopped.
+
+        :return: ``False`` if the chunk iteration was stopped before the chunk could be put in the queue.
+        :rtype: bool
+        """
+        while not self._stop_chunks.is_set():
+            try:
+                chunks.put(chunk, timeout=self._QUEUE_POLL_INTERVAL)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _get_prefetched_chunk(self, chunks: Queue) -> Union[Dict[str, FrameworkData], Exception, object]:
+        """Gets the next chunk from the queue, waiting for it until the chunk iteration is stopped, in which case the end
+        of chunks mark is returned.
+        """
+        while not self._stop_chunks.is_set():
+            try:
+                return chunks.get(timeout=self._QUEUE_POLL_INTERVAL)
+            except Empty:
+                continue
+        return self._END_OF_CHUNKS
+
+    @staticmethod
+    def _get_chunk_duration(chunk: Dict[str, FrameworkData]) -> float:
+        """Returns the duration of a chunk, in seconds, which is the longest duration among its outputs.
+        """
+        duration = 0.0
+        for data in chunk.values():
+            if data.sampling_frequency:
+                duration = max(duration, data.get_data_count() / data.sampling_frequency)
+        return duration
+
+    def _stop_chunk_iteration(self) -> None:
+        """Stops outputting chunks and waits for the prefetch thread to end, so the resources used by
+        ``_iterate_chunks`` can be safely released.
+        """
+        self._stop_chunks.set()
+        if self._prefetch_thread is not None and self._prefetch_thread.is_alive():
+            self._prefetch_thread.join()
+
+    def _generate_data(self) -> Dict[str, FrameworkData]:
+        """Returns all chunks merged in a single ``FrameworkData`` for each output.
+        """
+        return_value = {output_name: FrameworkData() for output_name in self._get_outputs()}
+        for chunk in self._iterate_chunks():
+            for output_name in self._get_outputs():
+                return_value[output_name].extend(chunk[output_name])
+        return return_value
+
+    @abc.abstractmethod
+    def _iterate_chunks(self) -> Iterator[Dict[str, FrameworkData]]:
+        """Generates the data chunks, each one a dict from output name to the chunk data.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def _is_next_node_call_enabled(self) -> bool:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def _is_generate_data_condition_satisfied(self) -> bool:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def _get_outputs(self) -> List[str]:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def dispose(self) -> None:
+        raise NotImplementedError()
@@ -0,0 +1,107 @@
+import os
+from typing import List, Dict, Final, Iterator
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.missing_parameter import MissingParameterError
+from models.framework_data import FrameworkData
+from models.node.generator.chunked_generator_node import ChunkedGeneratorNode
+from models.utils.binary_recording import BinaryRecordingReader
+
+
+class BinaryFile(ChunkedGeneratorNode):
+    """Node that replays a binary recording written by the ``models.node.output.file.binaryfile.BinaryFile`` node.
+
+    The recording is memory mapped, and read in chunks of ``chunk_size`` samples, directly from the mapped file. The
+    replayed time range can be limited by ``start_time`` and ``end_time``, which are found with the recording timestamp
+    index, without reading the samples before them.
+
+    If you want to use this node in your pipeline, you must define the following parameters in the pipeline configuration.json file:
+
+        **name** (*str*): Node name.\n
+        **module** (*str*): Current module name (in this case ``models.node.generator.file``).\n
+        **type** (*str*): Current node type (in this case ``BinaryFile``).\n
+        **file_path** (*str*): Path to the ``.bin`` recording file.\n
+        **start_time** (*float, optional*): Timestamp of the first replayed sample. By default the replay starts with the recording.\n
+        **end_time** (*float, optional*): Timestamp after the last replayed sample. By default the replay ends with the recording.\n
+        **chunk_size** (*int, optional*): Maximum number of samples of each output chunk. By default each recorded block is a chunk.\n
+        **replay_speed** (*float, optional*): Replays the chunks paced by the wall clock, at this speed multiplier (``1`` is real time). By default the chunks are sent as fast as possible.\n
+        **prefetch_chunks** (*int, optional*): Number of chunks read ahead by a background thread. The default value is 2.\n
+        **buffer_options** (*dict*): Buffer options.
+            **clear_output_buffer_on_generate** (*bool*): If ``True``, the output buffer will be cleared when the node is executed.\n
+        **outputs** (*dict*): Dictionary containing the node outputs. Where you want to send the replayed data to, in other words, the next node in the pipeline.\n
+    """
+    _MODULE_NAME: Final[str] = 'node.generator.file.binaryfile'
+
+    OUTPUT_MAIN: Final[str] = 'main'
+    OUTPUT_TIMESTAMP: Final[str] = 'timestamp'
+
+    def _validate_parameters(self, parameters: dict):
+        super()._validate_parameters(parameters)
+        if 'file_path' not in parameters:
+            raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path')
+        if type(parameters['file_path']) is not str:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path',
+                                        cause='must_be_string')
+        if os.path.splitext(parameters['file_path'])[1] != '.bin':
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path',
+                                        cause='must_be_bin_file')
+        if not os.path.exists(parameters['file_path']):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path',
+                                        cause='file_doesnt_exist')
+        for time_parameter in ['start_time', 'end_time']:
+            if time_parameter in parameters and parameters[time_parameter] is not None \
+                    and type(parameters[time_parameter]) is not float and type(parameters[time_parameter]) is not int:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter=time_parameter,
+                                            cause='must_be_number')
+        if 'chunk_size' in parameters and parameters['chunk_size'] is not None \
+                and (type(parameters['chunk_size']) is not int or parameters['chunk_size'] < 1):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='chunk_size',
+                                        cause='must_be_int_greater_than_0')
+
+    def _initialize_parameter_fields(self, parameters: dict):
+        super()._initialize_parameter_fields(parameters)
+        self.file_path = parameters['file_path']
+        self.start_time = parameters['start_time'] if 'start_time' in parameters else None
+        self.end_time = parameters['end_time'] if 'end_time' in parameters else None
+        self.chunk_size = parameters['chunk_size'] if 'chunk_size' in parameters else None
+
+    def _is_next_node_call_enabled(self) -> bool:
+        return self._output_buffer[self.OUTPUT_TIMESTAMP].has_data()
+
+    def _is_generate_data_condition_satisfied(self) -> bool:
+        return True
+
+    def _iterate_chunks(self) -> Iterator[Dict[str, FrameworkData]]:
+        reader = BinaryRecordingReader(self.file_path)
+        self.print(f'{self.file_path} opened')
+        try:
+            start_sample = reader.find_sample(self.start_time) if self.start_time is not None else 0
+            end_sample = reader.find_sample(self.end_time) if self.end_time is not None else None
+            for samples, timestamps in reader.iterate(start_sample, end_sample, self.chunk_size):
+                main_data = FrameworkData.from_multi_channel(reader.sampling_frequency, list(reader.channels),
+                                                             samples.tolist())
+                timestamp_data = FrameworkData.from_single_channel(reader.sampling_frequency, timestamps.tolist())
+                yield {
+                    self.OUTPUT_MAIN: main_data,
+                    self.OUTPUT_TIMESTAMP: timestamp_data
+                }
+        finally:
+            reader.close()
+            self.print(f'{self.file_path} closed')
+
+    def _get_outputs(self) -> List[str]:
+        return [
+            self.OUTPUT_MAIN,
+            self.OUTPUT_TIMESTAMP
+        ]
+
+    def dispose(self) -> None:
+        self._clear_output_buffer()
+        self._clear_input_buffer()
+        self._stop_chunk_iteration()
@@ -1,20 +1,24 @@
 import abc
 import os
-import csv
-from typing import List, Dict, Final
+from typing import List, Dict, Final, Iterator
+
+import numpy as np
 
 from models.exception.invalid_parameter_value import InvalidParameterValue
 from models.exception.missing_parameter import MissingParameterError
 from models.framework_data import FrameworkData
-from models.node.generator.single_run_generator_node import SingleRunGeneratorNode
+from models.node.generator.chunked_generator_node import ChunkedGeneratorNode
+from models.utils.csv_block_reader import CSVBlockReader
+from models.utils.recording_cache import RecordingCache
 
 
-class CSVFile(SingleRunGeneratorNode):
+class CSVFile(ChunkedGeneratorNode):
     """Node that reads data from a CSV file and sends it to its outputs. It can be used to read data from a file
     and send it to a processing pipeline.
     
-    When the node is initialized, it reads the CSV file and stores its data in memory(FrameworkData class). When the node is executed, it
-    sends the data to its outputs.
+    When the node is executed, it reads the CSV file in blocks of ``chunk_size`` rows, with ``CSVBlockReader``, and
+    sends each block to its outputs as soon as it is read. Only the selected columns are converted, each block at once,
+    to the configured dtypes. If ``chunk_size`` isn't set, the whole file is sent as a single chunk.
     
     If you want to use this node in your pipeline, you must define the following parameters in the pipeline configuration.json file:
 
@@ -25,6 +29,13 @@ class CSVFile(SingleRunGeneratorNode):
         **sampling_frequency** (*float*): The sample frequency used to collect the data in the CSV file.\n
         **timestamp_column_name** (*str, optional*): Name of the column that contains the timestamp data.\n
         **channel_column_names** (*List[str], optional*): List of column names of the channels that will be read from the CSV file.\n
+        **delimiter** (*str, optional*): Column delimiter. The default value is ``,``.\n
+        **dtype** (*str, optional*): NumPy dtype of the channel columns. The default value is ``float64``.\n
+        **timestamp_dtype** (*str, optional*): NumPy dtype of the timestamp column. The default value is ``float64``.\n
+        **chunk_size** (*int, optional*): Number of rows of each output chunk. By default the whole file is a single chunk.\n
+        **replay_speed** (*float, optional*): Replays the chunks paced by the wall clock, at this speed multiplier (``1`` is real time). By default the chunks are sent as fast as possible.\n
+        **prefetch_chunks** (*int, optional*): Number of chunks read ahead by a background thread. The default value is 2.\n
+        **cache_directory** (*str, optional*): Directory of the parsed recordings cache. If set, the parsed columns are stored in this directory, and memory mapped instead of parsed on the next runs, until the CSV file changes. By default nothing is cached.\n
         **buffer_options** (*dict*): Buffer options.
             **clear_output_buffer_on_generate** (*bool*): If ``True``, the output buffer will be cleared when the node is executed.\n    
         **outputs** (*dict*): Dictionary containing the node outputs. Where you want to send the data read from the CSV file to, in other words, the next node in the pipeline.\n
@@ -44,6 +55,7 @@ class CSVFile(SingleRunGeneratorNode):
         :raises MissingParameterError: If a required parameter is missing.
         :raises InvalidParameterValue: If a parameter has an invalid value.
         """
+        super()._validate_parameters(parameters)
         if 'sampling_frequency' not in parameters:
             raise MissingParameterError(module=self._MODULE_NAME,name=self.name,
                                         parameter='sampling_frequency')
@@ -84,6 +96,29 @@ class CSVFile(SingleRunGeneratorNode):
                 raise InvalidParameterValue(module=self._MODULE_NAME,name=self.name,
                                             parameter='channel_column_names',
                                             cause='must_contain_strings_only')
+        if 'delimiter' in parameters and (type(parameters['delimiter']) is not str or len(parameters['delimiter']) != 1):
+            raise InvalidParameterValue(module=self._MODULE_NAME,name=self.name,
+                                        parameter='delimiter',
+                                        cause='must_be_single_character_string')
+        for dtype_parameter in ['dtype', 'timestamp_dtype']:
+            if dtype_parameter not in parameters:
+                continue
+            try:
+                np.dtype(parameters[dtype_parameter])
+            except TypeError:
+                raise InvalidParameterValue(module=self._MODULE_NAME,name=self.name,
+                                            parameter=dtype_parameter,
+                                            cause='must_be_numpy_dtype')
+        if 'chunk_size' in parameters and parameters['chunk_size'] is not None \
+                and (type(parameters['chunk_size']) is not int or parameters['chunk_size'] < 1):
+            raise InvalidParameterValue(module=self._MODULE_NAME,name=self.name,
+                                        parameter='chunk_size',
+                                        cause='must_be_int_greater_than_0')
+        if 'cache_directory' in parameters and parameters['cache_directory'] is not None \
+                and type(parameters['cache_directory']) is not str:
+            raise InvalidParameterValue(module=self._MODULE_NAME,name=self.name,
+                                        parameter='cache_directory',
+                                        cause='must_be_string')
 
     @abc.abstractmethod
     def _initialize_parameter_fields(self, parameters: dict):
@@ -101,13 +136,30 @@ class CSVFile(SingleRunGeneratorNode):
         self.timestamp_column_name = parameters['timestamp_column_name'] \
             if 'timestamp_column_name' in parameters \
             else None
+        self.delimiter = parameters['delimiter'] if 'delimiter' in parameters else ','
+        self.dtype = parameters['dtype'] if 'dtype' in parameters else 'float64'
+        self.timestamp_dtype = parameters['timestamp_dtype'] if 'timestamp_dtype' in parameters else 'float64'
+        self.chunk_size = parameters['chunk_size'] if 'chunk_size' in parameters else None
+        self.cache_directory = parameters['cache_directory'] if 'cache_directory' in parameters else None
+        self._recording_cache = RecordingCache(self.cache_directory) if self.cache_directory is not None else None
+        self._csv_reader = None
 
     def _init_csv_reader(self) -> None:
-        """This method initializes the CSV reader object. It opens the CSV file and creates a CSV reader object that will be used to read the file.
+        """This method initializes the CSV reader object. It opens the CSV file and creates a CSV block reader object that will be used to read the file.
         """
         self.print(f'{self.file_path} opened')
-        self._csv_file = open(self.file_path)
-        self._csv_reader = csv.DictReader(self._csv_file)
+        columns = None
+        if self.channel_column_names is not None:
+            columns = list(self.channel_column_names)
+            if not self._should_generate_timestamp() and self.timestamp_column_name not in columns:
+                columns.append(self.timestamp_column_name)
+        column_dtypes = {self.timestamp_column_name: self.timestamp_dtype} \
+            if not self._should_generate_timestamp() \
+            else None
+        self._csv_reader = CSVBlockReader(self.file_path, columns=columns, delimiter=self.delimiter, dtype=self.dtype,
+                                          column_dtypes=column_dtypes)
+        if self.channel_column_names is None:
+            self.channel_column_names = list(self._csv_reader.columns)
 
     def _should_generate_timestamp(self) -> bool:
         return self.timestamp_column_name is None
@@ -118,26 +170,61 @@ class CSVFile(SingleRunGeneratorNode):
     def _is_generate_data_condition_satisfied(self) -> bool:
         return True
 
-    def _generate_data(self) -> Dict[str, FrameworkData]:
-        """This method reads the csv file and store the data in a FrameworkData object.
+    def _iterate_chunks(self) -> Iterator[Dict[str, FrameworkData]]:
+        """This method reads the csv file in blocks and stores each block in FrameworkData objects.
         """
         self._init_csv_reader()
-        main_data = FrameworkData(self.sampling_frequency, self.channel_column_names)
-        timestamp_data = FrameworkData(self.sampling_frequency)
-        for row_index, row in enumerate(self._csv_reader):
-            if row_index == 0 and self.channel_column_names is None:
-                self.channel_column_names = row.keys()
-            for channel_name in self.channel_column_names:
-                main_data.input_data_on_channel([float(row[channel_name])], channel_name)
-            row_timestamp = row_index if self._should_generate_timestamp() else row[self.timestamp_column_name]
-            timestamp_data.input_data_on_channel(data=[row_timestamp])
-        self._csv_file.close()
-
-        self.print(f'{self.file_path} closed')
-        return {
-            self.OUTPUT_MAIN: main_data,
-            self.OUTPUT_TIMESTAMP: timestamp_data
-        }
+        cache_writer = None
+        try:
+            column_dtypes = {column: dtype.str for column, dtype in self._csv_reader.dtypes.items()}
+            cache_options = {'delimiter': self.delimiter}
+            cached_data = self._recording_cache.load(self.file_path, column_dtypes, cache_options) \
+                if self._recording_cache is not None \
+                else None
+            if cached_data is not None:
+                self._csv_reader.close()
+                self.print(f'{self.file_path} loaded from cache')
+                blocks = self._split_cached_data(cached_data)
+            elif self.chunk_size is not None:
+                blocks = self._csv_reader.read_blocks(self.chunk_size)
+            else:
+                blocks = iter([self._csv_reader.read_all()])
+            if self._recording_cache is not None and cached_data is None:
+                cache_writer = self._recording_cache.open_writer(self.file_path, column_dtypes, cache_options)
+            row_index = 0
+            for block in blocks:
+                row_count = block[self._csv_reader.columns[0]].shape[0]
+                if cache_writer is not None:
+                    cache_writer.append(block)
+                if row_count == 0:
+                    continue
+                main_data = FrameworkData(self.sampling_frequency, self.channel_column_names)
+                main_data.input_2d_data([block[channel_name].tolist() for channel_name in self.channel_column_names])
+                row_timestamps = np.arange(row_index, row_index + row_count) \
+                    if self._should_generate_timestamp() \
+                    else block[self.timestamp_column_name]
+                timestamp_data = FrameworkData.from_single_channel(self.sampling_frequency, row_timestamps.tolist())
+                row_index += row_count
+                yield {
+                    self.OUTPUT_MAIN: main_data,
+                    self.OUTPUT_TIMESTAMP: timestamp_data
+                }
+            if cache_writer is not None and cache_writer.row_count > 0:
+                cache_writer.commit()
+        finally:
+            if cache_writer is not None:
+                cache_writer.discard()
+            self._csv_reader.close()
+            self.print(f'{self.file_path} closed')
+
+    def _split_cached_data(self, cached_data: Dict[str, np.ndarray]) -> Iterator[Dict[str, np.ndarray]]:
+        """This method splits the cached columns in blocks of ``chunk_size`` rows, or a single block if it isn't set.
+        """
+        row_count = cached_data[self._csv_reader.columns[0]].shape[0]
+        block_size = self.chunk_size if self.chunk_size is not None else max(row_count, 1)
+        for block_start in range(0, row_count, block_size):
+            yield {column: column_data[block_start:block_start + block_size]
+                   for column, column_data in cached_data.items()}
 
     def _get_outputs(self) -> List[str]:
         """This method returns the outputs of this node.
@@ -153,5 +240,6 @@ class CSVFile(SingleRunGeneratorNode):
     def dispose(self) -> None:
         self._clear_output_buffer()
         self._clear_input_buffer()
-        if self._csv_file is not None and not self._csv_file.closed:
-            self._csv_file.close()
+        self._stop_chunk_iteration()
+        if self._csv_reader is not None:
+            self._csv_reader.close()
@@ -1,20 +1,46 @@
 import abc
 import os
-import csv
-from typing import List, Dict, Final
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import List, Dict, Final, Iterator, Deque, Tuple, Union
+
+import numpy as np
 
 from models.exception.invalid_parameter_value import InvalidParameterValue
 from models.exception.missing_parameter import MissingParameterError
 from models.framework_data import FrameworkData
-from models.node.generator.single_run_generator_node import SingleRunGeneratorNode
+from models.node.generator.chunked_generator_node import ChunkedGeneratorNode
+from models.utils.csv_block_reader import CSVBlockReader
+from models.utils.recording_cache import RecordingCache
+
+_CACHE_OPTIONS: Final[dict] = {'delimiter': ','}
+
+
+def _read_csv_columns(file_path: str, columns: List[str], cache_directory: str = None) -> Dict[str, np.ndarray]:
+    """Reads the selected columns of a CSV file, storing them in the recordings cache if ``cache_directory`` is set.
+    This is a module level function so it can run on a worker process.
+    """
+    with CSVBlockReader(file_path, columns=columns) as reader:
+        file_data = reader.read_all()
+        if cache_directory is not None:
+            RecordingCache(cache_directory, evict_stale_entries=False).store(
+                file_path, {column: dtype.str for column, dtype in reader.dtypes.items()}, file_data, _CACHE_OPTIONS)
+        return file_data
 
 
-class CSVFileArray(SingleRunGeneratorNode):
+class CSVFileArray(ChunkedGeneratorNode):
     """Node that reads data from multiple CSV files and outputs it as a FrameworkData object.
     The working principle is similar to the CSVFile node, but it reads multiple files instead of one.
 
-    When the node is initialized, it reads the CSV files and stores their data in memory(FrameworkData class). When the node is executed, it
-    sends the data to its outputs.
+    When the node is executed, it streams the CSV files one after the other, in blocks of ``chunk_size`` rows. If
+    ``chunk_size`` isn't set, each file is sent as a single chunk. The files are parsed by a pool of ``parse_workers``
+    processes, which parses the next ``prefetch_files`` files while the current one is streamed, so only the current file
+    and the files parsed ahead are kept in memory.
+
+    Attributes:
+        OUTPUT_MAIN (str): The name of the output containing the channels data (in this case ``main``).
+        OUTPUT_TIMESTAMP (str): The name of the output containing the timestamps, generated ones restart from 0 on each file (in this case ``timestamp``).
+        OUTPUT_FILE_BOUNDARY (str): The name of the output containing the file boundary events, one value per sample, where the first sample of each file has its position in ``file_path`` (starting at 1) and the other samples are 0 (in this case ``file_boundary``).
 
     If you want to use this node in your pipeline, you must define the following parameters in the pipeline configuration.json file:
 
@@ -25,6 +51,12 @@ class CSVFileArray(SingleRunGeneratorNode):
         **sampling_frequency** (*float*): The sample frequency used to collect the data in the CSV file.\n
         **timestamp_column_name** (*str, optional*): Name of the column that contains the timestamp data.\n
         **channel_column_names** (*List[str], optional*): List of column names of the channels that will be read from the CSV file.\n
+        **chunk_size** (*int, optional*): Number of rows of each output chunk. By default each file is a single chunk.\n
+        **replay_speed** (*float, optional*): Replays the chunks paced by the wall clock, at this speed multiplier (``1`` is real time). By default the chunks are sent as fast as possible.\n
+        **prefetch_chunks** (*int, optional*): Number of chunks read ahead by a background thread. The default value is 2.\n
+        **parse_workers** (*int, optional*): Number of worker processes parsing the files. If 0, the files are parsed by the background thread, without look-ahead. The default value is 1.\n
+        **prefetch_files** (*int, optional*): Number of files parsed ahead of the file being streamed, when ``parse_workers`` isn't 0. The default value is 1.\n
+        **cache_directory** (*str, optional*): Directory of the parsed recordings cache. If set, the parsed columns of each file are stored in this directory, and memory mapped instead of parsed on the next runs, until the file changes. By default nothing is cached.\n
         **buffer_options** (*dict*): Buffer options.
             **clear_output_buffer_on_generate** (*bool*): If ``True``, the output buffer will be cleared when the node is executed.\n    
         **output** (*dict*): Dictionary containing the node outputs. Where you want to send the data read from the CSV file to, in other words, the next node in the pipeline.\n
@@ -33,8 +65,10 @@ class CSVFileArray(SingleRunGeneratorNode):
 
     OUTPUT_MAIN: Final[str] = 'main'
     OUTPUT_TIMESTAMP: Final[str] = 'timestamp'
+    OUTPUT_FILE_BOUNDARY: Final[str] = 'file_boundary'
 
     def _validate_parameters(self, parameters: dict):
+        super()._validate_parameters(parameters)
         if 'sampling_frequency' not in parameters:
             raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
                                         parameter='sampling_frequency')
@@ -80,6 +114,26 @@ class CSVFileArray(SingleRunGeneratorNode):
                 raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
                                             parameter='channel_column_names',
                                             cause='must_contain_strings_only')
+        if 'chunk_size' in parameters and parameters['chunk_size'] is not None \
+                and (type(parameters['chunk_size']) is not int or parameters['chunk_size'] < 1):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='chunk_size',
+                                        cause='must_be_int_greater_than_0')
+        if 'parse_workers' in parameters \
+                and (type(parameters['parse_workers']) is not int or parameters['parse_workers'] < 0):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='parse_workers',
+                                        cause='must_be_int_greater_or_equal_to_0')
+        if 'prefetch_files' in parameters \
+                and (type(parameters['prefetch_files']) is not int or parameters['prefetch_files'] < 0):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='prefetch_files',
+                                        cause='must_be_int_greater_or_equal_to_0')
+        if 'cache_directory' in parameters and parameters['cache_directory'] is not None \
+                and type(parameters['cache_directory']) is not str:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='cache_directory',
+                                        cause='must_be_string')
 
     @abc.abstractmethod
     def _initialize_parameter_fields(self, parameters: dict):
@@ -92,7 +146,11 @@ class CSVFileArray(SingleRunGeneratorNode):
         self.timestamp_column_name = parameters['timestamp_column_name'] \
             if 'timestamp_column_name' in parameters \
             else None
-        self._csv_file = None
+        self.chunk_size = parameters['chunk_size'] if 'chunk_size' in parameters else None
+        self.parse_workers = parameters['parse_workers'] if 'parse_workers' in parameters else 1
+        self.prefetch_files = parameters['prefetch_files'] if 'prefetch_files' in parameters else 1
+        self.cache_directory = parameters['cache_directory'] if 'cache_directory' in parameters else None
+        self._recording_cache = RecordingCache(self.cache_directory) if self.cache_directory is not None else None
 
     def _should_generate_timestamp(self) -> bool:
         return self.timestamp_column_name is None
@@ -103,43 +161,91 @@ class CSVFileArray(SingleRunGeneratorNode):
     def _is_generate_data_condition_satisfied(self) -> bool:
         return True
 
-    def _generate_data(self) -> Dict[str, FrameworkData]:
-        main_data = FrameworkData(self.sampling_frequency, self.channel_column_names)
-        timestamp_data = FrameworkData(self.sampling_frequency)
-        for file in self.file_paths:
-            with open(file) as csv_file:
+    def _get_read_columns(self) -> List[str]:
+        """Returns the columns to read from each file: the channels, followed by the timestamp column if it isn't a
+        channel. If the channels aren't set, they are all the columns of the first file.
+        """
+        if self.channel_column_names is None:
+            with CSVBlockReader(self.file_paths[0]) as reader:
+                self.channel_column_names = list(reader.columns)
+        columns = list(self.channel_column_names)
+        if not self._should_generate_timestamp() and self.timestamp_column_name not in columns:
+            columns.append(self.timestamp_column_name)
+        return columns
+
+    def _iterate_chunks(self) -> Iterator[Dict[str, FrameworkData]]:
+        """Streams the files in order, submitting each file to the parse workers ``prefetch_files`` files before it is
+        streamed. Files found in the recordings cache are memory mapped instead.
+        """
+        columns = self._get_read_columns()
+        column_dtypes = {column: 'float64' for column in columns}
+        executor = ProcessPoolExecutor(max_workers=self.parse_workers) if self.parse_workers > 0 else None
+        look_ahead = self.prefetch_files + 1 if executor is not None else 1
+        pending_files: Deque[Tuple[int, str, Union[Future, Dict[str, np.ndarray], None]]] = deque()
+        next_files = iter(enumerate(self.file_paths))
+        try:
+            while True:
+                while len(pending_files) < look_ahead:
+                    file_index, file = next(next_files, (None, None))
+                    if file is None:
+                        break
+                    file_source = self._recording_cache.load(file, column_dtypes, _CACHE_OPTIONS) \
+                        if self._recording_cache is not None \
+                        else None
+                    if file_source is None and executor is not None:
+                        file_source = executor.submit(_read_csv_columns, file, columns, self.cache_directory)
+                    pending_files.append((file_index, file, file_source))
+                if len(pending_files) == 0:
+                    return
+                file_index, file, file_source = pending_files.popleft()
                 self.print(f'{file} opened')
-                csv_reader = csv.DictReader(csv_file)
-                rows = list(csv_reader)
-
-                if self.channel_column_names is None:
-                    self.channel_column_names = rows[0].keys()
-
-                for channel_name in self.channel_column_names:
-                    channel_data = [float(row[channel_name]) for row in rows]
-                    main_data.input_data_on_channel(channel_data, channel_name)
-
-                if self._should_generate_timestamp():
-                    timestamps = list(range(len(rows)))
+                if isinstance(file_source, Future):
+                    file_data = file_source.result()
+                elif file_source is not None:
+                    file_data = file_source
                 else:
-                    timestamps = [row[self.timestamp_column_name] for row in rows]
-
-                timestamp_data.input_data_on_channel(timestamps)
+                    file_data = _read_csv_columns(file, columns, self.cache_directory)
+                yield from self._split_file_chunks(file_index, file_data)
+                del file_data
                 self.print(f'{file} closed')
-
-        return {
-            self.OUTPUT_MAIN: main_data,
-            self.OUTPUT_TIMESTAMP: timestamp_data
-        }
+        finally:
+            for _, _, file_source in pending_files:
+                if isinstance(file_source, Future):
+                    file_source.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def _split_file_chunks(self, file_index: int, file_data: Dict[str, np.ndarray]) -> Iterator[Dict[str, FrameworkData]]:
+        """Splits the columns of a parsed file in chunks of ``chunk_size`` rows, stored in FrameworkData objects.
+        """
+        row_count = file_data[self.channel_column_names[0]].shape[0]
+        chunk_size = self.chunk_size if self.chunk_size is not None else max(row_count, 1)
+        for chunk_start in range(0, row_count, chunk_size):
+            chunk_end = min(chunk_start + chunk_size, row_count)
+            main_data = FrameworkData(self.sampling_frequency, self.channel_column_names)
+            main_data.input_2d_data([file_data[channel_name][chunk_start:chunk_end].tolist()
+                                     for channel_name in self.channel_column_names])
+            timestamps = np.arange(chunk_start, chunk_end) \
+                if self._should_generate_timestamp() \
+                else file_data[self.timestamp_column_name][chunk_start:chunk_end]
+            file_boundary = np.zeros(chunk_end - chunk_start, dtype=int)
+            if chunk_start == 0:
+                file_boundary[0] = file_index + 1
+            yield {
+                self.OUTPUT_MAIN: main_data,
+                self.OUTPUT_TIMESTAMP: FrameworkData.from_single_channel(self.sampling_frequency, timestamps.tolist()),
+                self.OUTPUT_FILE_BOUNDARY: FrameworkData.from_single_channel(self.sampling_frequency,
+                                                                             file_boundary.tolist())
+            }
 
     def _get_outputs(self) -> List[str]:
         return [
             self.OUTPUT_MAIN,
-            self.OUTPUT_TIMESTAMP
+            self.OUTPUT_TIMESTAMP,
+            self.OUTPUT_FILE_BOUNDARY
         ]
 
     def dispose(self) -> None:
         self._clear_output_buffer()
         self._clear_input_buffer()
-        if self._csv_file is not None and not self._csv_file.closed:
-            self._csv_file.close()
+        self._stop_chunk_iteration()
@@ -0,0 +1,178 @@
+import os
+from typing import List, Dict, Final, Iterator, Tuple
+
+import numpy as np
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.missing_parameter import MissingParameterError
+from models.framework_data import FrameworkData
+from models.node.generator.chunked_generator_node import ChunkedGeneratorNode
+from models.utils.edf_format import EDFReader
+
+
+class EDFFile(ChunkedGeneratorNode):
+    """Node that reads an EDF, EDF+, BDF or BDF+ recording and sends it to its outputs, like the ones written by the
+    ``WriteEDF`` node or the ones of public EEG datasets.
+
+    The data records are memory mapped, and each chunk is decoded from the records it spans, for the selected channels
+    only, with a vectorized conversion to physical values. The selected channels must have the same sampling frequency.
+
+    The EDF+ annotations are sent in the ``marker`` output, as a marker stream aligned with the ``main`` output: one
+    value per sample, where 0 means no event. An annotation is sent as the value ``marker_values`` maps its text to, or
+    as its text converted to a number. Annotations that are neither are skipped.
+
+    Attributes:
+        OUTPUT_MAIN (str): The name of the output containing the selected channels, in physical units (in this case ``main``).
+        OUTPUT_TIMESTAMP (str): The name of the output containing the time of each sample, in seconds since the start of the recording (in this case ``timestamp``).
+        OUTPUT_MARKER (str): The name of the output containing the annotation markers (in this case ``marker``).
+
+    If you want to use this node in your pipeline, you must define the following parameters in the pipeline configuration.json file:
+
+        **name** (*str*): Node name.\n
+        **module** (*str*): Current module name (in this case ``models.node.generator.file``).\n
+        **type** (*str*): Current node type (in this case ``EDFFile``).\n
+        **file_path** (*str*): Path to the ``.edf`` or ``.bdf`` file.\n
+        **channels** (*List[str], optional*): Labels of the channels to read. By default all channels are read, except the annotations.\n
+        **marker_values** (*dict, optional*): Marker value of each annotation text, like ``{"T1": 1, "T2": 2}``. By default only annotations whose text is a number are sent.\n
+        **chunk_size** (*int, optional*): Number of samples of each output chunk. By default each data record is a chunk.\n
+        **replay_speed** (*float, optional*): Replays the chunks paced by the wall clock, at this speed multiplier (``1`` is real time). By default the chunks are sent as fast as possible.\n
+        **prefetch_chunks** (*int, optional*): Number of chunks read ahead by a background thread. The default value is 2.\n
+        **buffer_options** (*dict*): Buffer options.
+            **clear_output_buffer_on_generate** (*bool*): If ``True``, the output buffer will be cleared when the node is executed.\n
+        **outputs** (*dict*): Dictionary containing the node outputs. Where you want to send the data read from the file to, in other words, the next node in the pipeline.\n
+    """
+    _MODULE_NAME: Final[str] = 'node.generator.file.edffile'
+
+    OUTPUT_MAIN: Final[str] = 'main'
+    OUTPUT_TIMESTAMP: Final[str] = 'timestamp'
+    OUTPUT_MARKER: Final[str] = 'marker'
+
+    def _validate_parameters(self, parameters: dict):
+        super()._validate_parameters(parameters)
+        if 'file_path' not in parameters:
+            raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path')
+        if type(parameters['file_path']) is not str:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path',
+                                        cause='must_be_string')
+        if os.path.splitext(parameters['file_path'])[1].lower() not in ['.edf', '.bdf']:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path',
+                                        cause='must_be_edf_or_bdf_file')
+        if not os.path.exists(parameters['file_path']):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path',
+                                        cause='file_doesnt_exist')
+        if 'channels' in parameters and parameters['channels'] is not None:
+            if type(parameters['channels']) is not list or len(parameters['channels']) < 1 \
+                    or any(type(channel) is not str for channel in parameters['channels']):
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='channels',
+                                            cause='must_be_non_empty_list_of_strings')
+        if 'marker_values' in parameters:
+            if type(parameters['marker_values']) is not dict or any(
+                    type(value) is not int and type(value) is not float
+                    for value in parameters['marker_values'].values()):
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='marker_values',
+                                            cause='must_be_dict_of_numbers')
+        if 'chunk_size' in parameters and parameters['chunk_size'] is not None \
+                and (type(parameters['chunk_size']) is not int or parameters['chunk_size'] < 1):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='chunk_size',
+                                        cause='must_be_int_greater_than_0')
+
+    def _initialize_parameter_fields(self, parameters: dict):
+        super()._initialize_parameter_fields(parameters)
+        self.file_path = parameters['file_path']
+        self.channels = parameters['channels'] if 'channels' in parameters else None
+        self.marker_values: Dict[str, float] = parameters['marker_values'] if 'marker_values' in parameters else {}
+        self.chunk_size = parameters['chunk_size'] if 'chunk_size' in parameters else None
+
+    def _is_next_node_call_enabled(self) -> bool:
+        return self._output_buffer[self.OUTPUT_TIMESTAMP].has_data()
+
+    def _is_generate_data_condition_satisfied(self) -> bool:
+        return True
+
+    def _get_signal_indexes(self, reader: EDFReader) -> List[int]:
+        """Returns the indexes of the selected channels in the recording, checking that they exist and that they have
+        the same sampling frequency.
+        """
+        if self.channels is None:
+            signal_indexes = [signal_index for signal_index in range(len(reader.labels))
+                              if signal_index not in reader.annotation_signal_indexes]
+        else:
+            missing_channels = [channel for channel in self.channels if channel not in reader.labels]
+            if len(missing_channels) > 0:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='channels',
+                                            cause=f'channels_not_found_{missing_channels}')
+            signal_indexes = [reader.labels.index(channel) for channel in self.channels]
+        if len(signal_indexes) == 0 or len(set(reader.samples_per_record[signal_indexes])) > 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='channels',
+                                        cause='must_have_same_sampling_frequency')
+        return signal_indexes
+
+    def _get_markers(self, reader: EDFReader, sampling_frequency: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Converts the recording annotations to markers.
+
+        :return: The sample index and the value of each marker, sorted by sample index.
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        marker_samples: List[int] = []
+        marker_values: List[float] = []
+        for onset, _, text in reader.read_annotations():
+            if text in self.marker_values:
+                value = self.marker_values[text]
+            else:
+                try:
+                    value = float(text)
+                except ValueError:
+                    continue
+            marker_samples.append(int(round(onset * sampling_frequency)))
+            marker_values.append(value)
+        order = np.argsort(marker_samples, kind='stable')
+        return np.asarray(marker_samples, dtype=int)[order], np.asarray(marker_values, dtype=float)[order]
+
+    def _iterate_chunks(self) -> Iterator[Dict[str, FrameworkData]]:
+        reader = EDFReader(self.file_path)
+        self.print(f'{self.file_path} opened')
+        try:
+            signal_indexes = self._get_signal_indexes(reader)
+            channels = [reader.labels[signal_index] for signal_index in signal_indexes]
+            sampling_frequency = reader.get_sampling_frequency(signal_indexes[0])
+            marker_samples, marker_values = self._get_markers(reader, sampling_frequency)
+            sample_count = reader.get_sample_count(signal_indexes[0])
+            chunk_size = self.chunk_size if self.chunk_size is not None \
+                else int(reader.samples_per_record[signal_indexes[0]])
+            for chunk_start in range(0, sample_count, chunk_size):
+                chunk_end = min(chunk_start + chunk_size, sample_count)
+                samples = reader.read(signal_indexes, chunk_start, chunk_end)
+                markers = np.zeros(chunk_end - chunk_start)
+                first_marker, last_marker = np.searchsorted(marker_samples, [chunk_start, chunk_end])
+                markers[marker_samples[first_marker:last_marker] - chunk_start] = marker_values[first_marker:last_marker]
+                timestamps = np.arange(chunk_start, chunk_end) / sampling_frequency
+                yield {
+                    self.OUTPUT_MAIN: FrameworkData.from_multi_channel(sampling_frequency, list(channels),
+                                                                       samples.tolist()),
+                    self.OUTPUT_TIMESTAMP: FrameworkData.from_single_channel(sampling_frequency, timestamps.tolist()),
+                    self.OUTPUT_MARKER: FrameworkData.from_single_channel(sampling_frequency, markers.tolist())
+                }
+        finally:
+            reader.close()
+            self.print(f'{self.file_path} closed')
+
+    def _get_outputs(self) -> List[str]:
+        return [
+            self.OUTPUT_MAIN,
+            self.OUTPUT_TIMESTAMP,
+            self.OUTPUT_MARKER
+        ]
+
+    def dispose(self) -> None:
+        self._clear_output_buffer()
+        self._clear_input_buffer()
+        self._stop_chunk_iteration()
@@ -0,0 +1,349 @@
+import time
+from threading import Thread, Lock, Event
+from typing import Dict, List, Final, Any
+
+import numpy as np
+import scipy.signal
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.framework_data import FrameworkData
+from models.node.generator.generator_node import GeneratorNode
+
+
+class SyntheticSignal(GeneratorNode):
+    """ This node generates synthetic multichannel signals, with any number of channels, sampling frequency and chunk
+    size, so that the pipeline nodes and the scheduler can be load tested beyond the limits of the available boards.
+    The signal of each channel is the sum of the configured signal models, generated for all channels of a chunk at
+    once:\n
+        - ``sine``: sinusoid with ``frequency`` (Hz), ``amplitude`` and ``phase`` (rad);
+        - ``white_noise``: gaussian noise with standard deviation ``amplitude``;
+        - ``pink_noise``: 1/f noise, from white noise filtered by a pinking IIR filter, with gain ``amplitude``;
+        - ``spikes``: Hann shaped spikes with ``amplitude`` and ``width`` (samples), at random times with mean ``rate`` (spikes per second) on each channel.\n
+    Each signal model may have a ``channels`` list with the indexes of the channels it is added to (all channels by
+    default). The filter states are kept between chunks, so the signals are continuous.
+
+    Chunks are generated by a background thread, that triggers the node execution after each chunk, instead of waiting
+    for the application loop. In real time mode, each chunk is released when its last sample time is reached. Otherwise
+    chunks are generated as fast as possible, generating the next chunk only after the previous one was output, so the
+    generation rate follows the pipeline throughput.
+
+    Attributes:
+        _MODULE_NAME (str): The name of the module (in this case, ``node.generator.syntheticsignal``).
+        OUTPUT_MAIN (str): The name of the output containing the signals (in this case, ``main``).
+        OUTPUT_MARKER (str): The name of the output containing the event markers, one value per sample, 0 meaning no event (in this case, ``marker``).
+        OUTPUT_TIMESTAMP (str): The name of the output containing the sample timestamps, in seconds (in this case, ``timestamp``).
+
+    ``configuration.json`` usage:
+
+        **module** (*str*): Current module name (in this case ``models.node.generator``).\n
+        **type** (*str*): Current node type (in this case ``SyntheticSignal``).\n
+        **channel_count** (*int*): Number of channels, named ``channel_0``, ``channel_1``, etc. This is a optional parameter, the default value is 8.\n
+        **sampling_frequency** (*float*): Sampling frequency in Hz. This is a optional parameter, the default value is 250.\n
+        **chunk_size** (*int*): Number of samples of each chunk. This is a optional parameter, the default value is a tenth of the sampling frequency.\n
+        **real_time** (*bool*): Whether the chunks are released in real time or as fast as possible. This is a optional parameter, the default value is True.\n
+        **signals** (*list[dict]*): Signal models, as described above. This is a optional parameter, the default value is a 10 Hz sine with amplitude 10 plus pink noise with amplitude 1.\n
+        **markers** (*dict*): Event markers, with ``interval`` (seconds between events) and ``values`` (list of marker values, chosen at random for each event). This is a optional parameter, by default no events are generated.\n
+        **seed** (*int*): Random generator seed. This is a optional parameter, by default the generator isn't seeded.\n
+        **duration** (*float*): Generated signal duration in seconds. This is a optional parameter, by default the generation never stops.\n
+        **buffer_options** (*dict*): Buffer options.\n
+            **clear_output_buffer_on_generate** (*bool*): If ``True``, the output buffer will be cleared when the node is executed.\n
+    """
+
+    _MODULE_NAME: Final[str] = 'node.generator.syntheticsignal'
+
+    OUTPUT_MAIN: Final[str] = 'main'
+    OUTPUT_MARKER: Final[str] = 'marker'
+    OUTPUT_TIMESTAMP: Final[str] = 'timestamp'
+
+    SIGNAL_SINE: Final[str] = 'sine'
+    SIGNAL_WHITE_NOISE: Final[str] = 'white_noise'
+    SIGNAL_PINK_NOISE: Final[str] = 'pink_noise'
+    SIGNAL_SPIKES: Final[str] = 'spikes'
+    _SUPPORTED_SIGNALS: Final[List[str]] = [SIGNAL_SINE, SIGNAL_WHITE_NOISE, SIGNAL_PINK_NOISE, SIGNAL_SPIKES]
+
+    # Paul Kellet's pinking filter, -3 dB/octave within 0.5% of the sampling frequency range
+    _PINK_NOISE_NUMERATOR: Final[List[float]] = [0.049922035, -0.095993537, 0.050612699, -0.004408786]
+    _PINK_NOISE_DENOMINATOR: Final[List[float]] = [1, -2.494956002, 2.017265875, -0.522189400]
+
+    def _validate_parameters(self, parameters: dict):
+        """ Validates the parameters passed to this node, setting the default values of the optional ones.
+
+        :param parameters: The parameters passed to this node.
+        :type parameters: dict
+
+        :raises InvalidParameterValue: the ``channel_count`` parameter must be an int greater than 0.
+        :raises InvalidParameterValue: the ``sampling_frequency`` parameter must be a number greater than 0.
+        :raises InvalidParameterValue: the ``chunk_size`` parameter must be an int greater than 0.
+        :raises InvalidParameterValue: the ``real_time`` parameter must be a bool.
+        :raises InvalidParameterValue: the ``signals`` parameter must be a list of supported signal models.
+        :raises InvalidParameterValue: the ``markers`` parameter must have a positive ``interval`` and a non empty ``values`` list.
+        :raises InvalidParameterValue: the ``seed`` parameter must be an int.
+        :raises InvalidParameterValue: the ``duration`` parameter must be a number greater than 0.
+        """
+        super()._validate_parameters(parameters)
+        if 'channel_count' not in parameters:
+            parameters['channel_count'] = 8
+        if type(parameters['channel_count']) is not int or parameters['channel_count'] < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='channel_count',
+                                        cause='must_be_int_greater_than_0')
+        if 'sampling_frequency' not in parameters:
+            parameters['sampling_frequency'] = 250
+        if (type(parameters['sampling_frequency']) is not int and type(parameters['sampling_frequency']) is not float) \
+                or parameters['sampling_frequency'] <= 0:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='sampling_frequency',
+                                        cause='must_be_number_greater_than_0')
+        if 'chunk_size' not in parameters:
+            parameters['chunk_size'] = max(int(parameters['sampling_frequency'] / 10), 1)
+        if type(parameters['chunk_size']) is not int or parameters['chunk_size'] < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='chunk_size',
+                                        cause='must_be_int_greater_than_0')
+        if 'real_time' not in parameters:
+            parameters['real_time'] = True
+        if type(parameters['real_time']) is not bool:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='real_time',
+                                        cause='must_be_bool')
+        if 'signals' not in parameters:
+            parameters['signals'] = [
+                {'type': self.SIGNAL_SINE, 'frequency': 10, 'amplitude': 10},
+                {'type': self.SIGNAL_PINK_NOISE, 'amplitude': 1}
+            ]
+        if type(parameters['signals']) is not list:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='signals',
+                                        cause='must_be_list')
+        for index, signal in enumerate(parameters['signals']):
+            self._validate_signal(f'signals[{index}]', signal, parameters['channel_count'])
+        if 'markers' not in parameters:
+            parameters['markers'] = None
+        if parameters['markers'] is not None:
+            markers = parameters['markers']
+            if type(markers) is not dict or 'interval' not in markers \
+                    or (type(markers['interval']) is not int and type(markers['interval']) is not float) \
+                    or markers['interval'] <= 0:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='markers.interval',
+                                            cause='must_be_number_greater_than_0')
+            if 'values' not in markers:
+                markers['values'] = [1]
+            if type(markers['values']) is not list or len(markers['values']) < 1:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='markers.values',
+                                            cause='must_be_non_empty_list')
+        if 'seed' not in parameters:
+            parameters['seed'] = None
+        if parameters['seed'] is not None and type(parameters['seed']) is not int:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='seed',
+                                        cause='must_be_int')
+        if 'duration' not in parameters:
+            parameters['duration'] = None
+        if parameters['duration'] is not None and (
+                (type(parameters['duration']) is not int and type(parameters['duration']) is not float)
+                or parameters['duration'] <= 0):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='duration',
+                                        cause='must_be_number_greater_than_0')
+
+    def _validate_signal(self, parameter: str, signal: Any, channel_count: int):
+        """ Validates a signal model, setting the default values of its optional fields.
+
+        :param parameter: The signal model parameter name, used in the error messages.
+        :type parameter: str
+        :param signal: The signal model.
+        :type signal: Any
+        :param channel_count: The number of channels.
+        :type channel_count: int
+
+        :raises InvalidParameterValue: the signal model is invalid.
+        """
+        if type(signal) is not dict or signal.get('type') not in self._SUPPORTED_SIGNALS:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter=f'{parameter}.type',
+                                        cause=f'must_be_one_of_{self._SUPPORTED_SIGNALS}')
+        defaults = {'amplitude': 1, 'frequency': 10, 'phase': 0, 'rate': 1, 'width': 5}
+        fields = ['amplitude']
+        if signal['type'] == self.SIGNAL_SINE:
+            fields.extend(['frequency', 'phase'])
+        if signal['type'] == self.SIGNAL_SPIKES:
+            fields.extend(['rate', 'width'])
+        for field in fields:
+            if field not in signal:
+                signal[field] = defaults[field]
+            if type(signal[field]) is not int and type(signal[field]) is not float:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter=f'{parameter}.{field}',
+                                            cause='must_be_number')
+        if signal['type'] == self.SIGNAL_SPIKES and (type(signal['width']) is not int or signal['width'] < 1):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter=f'{parameter}.width',
+                                        cause='must_be_int_greater_than_0')
+        if 'channels' not in signal:
+            signal['channels'] = list(range(channel_count))
+        if type(signal['channels']) is not list \
+                or any(type(channel) is not int or not 0 <= channel < channel_count for channel in signal['channels']):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter=f'{parameter}.channels',
+                                        cause='must_be_list_of_channel_indexes')
+
+    def _initialize_parameter_fields(self, parameters: dict):
+        """ Initializes the parameter fields of this node and the signal models state.
+
+        :param parameters: The parameters passed to this node.
+        :type parameters: dict
+        """
+        super()._initialize_parameter_fields(parameters)
+        self.channel_count: int = parameters['channel_count']
+        self.sampling_frequency: float = parameters['sampling_frequency']
+        self.chunk_size: int = parameters['chunk_size']
+        self.real_time: bool = parameters['real_time']
+        self.signals: List[dict] = parameters['signals']
+        self.markers: dict = parameters['markers']
+        self.duration: float = parameters['duration']
+        self._channel_names: List[str] = [f'channel_{index}' for index in range(self.channel_count)]
+        self._random = np.random.default_rng(parameters['seed'])
+        self._filter_states: List[Any] = [None] * len(self.signals)
+        self._marker_interval_samples: int = max(int(round(self.markers['interval'] * self.sampling_frequency)), 1) \
+            if self.markers is not None \
+            else 0
+        self._sample_index: int = 0
+        self._start_time: float = None
+        self._pending_chunks: List[Dict[str, FrameworkData]] = []
+        self._pending_chunks_lock = Lock()
+        self._chunks_output = Event()
+        self._stop_generation = Event()
+        self._generation_thread = Thread(target=self._generation_runner, name=f'{self.name}_generation')
+        self._generation_thread_started = False
+
+    def _is_next_node_call_enabled(self) -> bool:
+        return self._output_buffer[self.OUTPUT_TIMESTAMP].has_data()
+
+    def _is_generate_data_condition_satisfied(self) -> bool:
+        return True
+
+    def _generate_data(self) -> Dict[str, FrameworkData]:
+        """ Returns the chunks generated since the last execution, starting the generation thread on the first
+        execution.
+        """
+        if not self._generation_thread_started:
+            self._generation_thread_started = True
+            self._generation_thread.start()
+        with self._pending_chunks_lock:
+            pending_chunks = self._pending_chunks
+            self._pending_chunks = []
+        return_value = {output_name: FrameworkData() for output_name in self._get_outputs()}
+        for chunk in pending_chunks:
+            for output_name in self._get_outputs():
+                return_value[output_name].extend(chunk[output_name])
+        self._chunks_output.set()
+        return return_value
+
+    def _generation_runner(self):
+        """ Generates chunks until the node is disposed or the duration is reached, triggering the node execution after
+        each chunk.
+        """
+        self._start_time = time.time()
+        total_samples = int(self.duration * self.sampling_frequency) if self.duration is not None else None
+        while not self._stop_generation.is_set():
+            chunk_size = self.chunk_size if total_samples is None \
+                else min(self.chunk_size, total_samples - self._sample_index)
+            if chunk_size <= 0:
+                return
+            if self.real_time:
+                wait_time = self._start_time + (self._sample_index + chunk_size) / self.sampling_frequency - time.time()
+                if wait_time > 0 and self._stop_generation.wait(wait_time):
+                    return
+            chunk = self._generate_chunk(chunk_size)
+            self._chunks_output.clear()
+            with self._pending_chunks_lock:
+                self._pending_chunks.append(chunk)
+            self.run()
+            if not self.real_time:
+                while not self._chunks_output.wait(0.1):
+                    if self._stop_generation.is_set():
+                        return
+
+    def _generate_chunk(self, chunk_size: int) -> Dict[str, FrameworkData]:
+        """ Generates the next chunk of all outputs.
+
+        :param chunk_size: Number of samples of the chunk.
+        :type chunk_size: int
+
+        :return: The chunk of each output.
+        :rtype: Dict[str, FrameworkData]
+        """
+        sample_indexes = self._sample_index + np.arange(chunk_size)
+        times = sample_indexes / self.sampling_frequency
+        samples = np.zeros((self.channel_count, chunk_size))
+        for signal_index, signal in enumerate(self.signals):
+            samples[signal['channels']] += self._generate_signal(signal_index, signal, times)
+
+        markers = np.zeros(chunk_size)
+        if self.markers is not None:
+            event_positions = np.flatnonzero(sample_indexes % self._marker_interval_samples == 0)
+            markers[event_positions] = self._random.choice(self.markers['values'], event_positions.shape[0])
+        self._sample_index += chunk_size
+
+        return {
+            self.OUTPUT_MAIN: FrameworkData.from_multi_channel(self.sampling_frequency, self._channel_names,
+                                                               samples.tolist()),
+            self.OUTPUT_MARKER: FrameworkData.from_single_channel(self.sampling_frequency, markers.tolist()),
+            self.OUTPUT_TIMESTAMP: FrameworkData.from_single_channel(self.sampling_frequency,
+                                                                     (self._start_time + times).tolist())
+        }
+
+    def _generate_signal(self, signal_index: int, signal: dict, times: np.ndarray) -> np.ndarray:
+        """ Generates a signal model for its channels.
+
+        :param signal_index: The signal model index, used to keep its filter state.
+        :type signal_index: int
+        :param signal: The signal model.
+        :type signal: dict
+        :param times: The time of each sample of the chunk, in seconds.
+        :type times: np.ndarray
+
+        :return: The signal, in channels X samples format.
+        :rtype: np.ndarray
+        """
+        shape = (len(signal['channels']), times.shape[0])
+        if signal['type'] == self.SIGNAL_SINE:
+            return np.broadcast_to(
+                signal['amplitude'] * np.sin(2 * np.pi * signal['frequency'] * times + signal['phase']), shape)
+        if signal['type'] == self.SIGNAL_WHITE_NOISE:
+            return signal['amplitude'] * self._random.standard_normal(shape)
+        if signal['type'] == self.SIGNAL_PINK_NOISE:
+            numerator = self._PINK_NOISE_NUMERATOR
+            denominator = self._PINK_NOISE_DENOMINATOR
+            excitation = self._random.standard_normal(shape)
+        else:
+            numerator = signal['amplitude'] * scipy.signal.get_window('hann', signal['width'] + 2)[1:-1]
+            denominator = [1]
+            excitation = (self._random.random(shape) < signal['rate'] / self.sampling_frequency).astype(float)
+        if self._filter_states[signal_index] is None:
+            self._filter_states[signal_index] = np.zeros((shape[0], max(len(numerator), len(denominator)) - 1))
+        filtered, self._filter_states[signal_index] = scipy.signal.lfilter(numerator, denominator, excitation, axis=1,
+                                                                           zi=self._filter_states[signal_index])
+        if signal['type'] == self.SIGNAL_PINK_NOISE:
+            filtered *= signal['amplitude']
+        return filtered
+
+    def _get_outputs(self) -> List[str]:
+        """ Returns the outputs of the node.
+        """
+        return [
+            self.OUTPUT_MAIN,
+            self.OUTPUT_MARKER,
+            self.OUTPUT_TIMESTAMP
+        ]
+
+    def dispose(self) -> None:
+        """ Stops the generation thread and clears the buffers.
+        """
+        self._stop_generation.set()
+        if self._generation_thread_started:
+            self._generation_thread.join()
+        self._clear_output_buffer()
+        self._clear_input_buffer()
@@ -1,19 +1,22 @@
 import json
-import statistics
-
-import math
-from typing import List, Final, Dict, Any
+import struct
+from typing import List, Final, Dict
 
 from models.exception.invalid_parameter_value import InvalidParameterValue
 from models.exception.missing_parameter import MissingParameterError
 from models.framework_data import FrameworkData
 from models.node.output.device.serial.serial_output_node import SerialOutputNode
+from models.utils.condition_expression import compile_condition_expression
 
 
 class EletroEstimuladorESP32(SerialOutputNode):
     """ This node is used to connect to an ESP32, developed by LeNeR Lab in UEL, which controls an Electric Stimulator.
     This node only outputs commands if the previous trigger condition evaluation result differs from the current,
-    in order to avoid flooding the device with unnecessary messages.
+    in order to avoid flooding the device with unnecessary messages. The ON and OFF commands are built once, and a
+    pending trigger command is replaced by a newer one, so only the latest trigger state is sent.
+
+    With the ``binary`` framing, the commands payload is the command code (``1`` for write, ``2`` for read), the
+    variable code (``1`` for trigger) and the value, as a little-endian 32 bits int.
 
     Attributes:
         _MODULE_NAME (str): The name of the module (in this case, ``node.output.device.serial.eletroestimuladorESP32``).
@@ -30,10 +33,17 @@ class EletroEstimuladorESP32(SerialOutputNode):
             **byte_size** (*str*): byte size, in bits (5, 6, 7, 8), e.g. 8 (default: ``""``).\n
             **parity** (*str*): parity, (None=N, Even=E, Odd=O, Mark=M, Space=S) e.g. N (default: ``""``).\n
             **stop_bits** (*str*): stop bits (1, 1.5, 2), e.g. 1, /dev/ttyACM0, etc (default: ``""``).\n
-        **condition** (*str*): python expression for evaluating when trigger should be ON or OFF. The only variable
-        used in the expression should be ``condition_data``. ``math`` and ``statistics`` modules are available. Must be
-        an one-line expression that results in a bool output, e.g.
-        ``"statistics.mean(condition_data.get_data_single_channel())>0.5"``\n
+            **framing** (*str*): message framing, ``text`` or ``binary`` (default: ``"text"``).\n
+            **write_queue_size** (*int*): maximum number of commands waiting to be written (default: ``16``).\n
+            **wait_acknowledgement** (*bool*): whether the device answers each command (default: ``false``).\n
+            **acknowledgement_timeout** (*float*): time to wait for each acknowledgement, in seconds (default: ``0.5``).\n
+        **condition** (*str*): expression for evaluating when trigger should be ON or OFF, compiled once by
+        ``models.utils.condition_expression``. It may use channel names, reductions such as ``mean``, ``max`` and
+        ``any``, and comparisons, e.g. ``"mean(C3)>0.5"``. Must be an one-line expression that results in a bool output,
+        e.g. ``"statistics.mean(condition_data.get_data_single_channel())>0.5"``\n
+        **allow_legacy_condition** (*bool*): whether a ``condition`` outside of the supported expressions is evaluated
+        by Python over ``condition_data``, with the ``math`` and ``statistics`` modules available, on every call
+        (default: ``false``).\n
 
         .. code-block::
 
@@ -63,6 +73,10 @@ class EletroEstimuladorESP32(SerialOutputNode):
 
     INPUT_MAIN: Final[str] = 'main'
 
+    _BINARY_WRITE_COMMAND: Final[int] = 1
+    _BINARY_READ_COMMAND: Final[int] = 2
+    _BINARY_TRIGGER_VARIABLE: Final[int] = 1
+
     def _validate_parameters(self, parameters: dict):
         super()._validate_parameters(parameters)
         if 'condition' not in parameters:
@@ -76,20 +90,40 @@ class EletroEstimuladorESP32(SerialOutputNode):
                 parameter='condition',
                 cause='must_be_str'
             )
+        if 'allow_legacy_condition' not in parameters:
+            parameters['allow_legacy_condition'] = False
+        if type(parameters['allow_legacy_condition']) is not bool:
+            raise InvalidParameterValue(
+                module=self._MODULE_NAME, name=self.name,
+                parameter='allow_legacy_condition',
+                cause='must_be_bool'
+            )
 
     def _initialize_parameter_fields(self, parameters: dict):
         super()._initialize_parameter_fields(parameters)
         self._condition_script = parameters['condition']
-        self._condition = compile(f'condition_result={self._condition_script}', '', 'exec')
+        try:
+            self._condition = compile_condition_expression(self._condition_script,
+                                                           parameters['allow_legacy_condition'])
+        except SyntaxError:
+            raise InvalidParameterValue(
+                module=self._MODULE_NAME, name=self.name,
+                parameter='condition',
+                cause='must_be_valid_expression'
+            )
+        if not self._condition.is_vectorized:
+            self.print(f'Warning: condition "{self._condition_script}" is evaluated by Python on every call, which '
+                       f'is much slower than the supported expressions')
         self._last_trigger_value = False
+        self._set_trigger_commands = {
+            trigger_value: self._build_set_trigger_command(trigger_value) for trigger_value in [False, True]
+        }
 
     def _is_processing_condition_satisfied(self) -> bool:
         return True
 
     def _evaluate_trigger_condition(self, data: FrameworkData) -> bool:
-        local_variables: Dict[str, Any] = {"condition_data": data, "math": math, "statistics": statistics}
-        exec(self._condition, globals(), local_variables)
-        condition_result: bool = local_variables['condition_result']
+        condition_result: bool = self._condition.evaluate(data)
         if type(condition_result) is not bool:
             raise InvalidParameterValue(
                 module=self._MODULE_NAME,
@@ -101,10 +135,14 @@ class EletroEstimuladorESP32(SerialOutputNode):
 
     def _build_set_trigger_command(self, trigger_value: bool) -> bytes:
         trigger = 1 if trigger_value else 0
+        if self._binary_framing:
+            return struct.pack('<BBi', self._BINARY_WRITE_COMMAND, self._BINARY_TRIGGER_VARIABLE, trigger)
         msg = json.dumps({"cmd": "write", "variable": "trigger", "value": trigger})
         return msg.encode(self._encoding)
 
     def _build_get_trigger_command(self) -> bytes:
+        if self._binary_framing:
+            return struct.pack('<BBi', self._BINARY_READ_COMMAND, self._BINARY_TRIGGER_VARIABLE, 0)
         msg = json.dumps({"cmd": "read", "variable": "trigger"})
         return msg.encode(self._encoding)
 
@@ -116,9 +154,9 @@ class EletroEstimuladorESP32(SerialOutputNode):
         if trigger == self._last_trigger_value:
             return
 
-        command = self._build_set_trigger_command(trigger)
         self.print(f'Setting trigger to {trigger}')
-        self._write(command)
+        self._write(self._set_trigger_commands[trigger], key='trigger')
+        self._last_trigger_value = trigger
 
     def _get_inputs(self) -> List[str]:
         return [
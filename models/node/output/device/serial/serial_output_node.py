@@ -1,9 +1,13 @@
 import abc
-import csv
-import os
-from typing import List, Final, Dict
+import bisect
+import itertools
+import struct
+import time
+from collections import OrderedDict
+from threading import Thread, Condition
+from typing import List, Final, Dict, Optional, Tuple, Hashable
 
-from serial import SerialBase, Serial, SerialException
+from serial import SerialBase, SerialException, serial_for_url
 
 from models.exception.framework_base_exception import FrameworkBaseException
 from models.exception.invalid_parameter_value import InvalidParameterValue
@@ -15,6 +19,16 @@ from models.node.output.output_node import OutputNode
 class SerialOutputNode(OutputNode):
     """ This abstract node is used to connect to an serial device and communicate with it, implementing read, write and
         connect methods altogether
+
+    The commands are written by a writer thread, so the node thread never waits for the serial port. They wait for it
+    in a bounded queue, where a command written with a ``key`` replaces the pending command with the same key, so only
+    the latest state of a device variable is sent. When the queue is full, the oldest pending command is dropped.
+
+    With the ``binary`` framing, each message is sent as a ``0xA5`` sync byte, the payload length (one byte), the
+    payload and the sum of the payload bytes modulo 256, instead of being followed by the ``termination``.
+
+    When ``wait_acknowledgement`` is enabled, the writer thread reads one message from the device, through ``_read``,
+    after each command, and adds the time between the command and its acknowledgement to a latency histogram.
     Attributes:
         _MODULE_NAME (str): The name of the module (in this case, ``node.output.device.serial.serial_output_node``).
 
@@ -30,9 +44,17 @@ class SerialOutputNode(OutputNode):
             **byte_size** (*str*): byte size, in bits (5, 6, 7, 8), e.g. 8 (default: ``""``).\n
             **parity** (*str*): parity, (None=N, Even=E, Odd=O, Mark=M, Space=S) e.g. N (default: ``""``).\n
             **stop_bits** (*str*): stop bits (1, 1.5, 2), e.g. 1, /dev/ttyACM0, etc (default: ``""``).\n
+            **framing** (*str*): message framing, ``text`` or ``binary`` (default: ``"text"``).\n
+            **write_queue_size** (*int*): maximum number of commands waiting to be written (default: ``16``).\n
+            **wait_acknowledgement** (*bool*): whether the device answers each command (default: ``false``).\n
+            **acknowledgement_timeout** (*float*): time to wait for each acknowledgement, in seconds (default: ``0.5``).\n
     """
     _MODULE_NAME: Final[str] = 'node.output.device.serial.serial_output_node'
 
+    _FRAMINGS: Final[List[str]] = ['text', 'binary']
+    _FRAME_SYNC: Final[int] = 0xA5
+    _LATENCY_BIN_EDGES_MS: Final[List[float]] = [0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000]
+
     def _validate_parameters(self, parameters: dict):
         super()._validate_parameters(parameters)
         if 'communication' not in parameters:
@@ -103,14 +125,43 @@ class SerialOutputNode(OutputNode):
             raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
                                         parameter='communication.stop_bits',
                                         cause=f'must_be_between_one_of_[{SerialBase.STOPBITS}]')
+        if 'framing' not in parameters['communication']:
+            parameters['communication']['framing'] = 'text'
+        if parameters['communication']['framing'] not in self._FRAMINGS:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='communication.framing',
+                                        cause=f'must_be_between_one_of_[{self._FRAMINGS}]')
+        if 'write_queue_size' not in parameters['communication']:
+            parameters['communication']['write_queue_size'] = 16
+        if type(parameters['communication']['write_queue_size']) is not int \
+                or parameters['communication']['write_queue_size'] < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='communication.write_queue_size',
+                                        cause='must_be_int_greater_than_0')
+        if 'wait_acknowledgement' not in parameters['communication']:
+            parameters['communication']['wait_acknowledgement'] = False
+        if type(parameters['communication']['wait_acknowledgement']) is not bool:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='communication.wait_acknowledgement',
+                                        cause='must_be_bool')
+        if 'acknowledgement_timeout' not in parameters['communication']:
+            parameters['communication']['acknowledgement_timeout'] = 0.5
+        if type(parameters['communication']['acknowledgement_timeout']) is not float \
+                and type(parameters['communication']['acknowledgement_timeout']) is not int \
+                or parameters['communication']['acknowledgement_timeout'] <= 0:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='communication.acknowledgement_timeout',
+                                        cause='must_be_number_greater_than_0')
 
     def _initialize_parameter_fields(self, parameters: dict):
         super()._initialize_parameter_fields(parameters)
-        self._serial_session = Serial(port=parameters['communication']['serial_port'],
-                                      baudrate=parameters['communication']['baud_rate'],
-                                      bytesize=parameters['communication']['byte_size'],
-                                      parity=parameters['communication']['parity'],
-                                      stopbits=parameters['communication']['stop_bits'])
+        self._serial_session = serial_for_url(parameters['communication']['serial_port'],
+                                              do_not_open=True,
+                                              baudrate=parameters['communication']['baud_rate'],
+                                              bytesize=parameters['communication']['byte_size'],
+                                              parity=parameters['communication']['parity'],
+                                              stopbits=parameters['communication']['stop_bits'],
+                                              timeout=parameters['communication']['acknowledgement_timeout'])
         try:
             self._serial_session.open()
         except SerialException as e:
@@ -121,20 +172,114 @@ class SerialOutputNode(OutputNode):
             raise fw_exception
         self._encoding = parameters['communication']['encoding']
         self._termination = parameters['communication']['termination'].encode(self._encoding)
+        self._binary_framing = parameters['communication']['framing'] == 'binary'
+        self._write_queue_size = parameters['communication']['write_queue_size']
+        self._wait_acknowledgement = parameters['communication']['wait_acknowledgement']
+        self._pending_commands: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._command_keys = itertools.count()
+        self._commands_condition = Condition()
+        self._stop_writer = False
+        self.dropped_commands = 0
+        self.coalesced_commands = 0
+        self.acknowledgement_timeouts = 0
+        self._latency_counts = [0] * (len(self._LATENCY_BIN_EDGES_MS) + 1)
+        self._writer_thread = Thread(target=self._write_commands, daemon=True)
+        self._writer_thread.start()
 
-    def _write(self, data: bytes) -> None:
+    def _frame(self, data: bytes) -> bytes:
+        """ Frames a message to be sent, following the configured framing.
+        """
+        if not self._binary_framing:
+            return data + self._termination
+        if len(data) > 255:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='communication.framing',
+                                        cause='binary_message_must_have_at_most_255_bytes')
+        return struct.pack('<BB', self._FRAME_SYNC, len(data)) + data + bytes([sum(data) & 0xFF])
+
+    def _write(self, data: bytes, key: Hashable = None) -> None:
+        """ Queues a message to be written by the writer thread, without waiting for the serial port.
+
+        :param data: The message, without framing.
+        :type data: bytes
+        :param key: The variable the message sets. A pending message with the same key is replaced by this one. By
+            default the message is never replaced.
+        :type key: Hashable
+        """
+        frame = self._frame(data)
+        with self._commands_condition:
+            if key is None:
+                key = ('_command', next(self._command_keys))
+            if key in self._pending_commands:
+                self.coalesced_commands += 1
+            elif len(self._pending_commands) >= self._write_queue_size:
+                self._pending_commands.popitem(last=False)
+                self.dropped_commands += 1
+                self.print('Write queue is full, dropping the oldest command')
+            self._pending_commands[key] = frame
+            self._commands_condition.notify()
+
+    def _send(self, frame: bytes) -> None:
+        """ Writes a framed message to the serial port, on the writer thread, and waits for its acknowledgement when
+        it is enabled.
+        """
         try:
-            self._serial_session.write(data + self._termination)
+            self._serial_session.write(frame)
+            command_time = time.perf_counter()
+            if not self._wait_acknowledgement:
+                return
+            if self._read() is None:
+                self.acknowledgement_timeouts += 1
+                return
+            latency_ms = (time.perf_counter() - command_time) * 1000
+            self._latency_counts[bisect.bisect_left(self._LATENCY_BIN_EDGES_MS, latency_ms)] += 1
         except SerialException as e:
             fw_exception = FrameworkBaseException(exception_type='serial.write',
                                                   module=self._MODULE_NAME,
                                                   name=self.name)
             fw_exception.message += f'[{e}]'
-            raise fw_exception
+            self.print('Error writing to serial port', exception=fw_exception)
+        except FrameworkBaseException as e:
+            self.print('Error reading the acknowledgement from serial port', exception=e)
 
-    def _read(self) -> bytes:
+    def _write_commands(self) -> None:
+        """ Runs on the writer thread, writing the queued commands in order, until the node is disposed and the queue
+        is empty.
+        """
+        while True:
+            with self._commands_condition:
+                while len(self._pending_commands) == 0 and not self._stop_writer:
+                    self._commands_condition.wait()
+                if len(self._pending_commands) == 0:
+                    return
+                _, frame = self._pending_commands.popitem(last=False)
+            self._send(frame)
+
+    def _read(self) -> Optional[bytes]:
+        """ Reads a message from the device, following the configured framing.
+
+        :return: The message, without framing, or ``None`` if no complete message was received before the timeout.
+        :rtype: Optional[bytes]
+        """
         try:
-            return self._serial_session.read_until(self._termination)
+            if not self._binary_framing:
+                message = self._serial_session.read_until(self._termination)
+                if not message.endswith(self._termination):
+                    return None
+                return message[:len(message) - len(self._termination)]
+            while True:
+                sync = self._serial_session.read(1)
+                if len(sync) == 0:
+                    return None
+                if sync[0] == self._FRAME_SYNC:
+                    break
+            length = self._serial_session.read(1)
+            if len(length) == 0:
+                return None
+            message = self._serial_session.read(length[0] + 1)
+            if len(message) < length[0] + 1 or sum(message[:-1]) & 0xFF != message[-1]:
+                return None
+            return message[:-1]
         except SerialException as e:
             fw_exception = FrameworkBaseException(exception_type='serial.read',
                                                   module=self._MODULE_NAME,
@@ -142,6 +287,14 @@ class SerialOutputNode(OutputNode):
             fw_exception.message += f'[{e}]'
             raise fw_exception
 
+    def get_latency_histogram(self) -> List[Tuple[float, int]]:
+        """ Returns the command to acknowledgement latency histogram.
+
+        :return: The upper edge of each bin, in milliseconds, and its count. The last bin upper edge is infinite.
+        :rtype: List[Tuple[float, int]]
+        """
+        return list(zip(self._LATENCY_BIN_EDGES_MS + [float('inf')], self._latency_counts))
+
     @abc.abstractmethod
     def _process(self, data: Dict[str, FrameworkData]) -> None:
         raise NotImplementedError()
@@ -155,5 +308,17 @@ class SerialOutputNode(OutputNode):
         raise NotImplementedError()
 
     def dispose(self) -> None:
+        """ Writes the pending commands and closes the serial port.
+        """
+        self._clear_output_buffer()
+        self._clear_input_buffer()
+        with self._commands_condition:
+            self._stop_writer = True
+            self._commands_condition.notify()
+        self._writer_thread.join()
+        if self._wait_acknowledgement:
+            histogram = ', '.join(f'<{edge:g}ms: {count}' for edge, count in self.get_latency_histogram() if count > 0)
+            self.print(f'Acknowledgement latency: {histogram}; {self.acknowledgement_timeouts} timeouts')
+        if self.dropped_commands > 0 or self.coalesced_commands > 0:
+            self.print(f'{self.dropped_commands} commands dropped, {self.coalesced_commands} commands coalesced')
         self._serial_session.close()
-        super().dispose()
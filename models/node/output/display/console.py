@@ -1,15 +1,23 @@
-from typing import List, Final, Dict
+from typing import List, Final, Dict, Optional
 
 import sys
 import time
 
+import numpy as np
+
 from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.non_compatible_data import NonCompatibleData
 from models.framework_data import FrameworkData
 from models.node.output.output_node import OutputNode
 
 
 class Console(OutputNode):
     """ This node displays it's input in the console.
+
+    In the ``raw`` mode every chunk received is printed, with all its samples. In the ``summary`` mode the samples of
+    each channel are aggregated (last value, mean, minimum, maximum and sample count), and a single line with the
+    aggregates of all channels is printed every ``refresh_interval`` seconds, so the console can be left on at high
+    sampling rates. The ``summary`` mode only accepts numeric samples, not epochs.
     {
          "module": "models.node.output.display",
          "type": "Console",
@@ -28,6 +36,8 @@ class Console(OutputNode):
 
         **module**: Current module name (in this case ``models.node.output``).\n
         **name**: Current node instance name (in this case, ``Console``).\n
+        **mode** (str): ``raw`` to print every chunk, or ``summary`` to print the channels aggregates once per ``refresh_interval``. This is a optional parameter, the default value is ``raw``.\n
+        **refresh_interval** (float): Interval between summary lines, in seconds. Only used in the ``summary`` mode. This is a optional parameter, the default value is 1.\n
         **buffer_options** (dict): The buffer options.\n
             **clear_output_buffer_on_data_input** (bool): Whether to clear the output buffer when data is inputted.\n
             **clear_input_buffer_after_process** (bool): Whether to clear the input buffer after the process method is called.\n
@@ -39,12 +49,16 @@ class Console(OutputNode):
 
     INPUT_MAIN: Final[str] = 'main'
 
+    _MODES: Final[List[str]] = ['raw', 'summary']
+
     def _validate_parameters(self, parameters: dict):
         """ Validates the parameters that were passed to the node.
 
         :param parameters: The parameters that were passed to the node.
         :type parameters: dict
 
+        :raises InvalidParameterValue: The ``mode`` parameter must be ``raw`` or ``summary``.
+        :raises InvalidParameterValue: The ``refresh_interval`` parameter must be a positive number.
         """
         super()._validate_parameters(parameters)
         if 'inplace' not in parameters:
@@ -53,6 +67,12 @@ class Console(OutputNode):
         if 'prefix' not in parameters:
             parameters['prefix'] = ''
 
+        if 'mode' not in parameters:
+            parameters['mode'] = 'raw'
+
+        if 'refresh_interval' not in parameters:
+            parameters['refresh_interval'] = 1.0
+
         if type(parameters['prefix']) is not str:
             raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
                                         parameter='prefix',
@@ -63,6 +83,17 @@ class Console(OutputNode):
                                         parameter='inplace',
                                         cause='must_be_bool')
 
+        if parameters['mode'] not in self._MODES:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='mode',
+                                        cause=f'must_be_one_of_{self._MODES}')
+
+        if type(parameters['refresh_interval']) is not float and type(parameters['refresh_interval']) is not int \
+                or parameters['refresh_interval'] <= 0:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='refresh_interval',
+                                        cause='must_be_number_greater_than_0')
+
     def _initialize_parameter_fields(self, parameters: dict):
         """ Initializes the parameters that were passed to the node.
 
@@ -72,6 +103,11 @@ class Console(OutputNode):
         super()._initialize_parameter_fields(parameters)
         self._prefix = parameters['prefix']
         self._inplace = parameters['inplace']
+        self._mode = parameters['mode']
+        self._refresh_interval = parameters['refresh_interval']
+        self._last_refresh_time = time.monotonic()
+        self._summary_channels: Optional[List[str]] = None
+        self._reset_summary()
 
     def _get_inputs(self) -> List[str]:
         """ Returns the input names of this node.
@@ -83,11 +119,68 @@ class Console(OutputNode):
     def _is_processing_condition_satisfied(self) -> bool:
         return True
 
+    def _reset_summary(self) -> None:
+        channel_count = len(self._summary_channels) if self._summary_channels is not None else 0
+        self._summary_last = np.full(channel_count, np.nan)
+        self._summary_sum = np.zeros(channel_count)
+        self._summary_min = np.full(channel_count, np.inf)
+        self._summary_max = np.full(channel_count, -np.inf)
+        self._summary_count = 0
+
+    def _print_summary(self) -> None:
+        """ Prints the aggregates of each channel since the last summary line, if any sample was received, and resets
+        them.
+        """
+        self._last_refresh_time = time.monotonic()
+        if self._summary_count == 0:
+            return
+        mean = self._summary_sum / self._summary_count
+        channel_summaries = [
+            f'{channel}: last={self._summary_last[index]:.6g} mean={mean[index]:.6g} '
+            f'min={self._summary_min[index]:.6g} max={self._summary_max[index]:.6g}'
+            for index, channel in enumerate(self._summary_channels)
+        ]
+        print(f'{time.time()} - {self._MODULE_NAME}.{self.name} - {self._prefix}n={self._summary_count} | '
+              + ' | '.join(channel_summaries), end='\r' if self._inplace else '\n')
+        sys.stdout.flush()
+        self._reset_summary()
+
+    def _add_to_summary(self, input_data: FrameworkData) -> None:
+        """ Adds the samples received to the aggregates of each channel.
+
+        :raises NonCompatibleData: The samples aren't numbers, e.g. epochs.
+        """
+        if not input_data.has_data():
+            return
+        if self._summary_channels != input_data.channels:
+            self._print_summary()
+            self._summary_channels = list(input_data.channels)
+            self._reset_summary()
+        try:
+            samples = np.asarray(input_data.get_data_as_2d_array(), dtype=float)
+        except (TypeError, ValueError):
+            raise NonCompatibleData(module=self._MODULE_NAME, name=self.name,
+                                    cause='summary_mode_requires_numeric_data')
+        if samples.ndim != 2:
+            raise NonCompatibleData(module=self._MODULE_NAME, name=self.name,
+                                    cause='summary_mode_requires_numeric_data')
+        self._summary_last = samples[:, -1]
+        self._summary_sum += samples.sum(axis=1)
+        np.minimum(self._summary_min, samples.min(axis=1), out=self._summary_min)
+        np.maximum(self._summary_max, samples.max(axis=1), out=self._summary_max)
+        self._summary_count += samples.shape[1]
+
     def _process(self, data: Dict[str, FrameworkData]) -> None:
         """ Runs the node.
         """
-        output = ''
         input_data= data[self.INPUT_MAIN]
+        if self._mode == 'summary':
+            self._add_to_summary(input_data)
+            if time.monotonic() - self._last_refresh_time >= self._refresh_interval:
+                self._print_summary()
+            self._clear_input_buffer()
+            return
+        output = ''
         for channel in input_data.channels:
             output += f'{time.time()} - {self._MODULE_NAME}.{self.name} - {channel}: {self._prefix}{input_data.get_data_on_channel(channel)}'
         print(output, end='\r' if self._inplace else '\n')
@@ -97,5 +190,7 @@ class Console(OutputNode):
     def dispose(self) -> None:
         """ Node self implementation of disposal of allocated resources.
         """
+        if self._mode == 'summary':
+            self._print_summary()
         self._clear_output_buffer()
         self._clear_input_buffer()
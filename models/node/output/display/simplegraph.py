@@ -1,23 +1,28 @@
-import copy
-import csv
-import os
-from threading import Thread
-from typing import List, Final, Dict
+from typing import List, Final, Dict, Optional, Tuple
 
-import sys
 import time
+import numpy as np
 from pyqtgraph import GraphicsWindow
-from pyqtgraph.Qt import QtGui
-from PyQt5 import QtWidgets
+from PyQt5 import QtCore, QtWidgets
 
 from models.exception.invalid_parameter_value import InvalidParameterValue
 from models.exception.missing_parameter import MissingParameterError
 from models.framework_data import FrameworkData
 from models.node.output.output_node import OutputNode
+from models.utils.ring_buffer import RingBuffer
 
 
 class SimpleGraph(OutputNode):
-    """ This node displays it's input in the console.
+    """ This node plots it's input in a window.
+
+    The node thread only copies the received samples to a ring buffer, without locks, and never touches the window.
+    The Qt application (shared by all graphs) and the window are created in the main thread, where the node is
+    created, and a Qt timer redraws the latest ``window`` samples at ``refresh_rate`` frames per second, when the
+    main thread processes the Qt events. Before drawing, each channel is decimated to ``pixel_width`` columns, keeping
+    the minimum and the maximum of each column, so the drawn shape is the same as the full signal one. When drawing a
+    frame takes longer than the frame interval, the late frames are dropped instead of queued, so a slow repaint never
+    delays the pipeline.
+
     "plot_signal": {
          "module": "models.node.output.display",
          "type": "SimpleGraph",
@@ -37,6 +42,8 @@ class SimpleGraph(OutputNode):
         **type**: Node type (in this case ``SimpleGraph``).\n
         **module**: Current module name (in this case ``models.node.output.display``).\n
         **window**: Plotting window size, in samples (in this case, 500 samples).\n
+        **refresh_rate** (float): Maximum number of frames drawn per second. This is a optional parameter, the default value is 30.\n
+        **pixel_width** (int): Number of columns each channel is decimated to before drawing, usually the plot width in pixels. This is a optional parameter, the default value is 800.\n
 
     """
 
@@ -50,6 +57,10 @@ class SimpleGraph(OutputNode):
         :param parameters: The parameters that were passed to the node.
         :type parameters: dict
 
+        :raises MissingParameterError: The ``window`` parameter is required.
+        :raises InvalidParameterValue: The ``window`` parameter must be an int.
+        :raises InvalidParameterValue: The ``refresh_rate`` parameter must be a positive number.
+        :raises InvalidParameterValue: The ``pixel_width`` parameter must be a positive int.
         """
         super()._validate_parameters(parameters)
         if 'window' not in parameters:
@@ -61,6 +72,19 @@ class SimpleGraph(OutputNode):
             raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
                                         parameter='window',
                                         cause='must_be_int')
+        if 'refresh_rate' not in parameters:
+            parameters['refresh_rate'] = 30
+        if type(parameters['refresh_rate']) is not float and type(parameters['refresh_rate']) is not int \
+                or parameters['refresh_rate'] <= 0:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='refresh_rate',
+                                        cause='must_be_number_greater_than_0')
+        if 'pixel_width' not in parameters:
+            parameters['pixel_width'] = 800
+        if type(parameters['pixel_width']) is not int or parameters['pixel_width'] < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='pixel_width',
+                                        cause='must_be_int_greater_than_0')
 
     def _initialize_parameter_fields(self, parameters: dict):
         """ Initializes the parameters that were passed to the node.
@@ -70,10 +94,19 @@ class SimpleGraph(OutputNode):
         """
         super()._initialize_parameter_fields(parameters)
         self.window = parameters['window']
-        self.app = QtGui.QApplication([])
-        self.win = GraphicsWindow(title=self.name, size=(800, 600))
-        self.data_buffer = FrameworkData()
+        self.refresh_rate = parameters['refresh_rate']
+        self.pixel_width = parameters['pixel_width']
+        self.app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+        self.win = GraphicsWindow(title=self.name, size=(self.pixel_width, 600))
         self.curves = {}
+        self.dropped_frames = 0
+        self._channels: Optional[List[str]] = None
+        self._ring_buffer: Optional[RingBuffer] = None
+        self._last_written_count = 0
+        self._last_frame_time: Optional[float] = None
+        self._frame_timer = QtCore.QTimer()
+        self._frame_timer.timeout.connect(self._draw_frame)
+        self._frame_timer.start(max(int(1000 / self.refresh_rate), 1))
 
     def _get_inputs(self) -> List[str]:
         """ Returns the input names of this node.
@@ -85,36 +118,84 @@ class SimpleGraph(OutputNode):
     def _is_processing_condition_satisfied(self) -> bool:
         return self._input_buffer[self.INPUT_MAIN].get_data_count() > 0
 
-    def _init_plots_curves(self, input_data: FrameworkData) -> None:
-        for index, channel in enumerate(input_data.channels):
+    def _init_plots_curves(self, channels: List[str]) -> None:
+        for index, channel in enumerate(channels):
             plot = self.win.addPlot(row=index, col=0)
             plot.showAxis('left', False)
             plot.setMenuEnabled('left', False)
             plot.showAxis('bottom', False)
             plot.setMenuEnabled('bottom', False)
             plot.setTitle(channel)
+            plot.setXRange(0, self.window, padding=0)
             self.curves[channel] = plot.plot()
 
-    def _plot_data(self, input_data: FrameworkData) -> None:
-        for channel in input_data.channels:
-            self.curves[channel].setData(input_data.get_data_on_channel(channel))
-        self.app.processEvents()
+    @staticmethod
+    def _decimate(samples: np.ndarray, pixel_width: int) -> Tuple[np.ndarray, np.ndarray]:
+        """ Decimates each channel to ``pixel_width`` columns, keeping the minimum and the maximum samples of each
+        column, in this order. The oldest samples that don't fill a whole column are dropped.
+
+        :param samples: The samples, with one row per channel.
+        :type samples: np.ndarray
+        :param pixel_width: The number of columns.
+        :type pixel_width: int
 
+        :return: The position of each decimated sample, in samples since the first one, and the decimated samples.
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        sample_count = samples.shape[1]
+        if sample_count <= 2 * pixel_width:
+            return np.arange(sample_count), samples
+        column_size = sample_count // pixel_width
+        offset = sample_count - column_size * pixel_width
+        columns = samples[:, offset:].reshape(samples.shape[0], pixel_width, column_size)
+        decimated = np.empty((samples.shape[0], pixel_width, 2), dtype=samples.dtype)
+        np.min(columns, axis=2, out=decimated[:, :, 0])
+        np.max(columns, axis=2, out=decimated[:, :, 1])
+        positions = np.repeat(offset + np.arange(pixel_width) * column_size, 2)
+        positions[1::2] += column_size - 1
+        return positions, decimated.reshape(samples.shape[0], 2 * pixel_width)
+
+    def _plot_data(self, samples: np.ndarray) -> None:
+        positions, decimated = self._decimate(samples, self.pixel_width)
+        positions = positions + (self.window - samples.shape[1])
+        for index, channel in enumerate(self._channels):
+            self.curves[channel].setData(positions, decimated[index])
+
+    def _draw_frame(self) -> None:
+        """ Draws the latest samples, if any sample was written since the last frame. Runs in the main thread, on each
+        frame timer timeout. Qt doesn't queue the timeouts missed while a frame is drawn, so late frames are dropped.
+        """
+        now = time.monotonic()
+        frame_interval = 1 / self.refresh_rate
+        if self._last_frame_time is not None and now - self._last_frame_time >= 2 * frame_interval:
+            self.dropped_frames += int((now - self._last_frame_time) / frame_interval) - 1
+        self._last_frame_time = now
+        ring_buffer = self._ring_buffer
+        if ring_buffer is None or ring_buffer.written_count == self._last_written_count:
+            return
+        if len(self.curves) == 0:
+            self._init_plots_curves(self._channels)
+        samples, self._last_written_count = ring_buffer.read_latest(self.window)
+        self._plot_data(samples)
 
     def _process(self, data: Dict[str, FrameworkData]) -> None:
         """ Runs the node.
         """
         input_data = data[self.INPUT_MAIN]
-        self.data_buffer = input_data.splice(0, self.window)
-        if len(self.curves) == 0:
-            self._init_plots_curves(self.data_buffer)
-        self._plot_data(self.data_buffer)
+        input_data = input_data.splice(0, input_data.get_data_count())
+        if self._ring_buffer is None:
+            self._channels = list(input_data.channels)
+            self._ring_buffer = RingBuffer(len(self._channels), self.window)
+        self._ring_buffer.write(
+            np.asarray([input_data.get_data_on_channel(channel) for channel in self._channels], dtype=float))
 
     def dispose(self) -> None:
         """ Node self implementation of disposal of allocated resources.
         """
         self._clear_output_buffer()
         self._clear_input_buffer()
-        del self.curves
-        self.app.quit()
-        super().dispose()
+        self._frame_timer.stop()
+        self.curves = {}
+        self.win.close()
+        if self.dropped_frames > 0:
+            self.print(f'{self.dropped_frames} frames were dropped')
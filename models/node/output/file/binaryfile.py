@@ -0,0 +1,179 @@
+import os
+from typing import List, Final, Dict
+
+import numpy as np
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.missing_parameter import MissingParameterError
+from models.framework_data import FrameworkData
+from models.node.output.output_node import OutputNode
+from models.utils.binary_recording import BinaryRecordingWriter
+
+
+class BinaryFile(OutputNode):
+    """ This node records its input data to a chunked binary recording file, that can be replayed by the
+    ``models.node.generator.file.binaryfile.BinaryFile`` node. Each block of samples is written with a single
+    conversion to the recording dtype, with no text formatting and no flush, so recording costs little more than
+    copying the samples.
+
+    The recording header (channels and sampling frequency) is taken from the first data received. When the node is
+    disposed, the remaining samples are written, followed by the timestamp index.
+
+    Attributes:
+        _MODULE_NAME (str): The name of this module (in this case, 'node.output.file.binaryfile').
+        INPUT_MAIN (str): The name of the main input (in this case, 'main').
+        INPUT_TIMESTAMP (str): The name of the timestamp input (in this case, 'timestamp').
+
+    ``configuration.json`` usage example:
+
+        **module**: Current module name (in this case ``models.node.output.file``).\n
+        **name**: Current node instance name (in this case, ``BinaryFile``).\n
+        **file_path** (str): The path to the ``.bin`` file that will be created/written to.\n
+        **dtype** (str): NumPy dtype of the recorded samples. This is a optional parameter, the default value is ``float32``.\n
+        **block_size** (int): Minimum number of samples of each recorded block. Smaller blocks have more overhead, larger blocks are kept in memory longer before being written. This is a optional parameter, the default value is 1.\n
+        **generate_timestamps** (bool): If ``True``, the ``timestamp`` input isn't used, and the timestamps are generated from the sample index and the sampling frequency, in seconds. This is a optional parameter, the default value is ``False``.\n
+        **buffer_options** (dict): The buffer options.\n
+            **clear_output_buffer_on_data_input** (bool): Whether to clear the output buffer when data is inputted.\n
+            **clear_input_buffer_after_process** (bool): Whether to clear the input buffer after the process method is called.\n
+            **clear_output_buffer_after_process** (bool): Whether to clear the output buffer after the process method is called.\n
+    """
+
+    _MODULE_NAME: Final[str] = 'node.output.file.binaryfile'
+
+    INPUT_MAIN: Final[str] = 'main'
+    INPUT_TIMESTAMP: Final[str] = 'timestamp'
+
+    def _validate_parameters(self, parameters: dict):
+        """ Validates the parameters that were passed to the node.
+
+        :param parameters: The parameters that were passed to the node.
+        :type parameters: dict
+
+        :raises MissingParameterError: The ``file_path`` parameter is required.
+        :raises InvalidParameterValue: The ``file_path`` parameter must be a ``.bin`` file path.
+        :raises InvalidParameterValue: The ``dtype`` parameter must be a numeric NumPy dtype.
+        :raises InvalidParameterValue: The ``block_size`` parameter must be a positive int.
+        :raises InvalidParameterValue: The ``generate_timestamps`` parameter must be a bool.
+        """
+        super()._validate_parameters(parameters)
+        if 'file_path' not in parameters:
+            raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path')
+        if type(parameters['file_path']) is not str:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path',
+                                        cause='must_be_string')
+        if os.path.splitext(parameters['file_path'])[1] != '.bin':
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path',
+                                        cause='must_be_bin_file')
+        if 'dtype' not in parameters:
+            parameters['dtype'] = 'float32'
+        try:
+            is_numeric_dtype = np.issubdtype(np.dtype(parameters['dtype']), np.number)
+        except TypeError:
+            is_numeric_dtype = False
+        if not is_numeric_dtype:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='dtype',
+                                        cause='must_be_numeric_numpy_dtype')
+        if 'block_size' not in parameters:
+            parameters['block_size'] = 1
+        if type(parameters['block_size']) is not int or parameters['block_size'] < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='block_size',
+                                        cause='must_be_int_greater_than_0')
+        if 'generate_timestamps' not in parameters:
+            parameters['generate_timestamps'] = False
+        if type(parameters['generate_timestamps']) is not bool:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='generate_timestamps',
+                                        cause='must_be_bool')
+
+    def _initialize_parameter_fields(self, parameters: dict):
+        """ Initializes the parameters that were passed to the node.
+
+        :param parameters: The parameters that were passed to the node.
+        :type parameters: dict
+        """
+        super()._initialize_parameter_fields(parameters)
+        self.file_path = parameters['file_path']
+        self.dtype = parameters['dtype']
+        self.block_size = parameters['block_size']
+        self.generate_timestamps = parameters['generate_timestamps']
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+        self._writer = None
+        self._written_sample_count = 0
+
+    def _get_inputs(self) -> List[str]:
+        """ Returns the input names of this node.
+        """
+        return [
+            self.INPUT_MAIN,
+            self.INPUT_TIMESTAMP
+        ]
+
+    def _get_block_sample_count(self) -> int:
+        """ Returns the number of samples that can be written, which are the main samples with a matching timestamp.
+        """
+        main_count = self._input_buffer[self.INPUT_MAIN].get_data_count()
+        if self.generate_timestamps:
+            return main_count
+        return min(main_count, self._input_buffer[self.INPUT_TIMESTAMP].get_data_count())
+
+    def _is_processing_condition_satisfied(self) -> bool:
+        return self._get_block_sample_count() >= self.block_size
+
+    def _init_writer(self, data: FrameworkData) -> None:
+        """ Creates the recording file, with the channels and sampling frequency of the first data received.
+        """
+        if self._writer is not None:
+            return
+        directory = os.path.dirname(self.file_path)
+        if directory != '' and not os.path.exists(directory):
+            os.makedirs(directory)
+        self.print('Creating binary file')
+        self._writer = BinaryRecordingWriter(self.file_path, data.channels, data.sampling_frequency, self.dtype)
+
+    def _write_block(self) -> None:
+        """ Writes the samples that have a matching timestamp, removing them from the input buffers.
+        """
+        sample_count = self._get_block_sample_count()
+        if sample_count == 0:
+            return
+        main_data = self._input_buffer[self.INPUT_MAIN].splice(0, sample_count)
+        self._init_writer(main_data)
+        if self.generate_timestamps:
+            timestamps = np.arange(self._written_sample_count, self._written_sample_count + sample_count, dtype=float)
+            if main_data.sampling_frequency:
+                timestamps /= main_data.sampling_frequency
+        else:
+            timestamps = np.asarray(
+                self._input_buffer[self.INPUT_TIMESTAMP].splice(0, sample_count).get_data_single_channel())
+        self._writer.write_block(np.asarray([main_data.get_data_on_channel(channel)
+                                             for channel in self._writer.channels]),
+                                 timestamps)
+        self._written_sample_count += sample_count
+
+    def _process(self, data: Dict[str, FrameworkData]) -> None:
+        """ Runs the node.
+        """
+        self._write_block()
+
+    def _clear_input_buffer(self):
+        """ Keeps the samples that weren't written yet, as they are removed from the input buffers when written.
+        """
+        if not hasattr(self, '_input_buffer'):
+            super()._clear_input_buffer()
+
+    def dispose(self) -> None:
+        """ Node self implementation of disposal of allocated resources.
+        """
+        if hasattr(self, '_input_buffer'):
+            self._write_block()
+        self._clear_output_buffer()
+        super()._clear_input_buffer()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
@@ -1,6 +1,13 @@
 import csv
+import gzip
+import io
 import os
-from typing import List, Final, Dict
+import time
+from queue import Queue, Empty
+from threading import Thread
+from typing import List, Final, Dict, Optional, Tuple
+
+import numpy as np
 
 from models.exception.invalid_parameter_value import InvalidParameterValue
 from models.exception.missing_parameter import MissingParameterError
@@ -9,17 +16,29 @@ from models.node.output.output_node import OutputNode
 
 
 class CSVFile(OutputNode):
-    """ This node is capable of creating/writing the output data to a CSV file. 
+    """ This node is capable of creating/writing the output data to a CSV file.
+
+    The node thread only hands each chunk to a dedicated I/O thread, through a bounded queue, so a slow disk doesn't
+    stall the graph until the queue is full. The I/O thread formats each chunk as a whole text block, writes it with a
+    single call and flushes the file when ``flush_size`` bytes were written or ``flush_interval`` seconds have passed
+    since the last flush. The file can be rotated by size or duration, and compressed with gzip.
 
     Attributes:
         _MODULE_NAME (str): The name of this module (in this case, 'node.output.file.csvfile').
         INPUT_MAIN (str): The name of the main input (in this case, 'main').
-    
+
     ``configuration.json`` usage example:
 
         **module**: Current module name (in this case ``models.node.output.file``).\n
         **name**: Current node instance name (in this case, ``CSVFile``).\n
         **file_path** (str): The path to the CSV file that will be created/written to.\n
+        **precision** (int): Number of decimal places of the written values. If not set, the values are written with all their digits. This is a optional parameter, the default value is ``null``.\n
+        **flush_interval** (float): Maximum time between flushes, in seconds. This is a optional parameter, the default value is 1.\n
+        **flush_size** (int): Number of bytes written that triggers a flush. This is a optional parameter, the default value is 1048576.\n
+        **rotate_size** (int): Size in bytes (before compression) after which a new file is started. When the file is rotated, the files are named after ``file_path`` with a number suffix, like ``data_0.csv``, ``data_1.csv``. This is a optional parameter, by default the file isn't rotated by size.\n
+        **rotate_interval** (float): Duration in seconds after which a new file is started. This is a optional parameter, by default the file isn't rotated by duration.\n
+        **compress** (bool): If ``True``, the files are gzip compressed, with a ``.gz`` suffix. This is a optional parameter, the default value is ``False``.\n
+        **write_queue_size** (int): Maximum number of chunks waiting for the I/O thread. This is a optional parameter, the default value is 64.\n
         **buffer_options** (dict): The buffer options.\n
             **clear_output_buffer_on_data_input** (bool): Whether to clear the output buffer when data is inputted.\n
             **clear_input_buffer_after_process** (bool): Whether to clear the input buffer after the process method is called.\n
@@ -42,6 +61,9 @@ class CSVFile(OutputNode):
         :raises MissingParameterError: The ``file_path`` parameter is required.
         :raises InvalidParameterValue: The ``file_path`` parameter must be a string.
         :raises InvalidParameterValue: The ``file_path`` parameter must be a CSV file.
+        :raises InvalidParameterValue: The ``precision`` parameter must be a non negative int.
+        :raises InvalidParameterValue: The ``flush_interval``, ``flush_size``, ``rotate_size``, ``rotate_interval`` and ``write_queue_size`` parameters must be positive numbers.
+        :raises InvalidParameterValue: The ``compress`` parameter must be a bool.
 
         """
         if 'file_path' not in parameters:
@@ -55,6 +77,26 @@ class CSVFile(OutputNode):
             raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
                                         parameter='file_path',
                                         cause='must_be_csv_file')
+        if 'precision' in parameters and parameters['precision'] is not None \
+                and (type(parameters['precision']) is not int or parameters['precision'] < 0):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='precision',
+                                        cause='must_be_int_greater_or_equal_to_0')
+        for number_parameter in ['flush_interval', 'flush_size', 'rotate_size', 'rotate_interval', 'write_queue_size']:
+            if number_parameter not in parameters or parameters[number_parameter] is None:
+                continue
+            is_int_parameter = number_parameter in ['flush_size', 'rotate_size', 'write_queue_size']
+            if (type(parameters[number_parameter]) is not int
+                and (is_int_parameter or type(parameters[number_parameter]) is not float)) \
+                    or parameters[number_parameter] <= 0:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter=number_parameter,
+                                            cause='must_be_int_greater_than_0' if is_int_parameter
+                                            else 'must_be_number_greater_than_0')
+        if 'compress' in parameters and type(parameters['compress']) is not bool:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='compress',
+                                        cause='must_be_bool')
 
     def _initialize_parameter_fields(self, parameters: dict):
         """ Initializes the parameters that were passed to the node.
@@ -64,10 +106,25 @@ class CSVFile(OutputNode):
         """
         super()._initialize_parameter_fields(parameters)
         self.file_path = parameters['file_path']
+        self.precision = parameters['precision'] if 'precision' in parameters else None
+        self.flush_interval = parameters['flush_interval'] if 'flush_interval' in parameters else 1.0
+        self.flush_size = parameters['flush_size'] if 'flush_size' in parameters else 1048576
+        self.rotate_size = parameters['rotate_size'] if 'rotate_size' in parameters else None
+        self.rotate_interval = parameters['rotate_interval'] if 'rotate_interval' in parameters else None
+        self.compress = parameters['compress'] if 'compress' in parameters else False
+        self.write_queue_size = parameters['write_queue_size'] if 'write_queue_size' in parameters else 64
         if os.path.exists(self.file_path):
             os.remove(self.file_path)
             # self.file_path = f'{self.file_path[:-4]}_{int(time.time() * 1000)}.csv'
         self._csv_file = None
+        self._channels = None
+        self._file_index = 0
+        self._file_size = 0
+        self._file_start_time = 0.0
+        self._unflushed_size = 0
+        self._last_flush_time = 0.0
+        self._write_queue: Queue = Queue(maxsize=self.write_queue_size)
+        self._writer_thread = None
 
     def _get_inputs(self) -> List[str]:
         """ Returns the input names of this node.
@@ -76,59 +133,139 @@ class CSVFile(OutputNode):
             self.INPUT_MAIN
         ]
 
-    def _init_csv_writer(self, data: FrameworkData) -> None:
-        """ Initializes the CSV writer.
+    def _is_rotation_enabled(self) -> bool:
+        return self.rotate_size is not None or self.rotate_interval is not None
+
+    def _get_current_file_path(self) -> str:
+        """ Returns the path of the file being written, with the rotation number and the compression suffix.
         """
-        if self._csv_file is None:
-            if not os.path.exists(os.sep.join(self.file_path.split(os.sep)[0:-1])):
-                os.makedirs(os.sep.join(self.file_path.split(os.sep)[0:-1]))
-            self.print('Creating csv file')
-            self._csv_file = open(self.file_path, "w", newline='')
-            self._csv_writer = csv.writer(self._csv_file)
-            self._channels = None
-
-    def _write_csv_columns(self, channels: List[str]) -> None:
-        """ Writes the CSV columns labels.
-
-        :param channels: The channels to write.
-        :type channels: List[str]
+        file_path = self.file_path
+        if self._is_rotation_enabled():
+            file_root, file_extension = os.path.splitext(file_path)
+            file_path = f'{file_root}_{self._file_index}{file_extension}'
+        return f'{file_path}.gz' if self.compress else file_path
+
+    def _init_csv_writer(self) -> None:
+        """ Opens the current file, writing the CSV columns labels if they are known.
         """
-        if self._channels is not None:
+        if self._csv_file is not None:
             return
+        directory = os.path.dirname(self.file_path)
+        if directory != '' and not os.path.exists(directory):
+            os.makedirs(directory)
+        file_path = self._get_current_file_path()
+        self.print(f'Creating csv file {file_path}')
+        self._csv_file = gzip.open(file_path, 'wt', newline='') if self.compress else open(file_path, 'w', newline='')
+        self._file_size = 0
+        self._file_start_time = time.monotonic()
+        self._last_flush_time = self._file_start_time
+        if self._channels is not None:
+            self._write_text(self._format_rows([self._channels]))
+
+    def _close_csv_file(self) -> None:
+        if self._csv_file is not None and not self._csv_file.closed:
+            self._csv_file.close()
+        self._csv_file = None
 
-        if len(channels) == 0:
+    def _rotate_if_needed(self) -> None:
+        """ Closes the current file, so the next chunk starts a new one, if it reached the rotation size or duration.
+        """
+        if self._csv_file is None:
             return
+        if (self.rotate_size is not None and self._file_size >= self.rotate_size) \
+                or (self.rotate_interval is not None
+                    and time.monotonic() - self._file_start_time >= self.rotate_interval):
+            self._close_csv_file()
+            self._file_index += 1
 
-        self._channels = channels
-        self.print('Writing columns')
-        self._csv_writer.writerow(self._channels)
+    @staticmethod
+    def _format_rows(rows: List[list]) -> str:
+        """ Formats rows as CSV text, like ``csv.writer`` does.
+        """
+        text = io.StringIO()
+        csv.writer(text).writerows(rows)
+        return text.getvalue()
 
-    def _write_data(self, data: FrameworkData) -> None:
-        """ Writes the data to the CSV file.
+    def _format_block(self, channel_data: List[list]) -> str:
+        """ Formats a whole chunk as CSV text. With a ``precision``, numeric chunks are formatted with a single format
+        string for each row, and other chunks as ``csv.writer`` does.
 
-        :param data: The data to write.
-        :type data: FrameworkData
+        :param channel_data: The chunk data, with one list per channel.
+        :type channel_data: List[list]
         """
-        self.print(f'Writing data to file')
-        formatted_data = zip(*data.get_data().values())
-        self._csv_writer.writerows(formatted_data)
-        self.print(f'Done')
+        if self.precision is not None and len(channel_data) > 0:
+            try:
+                samples = np.asarray(channel_data, dtype=float)
+            except (TypeError, ValueError):
+                samples = None
+            if samples is not None and samples.ndim == 2:
+                row_format = ','.join([f'%.{self.precision}f'] * samples.shape[0]) + '\r\n'
+                return ''.join(row_format % tuple(row) for row in samples.T.tolist())
+        return self._format_rows(list(zip(*channel_data)))
+
+    def _write_text(self, text: str) -> None:
+        self._csv_file.write(text)
+        self._file_size += len(text)
+        self._unflushed_size += len(text)
+
+    def _flush_if_needed(self) -> None:
+        """ Flushes the current file if ``flush_size`` bytes were written or ``flush_interval`` seconds have passed
+        since the last flush.
+        """
+        if self._csv_file is None or self._unflushed_size == 0:
+            return
+        if self._unflushed_size >= self.flush_size or time.monotonic() - self._last_flush_time >= self.flush_interval:
+            self._csv_file.flush()
+            self._unflushed_size = 0
+            self._last_flush_time = time.monotonic()
+
+    def _write_chunks(self) -> None:
+        """ Runs on the I/O thread, writing the chunks received through the write queue until the end of chunks mark
+        (``None``) is received.
+        """
+        while True:
+            try:
+                chunk: Optional[Tuple[List[str], List[list]]] = self._write_queue.get(timeout=self.flush_interval)
+            except Empty:
+                self._flush_if_needed()
+                continue
+            if chunk is None:
+                break
+            channels, channel_data = chunk
+            try:
+                self._rotate_if_needed()
+                if self._channels is None and len(channels) > 0:
+                    self._channels = channels
+                    if self._csv_file is not None:
+                        self._write_text(self._format_rows([self._channels]))
+                self._init_csv_writer()
+                self._write_text(self._format_block(channel_data))
+                self._flush_if_needed()
+            except Exception as e:
+                self.print(f'Error writing to {self._get_current_file_path()}: {e}', exception=e)
+        self._close_csv_file()
 
     def _process(self, data: Dict[str, FrameworkData]) -> None:
         """ Runs the node.
         """
-        self.print(f'Writing {data[self.INPUT_MAIN].get_data_count()} samples to file')
         input_data = data[self.INPUT_MAIN]
-        self._init_csv_writer(input_data)
-        self._write_csv_columns(input_data.channels)
-        self._write_data(input_data)
-        self._csv_file.flush()
+        if not input_data.has_data():
+            return
+        self.print(f'Queueing {input_data.get_data_count()} samples to be written to file')
+        if self._writer_thread is None:
+            self._writer_thread = Thread(target=self._write_chunks, daemon=True)
+            self._writer_thread.start()
+        channel_data = [list(channel) for channel in input_data.get_data_as_2d_array()]
+        self._write_queue.put((list(input_data.channels), channel_data))
 
     def dispose(self) -> None:
-        """ Node self implementation of disposal of allocated resources.
+        """ Node self implementation of disposal of allocated resources. The chunks waiting for the I/O thread are
+        written before the file is closed.
         """
         self._clear_output_buffer()
         self._clear_input_buffer()
-        if self._csv_file is not None and not self._csv_file.closed:
-            self._csv_file.close()
-            self._csv_file = None
+        if self._writer_thread is not None:
+            self._write_queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+        self._close_csv_file()
@@ -0,0 +1,264 @@
+import os
+from queue import Queue
+from threading import Thread
+from typing import List, Final, Dict
+
+import numpy as np
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.missing_parameter import MissingParameterError
+from models.framework_data import FrameworkData
+from models.node.output.output_node import OutputNode
+from models.utils.edf_format import EDFWriter, encode_annotation
+
+
+class WriteEDF(OutputNode):
+    """ This node records its input data to an EDF+ file, or to a BDF+ file if the file path ends with ``.bdf``.
+
+    The samples are accumulated in a preallocated buffer until a data record of ``record_duration`` seconds is complete.
+    Then all channels of the record are quantized at once, to 16 bits (EDF+) or 24 bits (BDF+) samples, in one of a few
+    preallocated record buffers, which is written to the file with a single ``write`` call by a background thread.
+
+    The ``marker`` input is a marker stream aligned with the ``main`` input: one value per sample, where 0 means no
+    event. Each non zero value is recorded as an annotation, at the onset of its sample.
+
+    When the node is disposed, the last incomplete record is completed with zeros, and the number of records is
+    written to the file header.
+
+    Attributes:
+        _MODULE_NAME (str): The name of this module (in this case, 'node.output.file.writeedf').
+        INPUT_MAIN (str): The name of the main input (in this case, 'main').
+        INPUT_MARKER (str): The name of the marker input (in this case, 'marker').
+
+    ``configuration.json`` usage example:
+
+        **module**: Current module name (in this case ``models.node.output.file``).\n
+        **name**: Current node instance name (in this case, ``WriteEDF``).\n
+        **file_path** (str): The path to the ``.edf`` or ``.bdf`` file that will be created/written to.\n
+        **record_duration** (float): Duration of each data record, in seconds. The sampling frequency times this duration must be an integer. This is a optional parameter, the default value is 1.\n
+        **physical_minimum** (float): Physical value recorded as the minimum digital value, for all channels. This is a optional parameter, the default value is -187500.\n
+        **physical_maximum** (float): Physical value recorded as the maximum digital value, for all channels. This is a optional parameter, the default value is 187500.\n
+        **physical_dimension** (str): Physical dimension of the channels. This is a optional parameter, the default value is ``uV``.\n
+        **marker_labels** (dict): Annotation text of each marker value, like ``{"1": "left", "2": "right"}``. Values without a label are recorded as the value itself. This is a optional parameter, the default value is ``{}``.\n
+        **buffer_options** (dict): The buffer options.\n
+            **clear_output_buffer_on_data_input** (bool): Whether to clear the output buffer when data is inputted.\n
+            **clear_input_buffer_after_process** (bool): Whether to clear the input buffer after the process method is called.\n
+            **clear_output_buffer_after_process** (bool): Whether to clear the output buffer after the process method is called.\n
+    """
+
+    _MODULE_NAME: Final[str] = 'node.output.file.writeedf'
+
+    INPUT_MAIN: Final[str] = 'main'
+    INPUT_MARKER: Final[str] = 'marker'
+
+    _RECORD_BUFFER_COUNT: Final[int] = 4
+
+    def _validate_parameters(self, parameters: dict):
+        """ Validates the parameters that were passed to the node.
+
+        :param parameters: The parameters that were passed to the node.
+        :type parameters: dict
+
+        :raises MissingParameterError: The ``file_path`` parameter is required.
+        :raises InvalidParameterValue: The ``file_path`` parameter must be a ``.edf`` or ``.bdf`` file path.
+        :raises InvalidParameterValue: The ``record_duration`` parameter must be a positive number.
+        :raises InvalidParameterValue: The ``physical_minimum`` and ``physical_maximum`` parameters must be numbers, with ``physical_minimum`` lower than ``physical_maximum``.
+        :raises InvalidParameterValue: The ``physical_dimension`` parameter must be a string.
+        :raises InvalidParameterValue: The ``marker_labels`` parameter must be a dict of strings.
+        """
+        super()._validate_parameters(parameters)
+        if 'file_path' not in parameters:
+            raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path')
+        if type(parameters['file_path']) is not str:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path',
+                                        cause='must_be_string')
+        if os.path.splitext(parameters['file_path'])[1].lower() not in ['.edf', '.bdf']:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='file_path',
+                                        cause='must_be_edf_or_bdf_file')
+        if 'record_duration' not in parameters:
+            parameters['record_duration'] = 1.0
+        if type(parameters['record_duration']) is not float and type(parameters['record_duration']) is not int \
+                or parameters['record_duration'] <= 0:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='record_duration',
+                                        cause='must_be_number_greater_than_0')
+        if 'physical_minimum' not in parameters:
+            parameters['physical_minimum'] = -187500.0
+        if 'physical_maximum' not in parameters:
+            parameters['physical_maximum'] = 187500.0
+        for physical_parameter in ['physical_minimum', 'physical_maximum']:
+            if type(parameters[physical_parameter]) is not float and type(parameters[physical_parameter]) is not int:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter=physical_parameter,
+                                            cause='must_be_number')
+        if parameters['physical_minimum'] >= parameters['physical_maximum']:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='physical_minimum',
+                                        cause='must_be_less_than_physical_maximum')
+        if 'physical_dimension' not in parameters:
+            parameters['physical_dimension'] = 'uV'
+        if type(parameters['physical_dimension']) is not str:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='physical_dimension',
+                                        cause='must_be_string')
+        if 'marker_labels' not in parameters:
+            parameters['marker_labels'] = {}
+        if type(parameters['marker_labels']) is not dict \
+                or any(type(label) is not str for label in parameters['marker_labels'].values()):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='marker_labels',
+                                        cause='must_be_dict_of_strings')
+
+    def _initialize_parameter_fields(self, parameters: dict):
+        """ Initializes the parameters that were passed to the node.
+
+        :param parameters: The parameters that were passed to the node.
+        :type parameters: dict
+        """
+        super()._initialize_parameter_fields(parameters)
+        self.file_path = parameters['file_path']
+        self.bdf = os.path.splitext(self.file_path)[1].lower() == '.bdf'
+        self.record_duration = parameters['record_duration']
+        self.physical_minimum = parameters['physical_minimum']
+        self.physical_maximum = parameters['physical_maximum']
+        self.physical_dimension = parameters['physical_dimension']
+        self.marker_labels: Dict[str, str] = parameters['marker_labels']
+        if os.path.exists(self.file_path):
+            os.remove(self.file_path)
+        self._writer = None
+        self._writer_thread = None
+        self._record_samples = None
+        self._record_sample_count = 0
+        self._record_index = 0
+        self._marker_sample_count = 0
+        self._pending_annotations: List[bytes] = []
+        self._free_records = Queue()
+        self._written_records = Queue()
+
+    def _get_inputs(self) -> List[str]:
+        """ Returns the input names of this node.
+        """
+        return [
+            self.INPUT_MAIN,
+            self.INPUT_MARKER
+        ]
+
+    def _is_processing_condition_satisfied(self) -> bool:
+        return True
+
+    def _init_writer(self, data: FrameworkData) -> None:
+        """ Creates the recording file, with the channels and sampling frequency of the first data received, and
+        starts the writer thread.
+        """
+        if self._writer is not None:
+            return
+        directory = os.path.dirname(self.file_path)
+        if directory != '' and not os.path.exists(directory):
+            os.makedirs(directory)
+        if data.sampling_frequency is None:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='main.sampling_frequency',
+                                        cause='must_be_set')
+        self.print('Creating EDF file')
+        self._writer = EDFWriter(self.file_path, data.channels, data.sampling_frequency, self.record_duration,
+                                 self.physical_minimum, self.physical_maximum, self.physical_dimension, bdf=self.bdf)
+        self._record_samples = np.zeros((len(self._writer.channels), self._writer.samples_per_record))
+        for _ in range(self._RECORD_BUFFER_COUNT):
+            self._free_records.put(self._writer.new_record_buffer())
+        self._writer_thread = Thread(target=self._write_records, daemon=True)
+        self._writer_thread.start()
+
+    def _write_records(self) -> None:
+        """ Writes the encoded records on the writer thread, returning their buffers to be reused, until the end of
+        records mark (``None``) is received.
+        """
+        while True:
+            record_buffer = self._written_records.get()
+            if record_buffer is None:
+                return
+            self._writer.write_record(record_buffer)
+            self._free_records.put(record_buffer)
+
+    def _output_record(self) -> None:
+        """ Encodes the current record in a free record buffer and sends it to the writer thread.
+        """
+        record_buffer = self._free_records.get()
+        self._pending_annotations = self._writer.encode_record(self._record_samples, self._record_index,
+                                                               self._pending_annotations, record_buffer)
+        self._written_records.put(record_buffer)
+        self._record_index += 1
+        self._record_sample_count = 0
+
+    def _add_marker_annotations(self) -> None:
+        """ Converts the non zero markers received to annotations, removing them from the input buffer.
+        """
+        marker_data = self._input_buffer[self.INPUT_MARKER]
+        marker_count = marker_data.get_data_count()
+        if marker_count == 0:
+            return
+        markers = np.asarray(marker_data.splice(0, marker_count).get_data_single_channel())
+        for marker_position in np.flatnonzero(markers):
+            marker_value = markers[marker_position]
+            marker_text = f'{marker_value:g}' if isinstance(marker_value, (float, np.floating)) else str(marker_value)
+            onset = (self._marker_sample_count + marker_position) / self._writer.sampling_frequency
+            self._pending_annotations.append(
+                encode_annotation(onset, self.marker_labels.get(marker_text, marker_text)))
+        self._marker_sample_count += marker_count
+
+    def _add_samples(self) -> None:
+        """ Copies the samples received to the current record, outputting each record as it is completed, and removes
+        them from the input buffer.
+        """
+        main_data = self._input_buffer[self.INPUT_MAIN]
+        sample_count = main_data.get_data_count()
+        if sample_count == 0:
+            return
+        main_data = main_data.splice(0, sample_count)
+        samples = np.asarray([main_data.get_data_on_channel(channel) for channel in self._writer.channels], dtype=float)
+        samples_per_record = self._writer.samples_per_record
+        position = 0
+        while position < sample_count:
+            copy_count = min(samples_per_record - self._record_sample_count, sample_count - position)
+            self._record_samples[:, self._record_sample_count:self._record_sample_count + copy_count] = \
+                samples[:, position:position + copy_count]
+            self._record_sample_count += copy_count
+            position += copy_count
+            if self._record_sample_count == samples_per_record:
+                self._output_record()
+
+    def _process(self, data: Dict[str, FrameworkData]) -> None:
+        """ Runs the node.
+        """
+        if self._writer is None:
+            if not data[self.INPUT_MAIN].has_data():
+                return
+            self._init_writer(data[self.INPUT_MAIN])
+        self._add_marker_annotations()
+        self._add_samples()
+
+    def _clear_input_buffer(self):
+        """ Keeps the markers received before the first samples, as the other data is removed from the input buffers
+        when processed.
+        """
+        if not hasattr(self, '_input_buffer'):
+            super()._clear_input_buffer()
+
+    def dispose(self) -> None:
+        """ Node self implementation of disposal of allocated resources.
+        """
+        self._clear_output_buffer()
+        if self._writer is not None:
+            self._add_marker_annotations()
+            if self._record_sample_count > 0:
+                self._record_samples[:, self._record_sample_count:] = 0
+                self._output_record()
+            if len(self._pending_annotations) > 0:
+                self.print(f'{len(self._pending_annotations)} annotations didn\'t fit in the last record')
+            self._written_records.put(None)
+            self._writer_thread.join()
+            self._writer.close()
+            self._writer = None
+        super()._clear_input_buffer()
@@ -3,6 +3,8 @@ from typing import Final, Dict
 
 import numpy as np
 
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.non_compatible_data import NonCompatibleData
 from models.framework_data import FrameworkData
 from models.node.processing.processing_node import ProcessingNode
 from typing import List
@@ -15,7 +17,8 @@ class OneHotToSingle(ProcessingNode):
     A Single channel signal is a signal where each label is represented by a single channel, where the label is
     represented by the index.
     This node converts a one-hot encoded labels to a single channel label. The single label count starts at 1, so the
-    label 1 is represented by the channel 1, the label 2 by the channel 2, etc. There is no label 0.
+    label 1 is represented by the channel 1, the label 2 by the channel 2, etc. There is no label 0. Other label codes
+    can be set with the ``label_values`` parameter.
 
     Attributes:
         _MODULE_NAME (`str`): The name of the module (in his case ``node.processing.encoder.onehottosingle``)
@@ -25,6 +28,7 @@ class OneHotToSingle(ProcessingNode):
     configuration.json usage:
         **module** (*str*): The name of the module (``node.processing.encoder``)\n
         **type** (*str*): The type of the node (``OneHotToSingle``)\n
+        **label_values** (*list*): The label code of each input channel, in the channel order. This is a optional parameter, the default value is ``[1, 2, ..., number of channels]``.\n
         **buffer_options** (*dict*): Buffer options.\n
             **clear_output_buffer_on_data_input** (*bool*): Whether to clear the output buffer when new data is inserted in the input buffer.\n
             **clear_input_buffer_after_process** (*bool*): Whether to clear the input buffer after processing.\n
@@ -36,14 +40,54 @@ class OneHotToSingle(ProcessingNode):
     INPUT_MAIN: Final[str] = 'main'
     OUTPUT_MAIN: Final[str] = 'main'
 
+    def _validate_parameters(self, parameters: dict):
+        """ Validates the parameters passed to this node, setting the default values of the optional ones.
+
+        :param parameters: The parameters passed to this node.
+        :type parameters: dict
+
+        :raises InvalidParameterValue: the ``label_values`` parameter must be a non empty list of numbers.
+        """
+        super()._validate_parameters(parameters)
+        if 'label_values' not in parameters:
+            parameters['label_values'] = None
+        if parameters['label_values'] is not None and (
+                type(parameters['label_values']) is not list or len(parameters['label_values']) < 1
+                or any(type(value) is not int and type(value) is not float for value in parameters['label_values'])):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='label_values',
+                                        cause='must_be_non_empty_list_of_numbers')
+
     @abc.abstractmethod
     def _initialize_parameter_fields(self, parameters: dict):
-        """ Initializes the parameter fields of this node.
+        """ Initializes the parameter fields of this node, building the lookup table from the input channel index to
+        the label code.
 
         :param parameters: The parameters passed to this node.
         :type parameters: dict
         """
         super()._initialize_parameter_fields(parameters)
+        self._label_values = np.asarray(parameters['label_values']) \
+            if parameters['label_values'] is not None \
+            else None
+
+    def _get_label_values(self, channel_count: int) -> np.ndarray:
+        """ Returns the label code of each input channel.
+
+        :param channel_count: The number of input channels.
+        :type channel_count: int
+
+        :return: The label codes lookup table.
+        :rtype: np.ndarray
+
+        :raises NonCompatibleData: the number of input channels is different from the number of ``label_values``.
+        """
+        if self._label_values is None:
+            return np.arange(1, channel_count + 1)
+        if len(self._label_values) != channel_count:
+            raise NonCompatibleData(module=self._MODULE_NAME, name=self.name,
+                                    cause='channel_count_different_from_label_values_count')
+        return self._label_values
 
     def _is_next_node_call_enabled(self) -> bool:
         """ Returns whether the next node call is enabled. The next node call is enabled if the input buffer is not empty.
@@ -57,8 +101,8 @@ class OneHotToSingle(ProcessingNode):
 
     def _process(self, data: Dict[str, FrameworkData]) -> Dict[str, FrameworkData]:
         """ This method encodes the data labels that before was one-hot encoded to a single channel labels. It does this
-        by finding the index of the channel that has a value of 1 and then setting the output channel to that index + 1. It 
-        does this for each data point in the dataset.
+        by finding the index of the channel that has a value of 1 and then looking up the label code of that channel, which
+        is the index + 1 by default. It does this for all data points at once.
 
         :param data: The data to process.
         :type data: dict[str, FrameworkData]
@@ -69,8 +113,9 @@ class OneHotToSingle(ProcessingNode):
         self.print('encoding...')
         raw_data = data[self.INPUT_MAIN]
         encoded_data: FrameworkData = FrameworkData(sampling_frequency_hz=raw_data.sampling_frequency)
-        encoded = np.argmax(raw_data.get_data_as_2d_array(), axis=0)
-        encoded_data.input_data_on_channel(encoded)
+        one_hot_data = np.asarray(raw_data.get_data_as_2d_array())
+        encoded = self._get_label_values(one_hot_data.shape[0])[np.argmax(one_hot_data, axis=0)]
+        encoded_data.input_data_on_channel(encoded.tolist())
         self.print('encoded!')
         return {
             self.OUTPUT_MAIN: encoded_data
@@ -1,6 +1,10 @@
 import abc
 from typing import Final, Dict
 
+import numpy as np
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.missing_parameter import MissingParameterError
 from models.exception.non_compatible_data import NonCompatibleData
 from models.framework_data import FrameworkData
 from models.node.processing.processing_node import ProcessingNode
@@ -14,7 +18,8 @@ class SingleToOneHot(ProcessingNode):
     A Single channel encoded (Ordinal encoding) signal is a type of signal where each label is represented by a number,
     where the label is represented by the index of the label.
     This node converts a single channel labels to a one-hot encoded label. The single label count starts at 1, so the
-    label 1 is represented by the channel 1, the label 2 by the channel 2, etc. There is no label 0.
+    label 1 is represented by the channel 1, the label 2 by the channel 2, etc. There is no label 0. Other label codes
+    can be set with the ``label_values`` parameter. Values that aren't a known label code are encoded as all zeros.
 
     Attributes:
         _MODULE_NAME (`str`): The name of the module (in his case ``node.processing.encoder.singletoonehot``)
@@ -24,6 +29,8 @@ class SingleToOneHot(ProcessingNode):
     configuration.json usage:
         **module** (*str*): The name of the module (``node.processing.encoder``)\n
         **type** (*str*): The type of the node (``SingleToOneHot``)\n
+        **labels** (*list[str]*): The names of the output channels, one for each label.\n
+        **label_values** (*list*): The label code of each output channel, in the same order as ``labels``. This is a optional parameter, the default value is ``[1, 2, ..., len(labels)]``.\n
         **buffer_options** (*dict*): Buffer options.\n
             **clear_output_buffer_on_data_input** (*bool*): Whether to clear the output buffer when new data is inserted in the input buffer.\n
             **clear_input_buffer_after_process** (*bool*): Whether to clear the input buffer after processing.\n
@@ -34,15 +41,50 @@ class SingleToOneHot(ProcessingNode):
     INPUT_MAIN: Final[str] = 'main'
     OUTPUT_MAIN: Final[str] = 'main'
 
+    def _validate_parameters(self, parameters: dict):
+        """ Validates the parameters passed to this node, setting the default values of the optional ones.
+
+        :param parameters: The parameters passed to this node.
+        :type parameters: dict
+
+        :raises MissingParameterError: the ``labels`` parameter is required.
+        :raises InvalidParameterValue: the ``labels`` parameter must be a non empty list.
+        :raises InvalidParameterValue: the ``label_values`` parameter must be a list of unique numbers with the same size as ``labels``.
+        """
+        super()._validate_parameters(parameters)
+        if 'labels' not in parameters:
+            raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
+                                        parameter='labels')
+        if type(parameters['labels']) is not list or len(parameters['labels']) < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='labels',
+                                        cause='must_be_non_empty_list')
+        if 'label_values' not in parameters:
+            parameters['label_values'] = list(range(1, len(parameters['labels']) + 1))
+        if type(parameters['label_values']) is not list \
+                or len(parameters['label_values']) != len(parameters['labels']) \
+                or any(type(value) is not int and type(value) is not float for value in parameters['label_values']):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='label_values',
+                                        cause='must_be_list_of_numbers_with_the_same_size_as_labels')
+        if len(set(parameters['label_values'])) != len(parameters['label_values']):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='label_values',
+                                        cause='must_be_unique')
+
     @abc.abstractmethod
     def _initialize_parameter_fields(self, parameters: dict):
-        """ Initializes the parameter fields of this node.
+        """ Initializes the parameter fields of this node, building the label index: the label codes sorted, for a
+        binary search, and the output channel index of each sorted code.
 
         :param parameters: The parameters passed to this node.
         :type parameters: dict
         """
         super()._initialize_parameter_fields(parameters)
         self.labels = parameters['labels']
+        label_values = np.asarray(parameters['label_values'])
+        self._label_columns = np.argsort(label_values)
+        self._sorted_label_values = label_values[self._label_columns]
 
     def _is_next_node_call_enabled(self) -> bool:
         """ Returns whether the next node call is enabled. The next node call is enabled if the input buffer is not empty.
@@ -56,8 +98,8 @@ class SingleToOneHot(ProcessingNode):
 
     def _process(self, data: Dict[str, FrameworkData]) -> Dict[str, FrameworkData]:
         """ This method encodes the data labels that before was a single channel label (Ordinal encoding) to a one-hot encoded label. It does this
-        comparing the index of the channel to the label and setting the output channel to 1 if the index is equal to the label and 0 otherwise. It
-        does this for each data point in the dataset.
+        by finding the output channel of every label code in the label index and setting the output channel to 1 and the
+        other channels to 0, for all data points at once.
 
         :param data: The data to process.
         :type data: dict
@@ -72,10 +114,13 @@ class SingleToOneHot(ProcessingNode):
 
         encoded_data: FrameworkData = FrameworkData(sampling_frequency_hz=raw_data.sampling_frequency,
                                                     channels=self.labels)
-        for data_entry in raw_data.get_data_single_channel():
-            for channel_index, channel in enumerate(self.labels):
-                encoded_value = 1 if channel_index == data_entry-1 else 0
-                encoded_data.input_data_on_channel([encoded_value], channel)
+        data_entries = np.asarray(raw_data.get_data_single_channel())
+        positions = np.minimum(np.searchsorted(self._sorted_label_values, data_entries),
+                               len(self._sorted_label_values) - 1)
+        is_known_label = self._sorted_label_values[positions] == data_entries
+        encoded = np.zeros((len(self.labels), len(data_entries)), dtype=int)
+        encoded[self._label_columns[positions[is_known_label]], np.flatnonzero(is_known_label)] = 1
+        encoded_data.input_2d_data(encoded.tolist())
         self.print('encoded!')
         return {
             self.OUTPUT_MAIN: encoded_data
@@ -1,7 +1,8 @@
 import statistics
-from typing import List, Dict, Final
+from typing import List, Dict, Final, Callable
 
 import numpy as np
+from scipy import stats
 
 from models.exception.invalid_parameter_value import InvalidParameterValue
 from models.exception.missing_parameter import MissingParameterError
@@ -10,12 +11,62 @@ from models.node.processing.processing_node import ProcessingNode
 
 
 class EpochStatistics(ProcessingNode):
+    """ This node computes a statistic of each epoch of each channel, replacing every epoch by a single value.
+
+    The statistics are computed as NumPy reductions over a channels X epochs X samples array, so all epochs of all
+    channels are reduced at once. Only ``median_grouped``, ``median_high``, ``median_low`` and ``mode`` are computed
+    epoch by epoch with the python ``statistics`` module, and ``first_value`` and ``last_value`` are taken from the
+    raw epochs, so they also work on non numeric epochs. If the epochs have different sizes, each epoch is reduced
+    separately.
+
+    The statistics that come from the ``statistics`` module raise ``statistics.StatisticsError`` for the epochs it
+    rejects, like it does: epochs without samples, ``stdev`` and ``variance`` of epochs with a single sample,
+    ``geometric_mean`` of epochs with non positive values and ``harmonic_mean`` of epochs with negative values. The
+    other statistics result in ``nan`` for epochs they can't reduce.
+
+    configuration.json usage:
+        **module** (*str*): The name of the module (``node.processing``)\n
+        **type** (*str*): The name of the class (``EpochStatistics``)\n
+        **statistic** (*str*): The statistic to be computed. One of ``fmean``, ``geometric_mean``, ``harmonic_mean``, ``mean``, ``median``, ``median_grouped``, ``median_high``, ``median_low``, ``mode``, ``pstdev``, ``pvariance``, ``stdev``, ``variance``, ``first_value``, ``last_value``, ``rms``, ``kurtosis``, ``skewness``, ``peak_to_peak`` or ``line_length``.\n
+        **buffer_options** (*dict*): Buffer options.\n
+            **clear_output_buffer_on_data_input** (*bool*): Whether to clear the output buffer when new data is inserted in the input buffer.\n
+            **clear_input_buffer_after_process** (*bool*): Whether to clear the input buffer after processing.\n
+            **clear_output_buffer_after_process** (*bool*): Whether to clear the output buffer after processing.\n
+    """
     _MODULE_NAME: Final[str] = 'node.processing.epochstatistics'
 
     _ALLOWED_METHODS_FROM_STATISTICS_MODULE: Final[List[str]] = ['fmean', 'geometric_mean', 'harmonic_mean', 'mean', 'median',
                                                                  'median_grouped', 'median_high', 'median_low', 'mode',
                                                                  'pstdev', 'pvariance', 'stdev', 'variance']
-    _ALLOWED_METHODS: Final[List[str]] = [*_ALLOWED_METHODS_FROM_STATISTICS_MODULE, 'first_value', 'last_value']
+    _VECTORIZED_METHODS: Final[Dict[str, Callable[[np.ndarray], np.ndarray]]] = {
+        'fmean': lambda x: np.mean(x, axis=-1),
+        'mean': lambda x: np.mean(x, axis=-1),
+        'geometric_mean': lambda x: np.exp(np.mean(np.log(x), axis=-1)),
+        'harmonic_mean': lambda x: x.shape[-1] / np.sum(1 / x, axis=-1),
+        'median': lambda x: np.median(x, axis=-1),
+        'pstdev': lambda x: np.std(x, axis=-1),
+        'pvariance': lambda x: np.var(x, axis=-1),
+        'stdev': lambda x: np.std(x, axis=-1, ddof=1),
+        'variance': lambda x: np.var(x, axis=-1, ddof=1),
+        'rms': lambda x: np.sqrt(np.mean(np.square(x), axis=-1)),
+        'kurtosis': lambda x: stats.kurtosis(x, axis=-1),
+        'skewness': lambda x: stats.skew(x, axis=-1),
+        'peak_to_peak': lambda x: np.ptp(x, axis=-1),
+        'line_length': lambda x: np.sum(np.abs(np.diff(x, axis=-1)), axis=-1)
+    }
+    _MINIMUM_EPOCH_SIZES: Final[Dict[str, int]] = {
+        'fmean': 1,
+        'mean': 1,
+        'geometric_mean': 1,
+        'harmonic_mean': 1,
+        'median': 1,
+        'pstdev': 1,
+        'pvariance': 1,
+        'stdev': 2,
+        'variance': 2
+    }
+    _ALLOWED_METHODS: Final[List[str]] = [*_ALLOWED_METHODS_FROM_STATISTICS_MODULE, 'first_value', 'last_value',
+                                          'rms', 'kurtosis', 'skewness', 'peak_to_peak', 'line_length']
     INPUT_MAIN: Final[str] = 'main'
     OUTPUT_MAIN: Final[str] = 'main'
 
@@ -36,7 +87,12 @@ class EpochStatistics(ProcessingNode):
     def _initialize_parameter_fields(self, parameters: dict):
         super()._initialize_parameter_fields(parameters)
         statistic = parameters['statistic']
-        if statistic in self._ALLOWED_METHODS_FROM_STATISTICS_MODULE:
+        self._statistic = statistic
+        self._statistic_func = None
+        self._vectorized_statistic_func = None
+        if statistic in self._VECTORIZED_METHODS:
+            self._vectorized_statistic_func = self._VECTORIZED_METHODS[statistic]
+        elif statistic in self._ALLOWED_METHODS_FROM_STATISTICS_MODULE:
             self._statistic_func = getattr(statistics, statistic)
         elif statistic == 'first_value':
             self._statistic_func = lambda x: x[0]
@@ -53,15 +109,58 @@ class EpochStatistics(ProcessingNode):
     def _is_processing_condition_satisfied(self) -> bool:
         return self._input_buffer[self.INPUT_MAIN].get_data_count() > 0
 
+    def _check_statistics_domain(self, epochs: np.ndarray) -> None:
+        """ Raises the error the ``statistics`` module raises for epochs it can't reduce, instead of letting the
+        vectorized statistic result in ``nan``.
+
+        :param epochs: The epochs, with the samples in the last axis.
+        :type epochs: np.ndarray
+
+        :raises statistics.StatisticsError: The statistic isn't defined for some epoch.
+        """
+        if self._statistic not in self._MINIMUM_EPOCH_SIZES:
+            return
+        minimum_epoch_size = self._MINIMUM_EPOCH_SIZES[self._statistic]
+        epoch_count = int(np.prod(epochs.shape[:-1]))
+        if epoch_count > 0 and epochs.shape[-1] < minimum_epoch_size:
+            raise statistics.StatisticsError(f'{self._statistic} requires at least {minimum_epoch_size} data points')
+        if self._statistic == 'geometric_mean' and np.any(epochs <= 0):
+            raise statistics.StatisticsError('geometric mean requires a non-empty dataset containing positive numbers')
+        if self._statistic == 'harmonic_mean' and np.any(epochs < 0):
+            raise statistics.StatisticsError('harmonic mean does not support negative values')
+
+    def _reduce_epochs(self, epochs: np.ndarray) -> np.ndarray:
+        self._check_statistics_domain(epochs)
+        # The harmonic mean of epochs with zeros is 0, as in the statistics module
+        with np.errstate(divide='ignore'):
+            return self._vectorized_statistic_func(epochs)
+
     def _process(self, data: Dict[str, FrameworkData]) -> Dict[str, FrameworkData]:
         input_data = data[self.INPUT_MAIN]
         return_data: FrameworkData = FrameworkData(input_data.sampling_frequency,
                                                    input_data.channels)
-        for channel in input_data.channels:
-            formatted_data = []
-            for epoch in input_data.get_data_on_channel(channel):
-                formatted_data.append(self._statistic_func(epoch))
-            return_data.input_data_on_channel(np.asarray(formatted_data), channel)
+        if self._vectorized_statistic_func is None:
+            for channel in input_data.channels:
+                formatted_data = []
+                for epoch in input_data.get_data_on_channel(channel):
+                    formatted_data.append(self._statistic_func(epoch))
+                return_data.input_data_on_channel(np.asarray(formatted_data), channel)
+            return {
+                self.OUTPUT_MAIN: return_data
+            }
+
+        try:
+            epochs = np.asarray(input_data.get_data_as_2d_array(), dtype=float)
+        except ValueError:
+            # Epochs with different sizes can't be stacked in a single array
+            epochs = None
+        if epochs is not None and epochs.ndim == 3:
+            return_data.input_2d_data(self._reduce_epochs(epochs))
+        else:
+            for channel in input_data.channels:
+                formatted_data = [self._reduce_epochs(np.asarray(epoch, dtype=float))
+                                  for epoch in input_data.get_data_on_channel(channel)]
+                return_data.input_data_on_channel(np.asarray(formatted_data), channel)
         return {
             self.OUTPUT_MAIN: return_data
         }
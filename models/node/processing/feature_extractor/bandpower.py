@@ -0,0 +1,215 @@
+from typing import List, Dict, Final, Tuple, Any
+
+import numpy as np
+import scipy.fft
+import scipy.signal
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.missing_parameter import MissingParameterError
+from models.exception.non_compatible_data import NonCompatibleData
+from models.framework_data import FrameworkData
+from models.node.processing.feature_extractor.feature_extractor import FeatureExtractor
+
+
+class BandPower(FeatureExtractor):
+    """ This node extracts the power of frequency bands from each epoch of each channel. The power spectral density is
+    estimated with the Welch method (mean of the modified periodograms of overlapping segments), computed for all
+    channels, epochs and segments in a single batched ``scipy.fft.rfft`` call, that can be spread across cores with
+    the ``workers`` parameter. The window function, the PSD scale and the frequency bin masks of each band are
+    computed once for each (sampling frequency, segment size) pair and reused.
+
+    The input data must be epoched (channels X epochs X samples). The output has one channel named
+    ``{channel}_{band}`` for each input channel and band, with one value per epoch.
+
+    Attributes:
+        _MODULE_NAME (`str`): The name of the module (in his case ``node.processing.feature_extractor.bandpower``)
+        INPUT_MAIN (`str`): The name of the input (in this case ``main``)
+        OUTPUT_MAIN (`str`): The name of the output (in this case ``main``)
+
+    configuration.json usage:
+        **module** (*str*): The name of the module (``node.processing.feature_extractor``)\n
+        **type** (*str*): The type of the node (``BandPower``)\n
+        **bands** (*dict*): Frequency bands, where the key is the band name and the value is a list with the band lower (inclusive) and upper (exclusive) frequencies in Hz, e.g. ``{"alpha": [8, 13], "beta": [13, 30]}``.\n
+        **nperseg** (*int*): Size of the Welch segments in samples. This is a optional parameter, the default value is 256. If the epochs are shorter, the epoch size is used.\n
+        **noverlap** (*int*): Number of overlapping samples between segments. This is a optional parameter, the default value is ``nperseg`` / 2.\n
+        **window** (*str*): Window function, as accepted by ``scipy.signal.get_window``. This is a optional parameter, the default value is ``hann``.\n
+        **workers** (*int*): Number of workers used by ``scipy.fft``, -1 meaning all cores. This is a optional parameter, the default value is 1.\n
+        **buffer_options** (*dict*): Buffer options.\n
+            **clear_output_buffer_on_data_input** (*bool*): Whether to clear the output buffer when new data is inserted in the input buffer.\n
+            **clear_input_buffer_after_process** (*bool*): Whether to clear the input buffer after processing.\n
+            **clear_output_buffer_after_process** (*bool*): Whether to clear the output buffer after processing.\n
+    """
+
+    _MODULE_NAME: Final[str] = 'node.processing.feature_extractor.bandpower'
+
+    INPUT_MAIN: Final[str] = 'main'
+    OUTPUT_MAIN: Final[str] = 'main'
+
+    def _validate_parameters(self, parameters: dict):
+        """ Validates the parameters passed to this node, setting the default values of the optional ones.
+
+        :param parameters: The parameters passed to this node.
+        :type parameters: dict
+
+        :raises MissingParameterError: the ``bands`` parameter is required.
+        :raises InvalidParameterValue: the ``bands`` parameter must be a non empty dict of [lower, upper] frequencies.
+        :raises InvalidParameterValue: the ``nperseg`` parameter must be an int greater than 0.
+        :raises InvalidParameterValue: the ``noverlap`` parameter must be an int between 0 and ``nperseg`` - 1.
+        :raises InvalidParameterValue: the ``window`` parameter must be a str.
+        :raises InvalidParameterValue: the ``workers`` parameter must be an int different from 0.
+        """
+        super()._validate_parameters(parameters)
+        if 'bands' not in parameters:
+            raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
+                                        parameter='bands')
+        if type(parameters['bands']) is not dict or len(parameters['bands']) < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='bands',
+                                        cause='must_be_non_empty_dict')
+        for band_name, band in parameters['bands'].items():
+            if type(band) is not list or len(band) != 2 \
+                    or any(type(frequency) is not float and type(frequency) is not int for frequency in band):
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter=f'bands.{band_name}',
+                                            cause='must_be_list_of_two_numbers')
+            if band[0] < 0 or band[0] >= band[1]:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter=f'bands.{band_name}',
+                                            cause='must_have_0_<=_lower_<_upper')
+        if 'nperseg' not in parameters:
+            parameters['nperseg'] = 256
+        if type(parameters['nperseg']) is not int:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='nperseg',
+                                        cause='must_be_int')
+        if parameters['nperseg'] < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='nperseg',
+                                        cause='must_be_greater_than_0')
+        if 'noverlap' not in parameters:
+            parameters['noverlap'] = None
+        if parameters['noverlap'] is not None:
+            if type(parameters['noverlap']) is not int:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='noverlap',
+                                            cause='must_be_int')
+            if not 0 <= parameters['noverlap'] < parameters['nperseg']:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='noverlap',
+                                            cause='must_be_between_0_and_nperseg')
+        if 'window' not in parameters:
+            parameters['window'] = 'hann'
+        if type(parameters['window']) is not str:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='window',
+                                        cause='must_be_str')
+        if 'workers' not in parameters:
+            parameters['workers'] = 1
+        if type(parameters['workers']) is not int or parameters['workers'] == 0:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='workers',
+                                        cause='must_be_int_different_from_0')
+
+    def _initialize_parameter_fields(self, parameters: dict):
+        """ Initializes the parameter fields of this node and the Welch plans cache.
+
+        :param parameters: The parameters passed to this node.
+        :type parameters: dict
+        """
+        super()._initialize_parameter_fields(parameters)
+        self.bands: Dict[str, List[float]] = parameters['bands']
+        self.nperseg: int = parameters['nperseg']
+        self.noverlap: int = parameters['noverlap']
+        self.window: str = parameters['window']
+        self.workers: int = parameters['workers']
+        self._plans: Dict[Tuple[float, int], Dict[str, Any]] = {}
+
+    def _get_plan(self, sampling_frequency: float, nperseg: int) -> Dict[str, Any]:
+        """ Returns the Welch plan for a sampling frequency and segment size, creating it on the first use. A plan holds
+        the window, the segment step, the PSD scale, the one-sided spectrum correction and the bin mask of each band.
+
+        :param sampling_frequency: The sampling frequency of the data.
+        :type sampling_frequency: float
+        :param nperseg: Size of the Welch segments in samples.
+        :type nperseg: int
+
+        :return: The Welch plan.
+        :rtype: Dict[str, Any]
+        """
+        key = (sampling_frequency, nperseg)
+        if key in self._plans:
+            return self._plans[key]
+        window = scipy.signal.get_window(self.window, nperseg)
+        noverlap = self.noverlap if self.noverlap is not None and self.noverlap < nperseg else nperseg // 2
+        frequencies = scipy.fft.rfftfreq(nperseg, 1 / sampling_frequency)
+        # One-sided spectrum: every bin except DC (and Nyquist, for even segments) holds the power of two bins
+        one_sided_correction = np.full(frequencies.shape[0], 2.0)
+        one_sided_correction[0] = 1.0
+        if nperseg % 2 == 0:
+            one_sided_correction[-1] = 1.0
+        frequency_resolution = sampling_frequency / nperseg
+        scale = one_sided_correction / (sampling_frequency * np.sum(window ** 2))
+        band_matrix = np.zeros((frequencies.shape[0], len(self.bands)))
+        for band_index, (lower, upper) in enumerate(self.bands.values()):
+            band_matrix[(frequencies >= lower) & (frequencies < upper), band_index] = frequency_resolution
+        plan = {
+            'window': window,
+            'step': nperseg - noverlap,
+            'scale': scale,
+            'band_matrix': band_matrix
+        }
+        self._plans[key] = plan
+        return plan
+
+    def _process(self, data: Dict[str, FrameworkData]) -> Dict[str, FrameworkData]:
+        """ Computes the band powers of all epochs of all channels.
+
+        :param data: The data to process.
+        :type data: dict[str, FrameworkData]
+
+        :return: The band powers, one channel for each input channel and band.
+        :rtype: dict[str, FrameworkData]
+
+        :raises NonCompatibleData: the input data doesn't have a sampling frequency or isn't epoched.
+        """
+        input_data = data[self.INPUT_MAIN]
+        if input_data.sampling_frequency is None:
+            raise NonCompatibleData(module=self._MODULE_NAME, name=self.name,
+                                    cause='sampling_frequency_required')
+        try:
+            epochs = np.asarray(input_data.get_data_as_2d_array(), dtype=float)
+        except ValueError:
+            raise NonCompatibleData(module=self._MODULE_NAME, name=self.name,
+                                    cause='epochs_must_have_the_same_size')
+        if epochs.ndim != 3:
+            raise NonCompatibleData(module=self._MODULE_NAME, name=self.name,
+                                    cause='input_must_be_epoched')
+
+        nperseg = min(self.nperseg, epochs.shape[-1])
+        plan = self._get_plan(input_data.sampling_frequency, nperseg)
+        segments = np.lib.stride_tricks.sliding_window_view(epochs, nperseg, axis=-1)[..., ::plan['step'], :]
+        segments = (segments - np.mean(segments, axis=-1, keepdims=True)) * plan['window']
+        spectrum = scipy.fft.rfft(segments, axis=-1, workers=self.workers)
+        power_spectral_density = np.mean(np.abs(spectrum) ** 2, axis=-2) * plan['scale']
+        band_powers = np.dot(power_spectral_density, plan['band_matrix'])
+
+        channels = [f'{channel}_{band_name}' for channel in input_data.channels for band_name in self.bands]
+        return_data = FrameworkData(input_data.sampling_frequency, channels)
+        return_data.input_2d_data(np.moveaxis(band_powers, -1, 1).reshape(len(channels), -1))
+        return {
+            self.OUTPUT_MAIN: return_data
+        }
+
+    def _get_inputs(self) -> List[str]:
+        """ Returns the inputs of this node. In this case it returns a single 'main' input.
+        """
+        return [
+            self.INPUT_MAIN
+        ]
+
+    def _get_outputs(self) -> List[str]:
+        """ Returns the outputs of this node. In this case it returns a single 'main' output.
+        """
+        return [
+            self.OUTPUT_MAIN
+        ]
@@ -1,5 +1,7 @@
 from typing import List, Dict, Final
 
+import numpy as np
+
 from models.exception.invalid_parameter_value import InvalidParameterValue
 from models.exception.missing_parameter import MissingParameterError
 from models.framework_data import FrameworkData
@@ -96,7 +98,8 @@ class Fill(ProcessingNode):
 
     def _process(self, data: Dict[str, FrameworkData]) -> Dict[str, FrameworkData]:
         """ This method will process the data in the input buffer and return the result in the output buffer. This
-        method will fill the input buffer with a certain amount of samples. This is done using the _fill method.
+        method will fill the input buffer with a certain amount of samples. This is done using the _fill method, for all
+        samples and channels at once.
 
         :param data: The data to process.
         :type data: dict
@@ -108,15 +111,7 @@ class Fill(ProcessingNode):
 
         new_data = FrameworkData(sampling_frequency_hz=slave_main.sampling_frequency,
                                  channels=slave_main.channels)
-
-        for data_index, data_value in enumerate(slave_main.get_data_as_2d_array()[0]):
-            new_data.extend(
-                self._fill(
-                    data_index,
-                    slave_main,
-                    new_data.sampling_frequency
-                )
-            )
+        new_data.input_2d_data(self._fill(np.asarray(slave_main.get_data_as_2d_array())).tolist())
         return {
             self.OUTPUT_MAIN: new_data
         }
@@ -141,39 +136,23 @@ class Fill(ProcessingNode):
             self.OUTPUT_MAIN
         ]
 
-    def _fill(self,
-              data_index: int,
-              slave_main: FrameworkData,
-              sampling_frequency: float) -> FrameworkData:
-        """ This method will fill the input buffer with a certain amount of samples with the desired filling type. This filling
-        type can be ``zero_fill`` or ``sample_and_hold``. If the filling type is ``zero_fill`` the input buffer will be filled
-        with zeros. If the filling type is ``sample_and_hold`` the input buffer will be filled with the last sample in the
-        input buffer.
-
-        :param data_index: The index of the data to fill.
-        :type data_index: int
-        :param slave_main: The INPUT_MAIN data.
-        :type slave_main: FrameworkData
-        :param sampling_frequency: The sampling frequency of the data to fill.
-        :type sampling_frequency: float
-
-        :return: The filled data.
-        :rtype: FrameworkData
-        """
-        fill_data = FrameworkData(sampling_frequency, slave_main.channels)
+    def _fill(self, samples: np.ndarray) -> np.ndarray:
+        """ This method will replace each sample of every channel by ``fill_size`` samples, with the desired filling type.
+        This filling type can be ``zero_fill`` or ``sample_and_hold``. If the filling type is ``zero_fill`` each sample
+        will be replaced by zeros. If the filling type is ``sample_and_hold`` each sample will be repeated. The whole
+        block is built by a single array operation.
 
+        :param samples: The INPUT_MAIN data, in channels X samples format.
+        :type samples: np.ndarray
+
+        :return: The filled data, in channels X (samples * ``fill_size``) format.
+        :rtype: np.ndarray
+        """
         if self._zero_fill:
-            channel_data = [0] * self._fill_size
-            input_data = [channel_data] * len(slave_main.channels)
-            fill_data.input_2d_data(input_data)
+            return np.zeros((samples.shape[0], samples.shape[1] * self._fill_size), dtype=int)
         elif self._sample_and_hold:
-            input_data = slave_main.get_data_at_index(data_index)
-            for channel in input_data:
-                channel_data = [input_data[channel]] * self._fill_size
-                fill_data.input_data_on_channel(channel_data, channel)
+            return np.repeat(samples, self._fill_size, axis=1)
         else:
             raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
                                         parameter='filling_type',
                                         cause='not_set')
-
-        return fill_data
@@ -0,0 +1,308 @@
+from typing import List, Dict, Final
+
+import numpy as np
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.missing_parameter import MissingParameterError
+from models.framework_data import FrameworkData
+from models.node.processing.processing_node import ProcessingNode
+
+
+class StreamingEvaluation(ProcessingNode):
+    """ This node evaluates a classifier incrementally. It keeps a confusion matrix and, when class probabilities are
+    used, a histogram of the probabilities of each class for the samples of that class and for the other samples. Each
+    new batch only updates these counts, in O(batch), and the selected metrics are computed from the counts, so the cost
+    doesn't grow with the session length.
+
+    The ``predicted`` input receives the predicted label codes, and each prediction is compared to the next
+    ``samples_per_prediction`` samples of the ``actual`` input, that receives the true label codes. If
+    ``use_probability`` is True, the ``probability`` input must receive, for each prediction, the probability of each
+    class, with one channel per class in the same order as ``labels`` (like the ``probability`` output of the
+    classifiers). The ROC AUC is approximated from the probability histograms, and averaged over the classes in a
+    one-vs-rest fashion. Label codes not in ``labels`` are ignored.
+
+    Each processing outputs one value per selected metric, computed over all data evaluated so far:
+     - accuracy
+     - kappa (Cohen's kappa)
+     - f1 (macro averaged over the classes that were present or predicted)
+     - balanced_accuracy (macro averaged recall over the classes that were present)
+     - roc_auc (only if ``use_probability`` is True)
+
+    Attributes:
+        _MODULE_NAME (`str`): The name of the module (in his case ``node.processing.metric.streamingevaluation``)
+        INPUT_ACTUAL (`str`): The name of the true labels input (in this case ``actual``)
+        INPUT_PREDICTED (`str`): The name of the predicted labels input (in this case ``predicted``)
+        INPUT_PROBABILITY (`str`): The name of the class probabilities input (in this case ``probability``)
+        OUTPUT_MAIN (`str`): The name of the output (in this case ``main``)
+
+    configuration.json usage:
+        **module** (*str*): The name of the module (``models.node.processing.metric``)\n
+        **type** (*str*): The type of the node (``StreamingEvaluation``)\n
+        **labels** (*list*): The label codes of the classes.\n
+        **samples_per_prediction** (*int*): Number of ``actual`` samples covered by each prediction. This is a optional parameter, the default value is 1.\n
+        **use_probability** (*bool*): Whether the ``probability`` input is used. This is a optional parameter, the default value is False.\n
+        **histogram_bins** (*int*): Number of probability histogram bins used by the ROC AUC approximation. This is a optional parameter, the default value is 100.\n
+        **metrics** (*list[str]*): The metrics to output. This is a optional parameter, the default value is all the metrics available.\n
+        **buffer_options** (*dict*): Buffer options.\n
+            **clear_output_buffer_on_data_input** (*bool*): Whether to clear the output buffer when new data is inserted in the input buffer.\n
+            **clear_input_buffer_after_process** (*bool*): Whether to clear the input buffer after processing.\n
+            **clear_output_buffer_after_process** (*bool*): Whether to clear the output buffer after processing.\n
+    """
+    _MODULE_NAME: Final[str] = 'node.processing.metric.streamingevaluation'
+
+    INPUT_ACTUAL: Final[str] = 'actual'
+    INPUT_PREDICTED: Final[str] = 'predicted'
+    INPUT_PROBABILITY: Final[str] = 'probability'
+    OUTPUT_MAIN: Final[str] = 'main'
+
+    METRIC_ACCURACY: Final[str] = 'accuracy'
+    METRIC_KAPPA: Final[str] = 'kappa'
+    METRIC_F1: Final[str] = 'f1'
+    METRIC_BALANCED_ACCURACY: Final[str] = 'balanced_accuracy'
+    METRIC_ROC_AUC: Final[str] = 'roc_auc'
+    _SUPPORTED_METRICS: Final[List[str]] = [METRIC_ACCURACY, METRIC_KAPPA, METRIC_F1, METRIC_BALANCED_ACCURACY,
+                                            METRIC_ROC_AUC]
+
+    def _validate_parameters(self, parameters: dict):
+        """ Validates the parameters passed to this node, setting the default values of the optional ones.
+
+        :param parameters: The parameters passed to this node.
+        :type parameters: dict
+
+        :raises MissingParameterError: the ``labels`` parameter is required.
+        :raises InvalidParameterValue: the ``labels`` parameter must be a list of at least two unique numbers.
+        :raises InvalidParameterValue: the ``samples_per_prediction`` parameter must be an int greater than 0.
+        :raises InvalidParameterValue: the ``use_probability`` parameter must be a bool.
+        :raises InvalidParameterValue: the ``histogram_bins`` parameter must be an int greater than 0.
+        :raises InvalidParameterValue: the ``metrics`` parameter must be a non empty list of supported metrics, and
+            ``roc_auc`` requires ``use_probability``.
+        """
+        super()._validate_parameters(parameters)
+        if 'labels' not in parameters:
+            raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
+                                        parameter='labels')
+        if type(parameters['labels']) is not list or len(parameters['labels']) < 2 \
+                or any(type(label) is not int and type(label) is not float for label in parameters['labels']):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='labels',
+                                        cause='must_be_list_of_at_least_two_numbers')
+        if len(set(parameters['labels'])) != len(parameters['labels']):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='labels',
+                                        cause='must_be_unique')
+        if 'samples_per_prediction' not in parameters:
+            parameters['samples_per_prediction'] = 1
+        if type(parameters['samples_per_prediction']) is not int or parameters['samples_per_prediction'] < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='samples_per_prediction',
+                                        cause='must_be_int_greater_than_0')
+        if 'use_probability' not in parameters:
+            parameters['use_probability'] = False
+        if type(parameters['use_probability']) is not bool:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='use_probability',
+                                        cause='must_be_bool')
+        if 'histogram_bins' not in parameters:
+            parameters['histogram_bins'] = 100
+        if type(parameters['histogram_bins']) is not int or parameters['histogram_bins'] < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='histogram_bins',
+                                        cause='must_be_int_greater_than_0')
+        if 'metrics' not in parameters:
+            parameters['metrics'] = [metric for metric in self._SUPPORTED_METRICS
+                                     if metric != self.METRIC_ROC_AUC or parameters['use_probability']]
+        if type(parameters['metrics']) is not list or len(parameters['metrics']) < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='metrics',
+                                        cause='must_be_non_empty_list')
+        for metric in parameters['metrics']:
+            if metric not in self._SUPPORTED_METRICS:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter=f'metrics.{metric}',
+                                            cause=f'must_be_one_of_{self._SUPPORTED_METRICS}')
+        if self.METRIC_ROC_AUC in parameters['metrics'] and not parameters['use_probability']:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter=f'metrics.{self.METRIC_ROC_AUC}',
+                                        cause='requires_use_probability')
+
+    def _initialize_parameter_fields(self, parameters: dict):
+        """ Initializes the parameter fields of this node, the label index and the evaluation counts.
+
+        :param parameters: The parameters passed to this node.
+        :type parameters: dict
+        """
+        super()._initialize_parameter_fields(parameters)
+        self.samples_per_prediction: int = parameters['samples_per_prediction']
+        self.use_probability: bool = parameters['use_probability']
+        self.histogram_bins: int = parameters['histogram_bins']
+        self.metrics: List[str] = parameters['metrics']
+        labels = np.asarray(parameters['labels'])
+        self._label_order = np.argsort(labels)
+        self._sorted_labels = labels[self._label_order]
+        label_count = len(labels)
+        self._confusion_matrix = np.zeros((label_count, label_count), dtype=np.int64)
+        self._positive_histogram = np.zeros((label_count, self.histogram_bins), dtype=np.int64)
+        self._negative_histogram = np.zeros((label_count, self.histogram_bins), dtype=np.int64)
+        self._batch_size: int = 0
+
+    def _is_next_node_call_enabled(self) -> bool:
+        return self._output_buffer[self.OUTPUT_MAIN].has_data()
+
+    def _get_batch_size(self) -> int:
+        """ Returns the number of predictions that can be evaluated with the data in the input buffers.
+
+        :return: The number of predictions.
+        :rtype: int
+        """
+        batch_size = min(self._input_buffer[self.INPUT_PREDICTED].get_data_count(),
+                         self._input_buffer[self.INPUT_ACTUAL].get_data_count() // self.samples_per_prediction)
+        if self.use_probability:
+            batch_size = min(batch_size, self._input_buffer[self.INPUT_PROBABILITY].get_data_count())
+        return batch_size
+
+    def _is_processing_condition_satisfied(self) -> bool:
+        return self._get_batch_size() > 0
+
+    def _get_label_indexes(self, label_codes: np.ndarray) -> np.ndarray:
+        """ Returns the index of each label code in ``labels``, or -1 for unknown codes.
+
+        :param label_codes: The label codes.
+        :type label_codes: np.ndarray
+
+        :return: The label indexes.
+        :rtype: np.ndarray
+        """
+        positions = np.minimum(np.searchsorted(self._sorted_labels, label_codes), len(self._sorted_labels) - 1)
+        return np.where(self._sorted_labels[positions] == label_codes, self._label_order[positions], -1)
+
+    def _process(self, data: Dict[str, FrameworkData]) -> Dict[str, FrameworkData]:
+        """ Updates the evaluation counts with the next batch of predictions and outputs the selected metrics.
+
+        :param data: The data to process.
+        :type data: dict[str, FrameworkData]
+
+        :return: The metrics, one channel per metric.
+        :rtype: dict[str, FrameworkData]
+        """
+        self._batch_size = self._get_batch_size()
+        sample_count = self._batch_size * self.samples_per_prediction
+        label_count = self._confusion_matrix.shape[0]
+        actual = self._get_label_indexes(
+            np.asarray(data[self.INPUT_ACTUAL].get_data_single_channel()[0:sample_count]))
+        predicted = self._get_label_indexes(
+            np.asarray(data[self.INPUT_PREDICTED].get_data_single_channel()[0:self._batch_size]))
+        predicted = np.repeat(predicted, self.samples_per_prediction)
+        is_known = (actual >= 0) & (predicted >= 0)
+        self._confusion_matrix += np.bincount(actual[is_known] * label_count + predicted[is_known],
+                                              minlength=label_count * label_count).reshape(label_count, label_count)
+
+        if self.use_probability:
+            probability = np.asarray(data[self.INPUT_PROBABILITY].get_data_as_2d_array(), dtype=float)
+            probability = np.repeat(np.transpose(probability[:, 0:self._batch_size]), self.samples_per_prediction,
+                                    axis=0)[actual >= 0]
+            bins = np.clip((probability * self.histogram_bins).astype(int), 0, self.histogram_bins - 1)
+            histogram_indexes = (np.arange(label_count) * self.histogram_bins + bins).ravel()
+            is_positive = (actual[actual >= 0][:, np.newaxis] == np.arange(label_count)).ravel()
+            self._positive_histogram += np.bincount(histogram_indexes[is_positive],
+                                                    minlength=label_count * self.histogram_bins
+                                                    ).reshape(label_count, self.histogram_bins)
+            self._negative_histogram += np.bincount(histogram_indexes[~is_positive],
+                                                    minlength=label_count * self.histogram_bins
+                                                    ).reshape(label_count, self.histogram_bins)
+
+        self._consume_batch(data)
+
+        return_data = FrameworkData(channels=self.metrics)
+        return_data.input_2d_data([[self._compute_metric(metric)] for metric in self.metrics])
+        return {
+            self.OUTPUT_MAIN: return_data
+        }
+
+    def _compute_metric(self, metric: str) -> float:
+        """ Computes a metric from the evaluation counts.
+
+        :param metric: The metric name.
+        :type metric: str
+
+        :return: The metric value, or NaN if there's not enough data to compute it.
+        :rtype: float
+        """
+        confusion_matrix = self._confusion_matrix
+        total = np.sum(confusion_matrix)
+        actual_count = np.sum(confusion_matrix, axis=1)
+        predicted_count = np.sum(confusion_matrix, axis=0)
+        true_positives = np.diag(confusion_matrix)
+        if metric == self.METRIC_ROC_AUC:
+            return self._compute_roc_auc()
+        if total == 0:
+            return float('nan')
+        if metric == self.METRIC_ACCURACY:
+            return float(np.sum(true_positives) / total)
+        if metric == self.METRIC_KAPPA:
+            observed_agreement = np.sum(true_positives) / total
+            expected_agreement = np.sum(actual_count * predicted_count) / total ** 2
+            if expected_agreement == 1:
+                return float('nan')
+            return float((observed_agreement - expected_agreement) / (1 - expected_agreement))
+        if metric == self.METRIC_F1:
+            denominator = actual_count + predicted_count
+            is_present = denominator > 0
+            return float(np.mean(2 * true_positives[is_present] / denominator[is_present]))
+        is_present = actual_count > 0
+        return float(np.mean(true_positives[is_present] / actual_count[is_present]))
+
+    def _compute_roc_auc(self) -> float:
+        """ Approximates the one-vs-rest ROC AUC of each class from its probability histograms, where a positive and a
+        negative sample in the same bin count as a tie, and returns the mean over the classes with both positive and
+        negative samples.
+
+        :return: The ROC AUC, or NaN if no class has both positive and negative samples.
+        :rtype: float
+        """
+        positive_count = np.sum(self._positive_histogram, axis=1)
+        negative_count = np.sum(self._negative_histogram, axis=1)
+        is_valid = (positive_count > 0) & (negative_count > 0)
+        if not np.any(is_valid):
+            return float('nan')
+        negatives_below = np.cumsum(self._negative_histogram, axis=1) - self._negative_histogram
+        correctly_ranked = np.sum(self._positive_histogram * (negatives_below + 0.5 * self._negative_histogram), axis=1)
+        return float(np.mean(correctly_ranked[is_valid] / (positive_count[is_valid] * negative_count[is_valid])))
+
+    def _consume_batch(self, data: Dict[str, FrameworkData]) -> None:
+        """ Removes the evaluated batch from the input buffers, whatever the buffer options are, as the evaluation counts
+        already include it.
+
+        :param data: The input buffers.
+        :type data: dict[str, FrameworkData]
+        """
+        data[self.INPUT_ACTUAL].splice(0, self._batch_size * self.samples_per_prediction)
+        data[self.INPUT_PREDICTED].splice(0, self._batch_size)
+        data[self.INPUT_PROBABILITY].splice(0, self._batch_size)
+        self._batch_size = 0
+
+    def _clear_input_buffer(self):
+        """ Keeps the data of the next predictions, as the evaluated data is removed from the input buffers when
+        processed.
+        """
+        if not hasattr(self, '_input_buffer'):
+            super()._clear_input_buffer()
+
+    def dispose(self) -> None:
+        super()._clear_input_buffer()
+        self._clear_output_buffer()
+
+    def _get_inputs(self) -> List[str]:
+        """ Returns the inputs of this node.
+        """
+        return [
+            self.INPUT_ACTUAL,
+            self.INPUT_PREDICTED,
+            self.INPUT_PROBABILITY
+        ]
+
+    def _get_outputs(self) -> List[str]:
+        """ Returns the outputs of this node.
+        """
+        return [
+            self.OUTPUT_MAIN
+        ]
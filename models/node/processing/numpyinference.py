@@ -0,0 +1,191 @@
+import os
+from typing import List, Dict, Final, Any
+
+import numpy as np
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.missing_parameter import MissingParameterError
+from models.exception.non_compatible_data import NonCompatibleData
+from models.framework_data import FrameworkData
+from models.node.processing.processing_node import ProcessingNode
+from models.utils.exported_model import load_exported_model, KIND_KEY, KIND_CSP, KIND_LDA, KIND_PCA
+
+
+class NumpyInference(ProcessingNode):
+    """ This node runs the inference of a linear model exported by a trainable node (``CSP``, ``LDA`` or ``PCA``) with
+    ``export_after_training`` enabled. Only NumPy is used, so neither sklearn nor mne are imported, and the exported
+    ``.npz`` file is only loaded (memory-mapped) when the first data arrives. The outputs are the same as the ones
+    produced by the trainable node that exported the model, so it can replace it in a deployment pipeline.
+
+    Attributes:
+        _MODULE_NAME (str): The name of the module(in this case ``node.processing.numpyinference``)
+        INPUT_DATA (str): The name of the input data (in this case ``data``)
+        OUTPUT_MAIN (str): The name of the main output (in this case ``main``)
+        OUTPUT_PROBABILITY (str): The name of the class probability output, only filled by ``lda`` models (in this case ``probability``)
+
+    configuration.json usage:
+        **module** (*str*): The name of the module (``node.processing``)\n
+        **type** (*str*): The name of the class (``NumpyInference``)\n
+        **model_file_path** (*str*): The path of the ``.npz`` file exported by the trainable node.\n
+        **buffer_options** (*dict*): Buffer options.\n
+            **clear_output_buffer_on_data_input** (*bool*): Whether to clear the output buffer when new data is inserted in the input buffer.\n
+            **clear_input_buffer_after_process** (*bool*): Whether to clear the input buffer after processing.\n
+            **clear_output_buffer_after_process** (*bool*): Whether to clear the output buffer after processing.\n
+    """
+    _MODULE_NAME: Final[str] = 'node.processing.numpyinference'
+
+    INPUT_DATA: Final[str] = 'data'
+    OUTPUT_MAIN: Final[str] = 'main'
+    OUTPUT_PROBABILITY: Final[str] = 'probability'
+
+    def _validate_parameters(self, parameters: dict):
+        """ Validates the parameters passed to this node.
+
+        :param parameters: The parameters passed to this node.
+        :type parameters: dict
+
+        :raises MissingParameterError: the ``model_file_path`` parameter is required.
+        :raises InvalidParameterValue: the ``model_file_path`` parameter must be a str.
+        :raises InvalidParameterValue: the ``model_file_path`` parameter must be a npz file path.
+        :raises InvalidParameterValue: the ``model_file_path`` parameter must be an existing file.
+        """
+        super()._validate_parameters(parameters)
+        if 'model_file_path' not in parameters:
+            raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
+                                        parameter='model_file_path')
+        if type(parameters['model_file_path']) is not str:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='model_file_path',
+                                        cause='must_be_str')
+        if os.path.splitext(parameters['model_file_path'])[1] != '.npz':
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='model_file_path',
+                                        cause='must_be_npz_file')
+        if not os.path.exists(parameters['model_file_path']):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='model_file_path',
+                                        cause='file_doesnt_exist')
+
+    def _initialize_parameter_fields(self, parameters: dict):
+        """ Initializes the parameter fields of this node. The model itself is only loaded on the first processing.
+
+        :param parameters: The parameters passed to this node.
+        :type parameters: dict
+        """
+        super()._initialize_parameter_fields(parameters)
+        self._model_file_path: str = parameters['model_file_path']
+        self._model: Dict[str, np.ndarray] = None
+        self._model_kind: str = None
+
+    def _load_model(self):
+        """ Loads the exported model from the ``model_file_path`` file.
+
+        :raises InvalidParameterValue: the exported model kind is not supported.
+        """
+        self.print(f'Loading exported model from {self._model_file_path}')
+        self._model = load_exported_model(self._model_file_path)
+        self._model_kind = str(self._model[KIND_KEY][0])
+        if self._model_kind not in [KIND_CSP, KIND_LDA, KIND_PCA]:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='model_file_path',
+                                        cause=f'unsupported_model_kind_[{self._model_kind}]')
+
+    def _is_next_node_call_enabled(self) -> bool:
+        return self._output_buffer[self.OUTPUT_MAIN].has_data()
+
+    def _is_processing_condition_satisfied(self) -> bool:
+        return self._input_buffer[self.INPUT_DATA].get_data_count() > 0
+
+    def _process(self, data: Dict[str, FrameworkData]) -> Dict[str, FrameworkData]:
+        """ Runs the exported model on the input data. The input data is formatted the same way the trainable nodes
+        format it, in other words, with the samples (or epochs) axis first.
+
+        :param data: The data to process.
+        :type data: Dict[str, FrameworkData]
+
+        :return: The processed data.
+        :rtype: Dict[str, FrameworkData]
+        """
+        if self._model is None:
+            self._load_model()
+        sampling_frequency = data[self.INPUT_DATA].sampling_frequency
+        formatted_data = np.moveaxis(np.asarray(data[self.INPUT_DATA].get_data_as_2d_array()), 1, 0)
+        if self._model_kind == KIND_LDA:
+            return self._classify(formatted_data, sampling_frequency)
+        if self._model_kind == KIND_CSP:
+            projection = self._model['filters']
+            extracted_data = np.transpose(np.dot(projection, np.transpose(formatted_data)) ** 2)
+        else:
+            projection = self._model['components']
+            extracted_data = np.dot(formatted_data - self._model['mean'], projection.T)
+        return {
+            self.OUTPUT_MAIN: self._format_sources(extracted_data, projection.shape[0], sampling_frequency)
+        }
+
+    def _classify(self, data: Any, sampling_frequency: float) -> Dict[str, FrameworkData]:
+        """ Reproduces the ``LinearDiscriminantAnalysis`` ``predict`` and ``predict_proba`` methods.
+
+        :param data: The formatted input data, in samples X features format.
+        :type data: Any
+        :param sampling_frequency: The sampling frequency of the input data.
+        :type sampling_frequency: float
+
+        :return: The predicted labels and the class probabilities.
+        :rtype: Dict[str, FrameworkData]
+        """
+        coefficients = self._model['coefficients']
+        classes = self._model['classes']
+        if data.ndim != 2 or data.shape[1] != coefficients.shape[1]:
+            raise NonCompatibleData(module=self._MODULE_NAME, name=self.name,
+                                    cause=f'expected_{coefficients.shape[1]}_features')
+        scores = np.dot(data, coefficients.T) + self._model['intercept']
+        if coefficients.shape[0] == 1:
+            scores = scores.ravel()
+            prediction = classes[(scores > 0).astype(int)]
+            positive_probability = 1.0 / (1.0 + np.exp(-scores))
+            probability = np.vstack([1 - positive_probability, positive_probability])
+        else:
+            prediction = classes[np.argmax(scores, axis=1)]
+            exponential = np.exp(scores - np.max(scores, axis=1, keepdims=True))
+            probability = np.transpose(exponential / np.sum(exponential, axis=1, keepdims=True))
+
+        formatted_prediction = FrameworkData(sampling_frequency_hz=sampling_frequency)
+        formatted_prediction.input_data_on_channel(prediction.tolist())
+        formatted_probability = FrameworkData(sampling_frequency_hz=sampling_frequency,
+                                              channels=[f'label_{i}' for i in range(probability.shape[0])])
+        formatted_probability.input_2d_data(probability.tolist())
+        return {
+            self.OUTPUT_MAIN: formatted_prediction,
+            self.OUTPUT_PROBABILITY: formatted_probability
+        }
+
+    @staticmethod
+    def _format_sources(extracted_data: Any, number_of_components: int, sampling_frequency: float) -> FrameworkData:
+        """ Formats the extracted sources the same way the ``CSP`` and ``PCA`` nodes do.
+
+        :param extracted_data: The extracted sources.
+        :type extracted_data: Any
+        :param number_of_components: The number of extracted sources.
+        :type number_of_components: int
+        :param sampling_frequency: The sampling frequency of the input data.
+        :type sampling_frequency: float
+
+        :return: The formatted sources.
+        :rtype: FrameworkData
+        """
+        extracted_data = np.moveaxis(extracted_data, 1, 0)
+        formatted_data = FrameworkData(sampling_frequency_hz=sampling_frequency,
+                                       channels=[f'source_{i}' for i in range(1, number_of_components + 1)])
+        formatted_data.input_2d_data(extracted_data)
+        return formatted_data
+
+    def _get_inputs(self) -> List[str]:
+        return [
+            self.INPUT_DATA
+        ]
+
+    def _get_outputs(self) -> List[str]:
+        return [
+            self.OUTPUT_MAIN,
+            self.OUTPUT_PROBABILITY
+        ]
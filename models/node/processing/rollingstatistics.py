@@ -0,0 +1,287 @@
+from collections import deque
+from typing import List, Dict, Final, Deque, Tuple
+
+import numpy as np
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.missing_parameter import MissingParameterError
+from models.framework_data import FrameworkData
+from models.node.processing.processing_node import ProcessingNode
+
+
+class RollingStatistics(ProcessingNode):
+    """ This node computes a statistic of the last ``window_size`` samples of each channel, for every sample or for every
+    ``output_every``-th sample of a continuous (not epoched) stream. The node state is kept between chunks, so the
+    result doesn't depend on how the stream is split in chunks. While less than ``window_size`` samples were received,
+    the statistic is computed over the samples available.
+
+    The last samples of each channel are kept in a ring buffer. Means and variances are computed from the sum and the
+    sum of squares of the ring buffer content, which are kept between chunks and updated with the new samples and the
+    ones leaving the window, and minimums and maximums are tracked with a monotonic deque per channel, so each sample
+    costs O(1) (amortized) regardless of the window size. The running sums are recomputed from the ring buffer once
+    every ``window_size`` samples, so rounding errors don't accumulate.
+
+    Attributes:
+        _MODULE_NAME (`str`): The name of the module (in his case ``node.processing.rollingstatistics``)
+        INPUT_MAIN (`str`): The name of the input (in this case ``main``)
+        OUTPUT_MAIN (`str`): The name of the output (in this case ``main``)
+
+    configuration.json usage:
+        **module** (*str*): The name of the module (``node.processing``)\n
+        **type** (*str*): The type of the node (``RollingStatistics``)\n
+        **statistic** (*str*): The statistic to be computed. One of ``mean``, ``variance`` (population variance), ``standard_deviation``, ``minimum`` or ``maximum``.\n
+        **window_size** (*int*): Number of samples of the rolling window.\n
+        **output_every** (*int*): The statistic is output for every ``output_every``-th sample, so the output sampling frequency is the input one divided by it. This is a optional parameter, the default value is 1.\n
+        **buffer_options** (*dict*): Buffer options.\n
+            **clear_output_buffer_on_data_input** (*bool*): Whether to clear the output buffer when new data is inserted in the input buffer.\n
+            **clear_input_buffer_after_process** (*bool*): Whether to clear the input buffer after processing.\n
+            **clear_output_buffer_after_process** (*bool*): Whether to clear the output buffer after processing.\n
+    """
+    _MODULE_NAME: Final[str] = 'node.processing.rollingstatistics'
+
+    INPUT_MAIN: Final[str] = 'main'
+    OUTPUT_MAIN: Final[str] = 'main'
+
+    STATISTIC_MEAN: Final[str] = 'mean'
+    STATISTIC_VARIANCE: Final[str] = 'variance'
+    STATISTIC_STANDARD_DEVIATION: Final[str] = 'standard_deviation'
+    STATISTIC_MINIMUM: Final[str] = 'minimum'
+    STATISTIC_MAXIMUM: Final[str] = 'maximum'
+    _ALLOWED_STATISTICS: Final[List[str]] = [STATISTIC_MEAN, STATISTIC_VARIANCE, STATISTIC_STANDARD_DEVIATION,
+                                             STATISTIC_MINIMUM, STATISTIC_MAXIMUM]
+
+    def _validate_parameters(self, parameters: dict):
+        """ Validates the parameters passed to this node.
+
+        :param parameters: The parameters passed to this node.
+        :type parameters: dict
+
+        :raises MissingParameterError: the ``statistic`` parameter is required.
+        :raises InvalidParameterValue: the ``statistic`` parameter must be one of the allowed statistics.
+        :raises MissingParameterError: the ``window_size`` parameter is required.
+        :raises InvalidParameterValue: the ``window_size`` parameter must be an int greater than 0.
+        :raises InvalidParameterValue: the ``output_every`` parameter must be an int greater than 0.
+        """
+        super()._validate_parameters(parameters)
+        if 'statistic' not in parameters:
+            raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
+                                        parameter='statistic')
+        if parameters['statistic'] not in self._ALLOWED_STATISTICS:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='statistic',
+                                        cause=f'must_be_one_of_{self._ALLOWED_STATISTICS}')
+        if 'window_size' not in parameters:
+            raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
+                                        parameter='window_size')
+        if type(parameters['window_size']) is not int:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='window_size',
+                                        cause='must_be_int')
+        if parameters['window_size'] < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='window_size',
+                                        cause='must_be_greater_than_0')
+        if 'output_every' not in parameters:
+            parameters['output_every'] = 1
+        if type(parameters['output_every']) is not int:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='output_every',
+                                        cause='must_be_int')
+        if parameters['output_every'] < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='output_every',
+                                        cause='must_be_greater_than_0')
+
+    def _initialize_parameter_fields(self, parameters: dict):
+        super()._initialize_parameter_fields(parameters)
+        self.statistic: str = parameters['statistic']
+        self.window_size: int = parameters['window_size']
+        self.output_every: int = parameters['output_every']
+        self._reset_state([])
+
+    def _reset_state(self, channels: List[str]):
+        """ Resets the rolling window state for the given channels.
+
+        :param channels: The input channels.
+        :type channels: List[str]
+        """
+        self._channels: List[str] = list(channels)
+        self._ring_buffer = np.zeros((len(channels), self.window_size))
+        self._ring_buffer_index: int = 0
+        self._ring_buffer_count: int = 0
+        self._sample_count: int = 0
+        self._extreme_deques: List[Deque[Tuple[int, float]]] = [deque() for _ in channels]
+        self._offset = np.zeros((len(channels), 1))
+        self._window_sum = np.zeros(len(channels))
+        self._window_square_sum = np.zeros(len(channels))
+        self._samples_since_sum_update: int = 0
+
+    def _is_next_node_call_enabled(self) -> bool:
+        return self._output_buffer[self.OUTPUT_MAIN].has_data()
+
+    def _is_processing_condition_satisfied(self) -> bool:
+        return self._input_buffer[self.INPUT_MAIN].get_data_count() > 0
+
+    def _process(self, data: Dict[str, FrameworkData]) -> Dict[str, FrameworkData]:
+        input_data = data[self.INPUT_MAIN]
+        if input_data.channels != self._channels:
+            self._reset_state(input_data.channels)
+        samples = np.asarray(input_data.get_data_as_2d_array(), dtype=float)
+
+        sample_indexes = np.arange(self._sample_count + 1, self._sample_count + samples.shape[1] + 1)
+        output_positions = np.flatnonzero(sample_indexes % self.output_every == 0)
+        if self.statistic in [self.STATISTIC_MINIMUM, self.STATISTIC_MAXIMUM]:
+            output_values = self._rolling_extreme(samples, output_positions)
+        else:
+            output_values = self._rolling_moment(samples, output_positions)
+        self._write_ring_buffer(samples)
+        self._sample_count += samples.shape[1]
+
+        output_sampling_frequency = input_data.sampling_frequency / self.output_every \
+            if input_data.sampling_frequency is not None \
+            else None
+        return_data = FrameworkData(output_sampling_frequency, input_data.channels)
+        return_data.input_2d_data(output_values.tolist())
+        return {
+            self.OUTPUT_MAIN: return_data
+        }
+
+    def _write_ring_buffer(self, samples: np.ndarray):
+        """ Stores the new samples in the ring buffer, overwriting the oldest ones.
+
+        :param samples: The new samples, in channels X samples format.
+        :type samples: np.ndarray
+        """
+        sample_count = samples.shape[1]
+        if sample_count >= self.window_size:
+            self._ring_buffer[:, :] = samples[:, sample_count - self.window_size:]
+            self._ring_buffer_index = 0
+        else:
+            positions = (self._ring_buffer_index + np.arange(sample_count)) % self.window_size
+            self._ring_buffer[:, positions] = samples
+            self._ring_buffer_index = (self._ring_buffer_index + sample_count) % self.window_size
+        self._ring_buffer_count = min(self._ring_buffer_count + sample_count, self.window_size)
+
+    def _get_ring_buffer_oldest(self, count: int) -> np.ndarray:
+        """ Returns the oldest samples stored in the ring buffer, in chronological order.
+
+        :param count: The number of samples.
+        :type count: int
+
+        :return: The stored samples, in channels X samples format.
+        :rtype: np.ndarray
+        """
+        oldest_index = (self._ring_buffer_index - self._ring_buffer_count) % self.window_size
+        return self._ring_buffer[:, (oldest_index + np.arange(count)) % self.window_size]
+
+    def _update_window_sums(self):
+        """ Recomputes the sum and the sum of squares of the ring buffer content, discarding the rounding errors of the
+        running updates.
+        """
+        shifted_window = self._get_ring_buffer_oldest(self._ring_buffer_count) - self._offset
+        self._window_sum = shifted_window.sum(axis=1)
+        self._window_square_sum = (shifted_window ** 2).sum(axis=1)
+        self._samples_since_sum_update = 0
+
+    def _rolling_sums(self, window_total: np.ndarray, leaving: np.ndarray, values: np.ndarray,
+                      history_included: np.ndarray) -> np.ndarray:
+        """ Computes the sum of the window ending at each new sample, from the sum of the ring buffer content, the
+        cumulative sums of the history samples leaving the window and the cumulative sums of the new samples.
+
+        :return: The window sums, in channels X new samples format.
+        :rtype: np.ndarray
+        """
+        zeros = np.zeros((values.shape[0], 1))
+        leaving_sum = np.concatenate((zeros, np.cumsum(leaving, axis=1)), axis=1)
+        new_sum = np.concatenate((zeros, np.cumsum(values, axis=1)), axis=1)
+        ends = np.arange(1, values.shape[1] + 1)
+        starts = np.maximum(ends - self.window_size, 0)
+        return window_total[:, np.newaxis] - leaving_sum[:, self._ring_buffer_count - history_included] \
+            + new_sum[:, ends] - new_sum[:, starts]
+
+    def _rolling_moment(self, samples: np.ndarray, output_positions: np.ndarray) -> np.ndarray:
+        """ Computes the rolling mean, variance or standard deviation at the output positions. Only the new samples and
+        the history samples leaving the window are read, and the running sums are updated to the last window.
+
+        :param samples: The new samples, in channels X samples format.
+        :type samples: np.ndarray
+        :param output_positions: Indexes of the new samples where the statistic is output.
+        :type output_positions: np.ndarray
+
+        :return: The statistic values, in channels X outputs format.
+        :rtype: np.ndarray
+        """
+        sample_count = samples.shape[1]
+        if sample_count == 0:
+            return np.empty((samples.shape[0], 0))
+        if self._sample_count == 0:
+            # Shifting by the first value keeps the running sums small, avoiding cancellation errors in the variance
+            self._offset = samples[:, 0:1].copy()
+        if self._samples_since_sum_update >= self.window_size:
+            self._update_window_sums()
+        positions = np.arange(sample_count)
+        history_included = np.minimum(self._ring_buffer_count, np.maximum(self.window_size - 1 - positions, 0))
+        counts = history_included + np.minimum(positions + 1, self.window_size)
+        leaving = self._get_ring_buffer_oldest(self._ring_buffer_count - history_included[-1]) - self._offset
+        shifted_samples = samples - self._offset
+        sums = self._rolling_sums(self._window_sum, leaving, shifted_samples, history_included)
+        self._window_sum = sums[:, -1]
+        self._samples_since_sum_update += sample_count
+        mean = sums[:, output_positions] / counts[output_positions]
+        if self.statistic == self.STATISTIC_MEAN:
+            return mean + self._offset
+        square_sums = self._rolling_sums(self._window_square_sum, leaving ** 2, shifted_samples ** 2,
+                                         history_included)
+        self._window_square_sum = square_sums[:, -1]
+        variance = np.maximum(square_sums[:, output_positions] / counts[output_positions] - mean ** 2, 0)
+        if self.statistic == self.STATISTIC_VARIANCE:
+            return variance
+        return np.sqrt(variance)
+
+    def _rolling_extreme(self, samples: np.ndarray, output_positions: np.ndarray) -> np.ndarray:
+        """ Computes the rolling minimum or maximum at the output positions. Each channel deque holds the window samples
+        that can still be the extreme value, in monotonic order, so the extreme is always its first item.
+
+        :param samples: The new samples, in channels X samples format.
+        :type samples: np.ndarray
+        :param output_positions: Indexes of the new samples where the statistic is output.
+        :type output_positions: np.ndarray
+
+        :return: The statistic values, in channels X outputs format.
+        :rtype: np.ndarray
+        """
+        is_minimum = self.statistic == self.STATISTIC_MINIMUM
+        output_values = np.empty((samples.shape[0], output_positions.shape[0]))
+        output_position_set = set(output_positions.tolist())
+        for channel_index, channel_samples in enumerate(samples.tolist()):
+            extreme_deque = self._extreme_deques[channel_index]
+            output_index = 0
+            for position, value in enumerate(channel_samples):
+                sample_index = self._sample_count + position
+                if is_minimum:
+                    while extreme_deque and extreme_deque[-1][1] >= value:
+                        extreme_deque.pop()
+                else:
+                    while extreme_deque and extreme_deque[-1][1] <= value:
+                        extreme_deque.pop()
+                extreme_deque.append((sample_index, value))
+                if extreme_deque[0][0] <= sample_index - self.window_size:
+                    extreme_deque.popleft()
+                if position in output_position_set:
+                    output_values[channel_index, output_index] = extreme_deque[0][1]
+                    output_index += 1
+        return output_values
+
+    def _get_inputs(self) -> List[str]:
+        """ This method returns the inputs of the node. In this case it returns a single 'main' input.
+        """
+        return [
+            self.INPUT_MAIN
+        ]
+
+    def _get_outputs(self) -> List[str]:
+        """ This method returns the outputs of the node. In this case it returns a single 'main' output.
+        """
+        return [
+            self.OUTPUT_MAIN
+        ]
@@ -0,0 +1,201 @@
+from typing import List, Dict, Final
+
+import numpy as np
+import scipy.fft
+import scipy.signal
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.missing_parameter import MissingParameterError
+from models.exception.non_compatible_data import NonCompatibleData
+from models.framework_data import FrameworkData
+from models.node.processing.processing_node import ProcessingNode
+
+
+class STFT(ProcessingNode):
+    """ This node computes the short-time Fourier transform (spectrogram) of a continuous stream. A frame of
+    ``frame_size`` samples is transformed every ``hop_size`` samples, so the output sampling frequency is the input one
+    divided by ``hop_size``. The samples that are still needed by the next frames are kept between chunks, so each frame
+    is computed only once, and all frames of all channels of a chunk are transformed in a single batched
+    ``scipy.fft.rfft`` call.
+
+    There are two output layouts:
+        ``frames``: each input channel outputs one spectrum (a list with the value of each frequency bin) per frame, like
+        epoched data, so the output is a channels X frames X frequencies structure.\n
+        ``bins``: each frequency bin of each input channel is output as its own channel, named ``{channel}_{frequency}Hz``,
+        with one value per frame. This layout can be plotted by ``SimpleGraph`` or used by continuous processing nodes.\n
+
+    Attributes:
+        _MODULE_NAME (`str`): The name of the module (in his case ``node.processing.stft``)
+        INPUT_MAIN (`str`): The name of the input (in this case ``main``)
+        OUTPUT_MAIN (`str`): The name of the output (in this case ``main``)
+
+    configuration.json usage:
+        **module** (*str*): The name of the module (``node.processing``)\n
+        **type** (*str*): The type of the node (``STFT``)\n
+        **frame_size** (*int*): Number of samples of each frame.\n
+        **hop_size** (*int*): Number of samples between the start of two consecutive frames. This is a optional parameter, the default value is ``frame_size`` / 2.\n
+        **window** (*str*): Window function, as accepted by ``scipy.signal.get_window``. This is a optional parameter, the default value is ``hann``.\n
+        **scaling** (*str*): ``magnitude`` for the spectrum magnitude or ``power`` for its squared magnitude. This is a optional parameter, the default value is ``magnitude``.\n
+        **layout** (*str*): ``frames`` or ``bins``, as described above. This is a optional parameter, the default value is ``frames``.\n
+        **workers** (*int*): Number of workers used by ``scipy.fft``, -1 meaning all cores. This is a optional parameter, the default value is 1.\n
+        **buffer_options** (*dict*): Buffer options.\n
+            **clear_output_buffer_on_data_input** (*bool*): Whether to clear the output buffer when new data is inserted in the input buffer.\n
+            **clear_input_buffer_after_process** (*bool*): Whether to clear the input buffer after processing.\n
+            **clear_output_buffer_after_process** (*bool*): Whether to clear the output buffer after processing.\n
+    """
+    _MODULE_NAME: Final[str] = 'node.processing.stft'
+
+    INPUT_MAIN: Final[str] = 'main'
+    OUTPUT_MAIN: Final[str] = 'main'
+
+    SCALING_MAGNITUDE: Final[str] = 'magnitude'
+    SCALING_POWER: Final[str] = 'power'
+    LAYOUT_FRAMES: Final[str] = 'frames'
+    LAYOUT_BINS: Final[str] = 'bins'
+
+    def _validate_parameters(self, parameters: dict):
+        """ Validates the parameters passed to this node, setting the default values of the optional ones.
+
+        :param parameters: The parameters passed to this node.
+        :type parameters: dict
+
+        :raises MissingParameterError: the ``frame_size`` parameter is required.
+        :raises InvalidParameterValue: the ``frame_size`` parameter must be an int greater than 1.
+        :raises InvalidParameterValue: the ``hop_size`` parameter must be an int greater than 0.
+        :raises InvalidParameterValue: the ``window`` parameter must be a str.
+        :raises InvalidParameterValue: the ``scaling`` parameter must be ``magnitude`` or ``power``.
+        :raises InvalidParameterValue: the ``layout`` parameter must be ``frames`` or ``bins``.
+        :raises InvalidParameterValue: the ``workers`` parameter must be an int different from 0.
+        """
+        super()._validate_parameters(parameters)
+        if 'frame_size' not in parameters:
+            raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
+                                        parameter='frame_size')
+        if type(parameters['frame_size']) is not int:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='frame_size',
+                                        cause='must_be_int')
+        if parameters['frame_size'] < 2:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='frame_size',
+                                        cause='must_be_greater_than_1')
+        if 'hop_size' not in parameters:
+            parameters['hop_size'] = parameters['frame_size'] // 2
+        if type(parameters['hop_size']) is not int:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='hop_size',
+                                        cause='must_be_int')
+        if parameters['hop_size'] < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='hop_size',
+                                        cause='must_be_greater_than_0')
+        if 'window' not in parameters:
+            parameters['window'] = 'hann'
+        if type(parameters['window']) is not str:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='window',
+                                        cause='must_be_str')
+        if 'scaling' not in parameters:
+            parameters['scaling'] = self.SCALING_MAGNITUDE
+        if parameters['scaling'] not in [self.SCALING_MAGNITUDE, self.SCALING_POWER]:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='scaling',
+                                        cause=f'not_in_[{self.SCALING_MAGNITUDE},{self.SCALING_POWER}]')
+        if 'layout' not in parameters:
+            parameters['layout'] = self.LAYOUT_FRAMES
+        if parameters['layout'] not in [self.LAYOUT_FRAMES, self.LAYOUT_BINS]:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='layout',
+                                        cause=f'not_in_[{self.LAYOUT_FRAMES},{self.LAYOUT_BINS}]')
+        if 'workers' not in parameters:
+            parameters['workers'] = 1
+        if type(parameters['workers']) is not int or parameters['workers'] == 0:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='workers',
+                                        cause='must_be_int_different_from_0')
+
+    def _initialize_parameter_fields(self, parameters: dict):
+        super()._initialize_parameter_fields(parameters)
+        self.frame_size: int = parameters['frame_size']
+        self.hop_size: int = parameters['hop_size']
+        self.scaling: str = parameters['scaling']
+        self.layout: str = parameters['layout']
+        self.workers: int = parameters['workers']
+        self._window = scipy.signal.get_window(parameters['window'], self.frame_size)
+        self._channels: List[str] = []
+        self._overlap_buffer = np.zeros((0, 0))
+        self._skip_count: int = 0
+
+    def _is_next_node_call_enabled(self) -> bool:
+        return self._output_buffer[self.OUTPUT_MAIN].has_data()
+
+    def _is_processing_condition_satisfied(self) -> bool:
+        return self._input_buffer[self.INPUT_MAIN].get_data_count() > 0
+
+    def _process(self, data: Dict[str, FrameworkData]) -> Dict[str, FrameworkData]:
+        input_data = data[self.INPUT_MAIN]
+        if input_data.channels != self._channels:
+            self._channels = list(input_data.channels)
+            self._overlap_buffer = np.zeros((len(self._channels), 0))
+            self._skip_count = 0
+        samples = np.asarray(input_data.get_data_as_2d_array(), dtype=float)
+        if samples.ndim != 2:
+            raise NonCompatibleData(module=self._MODULE_NAME, name=self.name,
+                                    cause='input_must_not_be_epoched')
+        # With a hop size greater than the frame size, samples between frames are never used
+        skipped = min(self._skip_count, samples.shape[1])
+        self._skip_count -= skipped
+        samples = np.concatenate((self._overlap_buffer, samples[:, skipped:]), axis=1)
+
+        frame_count = 0 if samples.shape[1] < self.frame_size \
+            else (samples.shape[1] - self.frame_size) // self.hop_size + 1
+        # Samples from the start of the next frame on are needed again by the next chunk
+        self._overlap_buffer = samples[:, frame_count * self.hop_size:]
+        self._skip_count += max(frame_count * self.hop_size - samples.shape[1], 0)
+
+        output_sampling_frequency = input_data.sampling_frequency / self.hop_size \
+            if input_data.sampling_frequency is not None \
+            else None
+        if self.layout == self.LAYOUT_FRAMES:
+            return_data = FrameworkData(output_sampling_frequency, input_data.channels)
+        else:
+            frequencies = scipy.fft.rfftfreq(self.frame_size, 1 / input_data.sampling_frequency) \
+                if input_data.sampling_frequency is not None \
+                else np.arange(self.frame_size // 2 + 1)
+            return_data = FrameworkData(output_sampling_frequency,
+                                        [f'{channel}_{frequency:g}Hz'
+                                         for channel in input_data.channels for frequency in frequencies])
+        if frame_count == 0:
+            return {
+                self.OUTPUT_MAIN: return_data
+            }
+
+        frames = np.lib.stride_tricks.sliding_window_view(samples, self.frame_size, axis=1)
+        frames = frames[:, 0:frame_count * self.hop_size:self.hop_size, :] * self._window
+        spectrum = np.abs(scipy.fft.rfft(frames, axis=-1, workers=self.workers))
+        if self.scaling == self.SCALING_POWER:
+            spectrum = spectrum ** 2
+
+        if self.layout == self.LAYOUT_FRAMES:
+            for channel_index, channel in enumerate(input_data.channels):
+                return_data.input_data_on_channel(spectrum[channel_index].tolist(), channel)
+        else:
+            return_data.input_2d_data(
+                np.moveaxis(spectrum, -1, 1).reshape(len(return_data.channels), frame_count).tolist())
+        return {
+            self.OUTPUT_MAIN: return_data
+        }
+
+    def _get_inputs(self) -> List[str]:
+        """ This method returns the inputs of the node. In this case it returns a single 'main' input.
+        """
+        return [
+            self.INPUT_MAIN
+        ]
+
+    def _get_outputs(self) -> List[str]:
+        """ This method returns the outputs of the node. In this case it returns a single 'main' output.
+        """
+        return [
+            self.OUTPUT_MAIN
+        ]
@@ -0,0 +1,190 @@
+import abc
+from typing import Final, Any, List
+
+import joblib
+import mne.decoding
+from sklearn.base import TransformerMixin, BaseEstimator
+from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
+from sklearn.model_selection import GridSearchCV
+from sklearn.pipeline import Pipeline
+
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.framework_data import FrameworkData
+from models.node.processing.trainable.classifier.sklearn_classifier import SKLearnClassifier
+
+
+class CSPLDASearch(SKLearnClassifier):
+    """ This node trains a CSP + LDA pipeline (``mne.decoding.CSP`` followed by sklearn's ``LinearDiscriminantAnalysis``)
+    and tunes it with a k-fold cross-validated grid search over the CSP number of components and the LDA shrinkage.
+    The folds and candidates are evaluated in parallel by a joblib process pool, and the best pipeline, refitted on the
+    whole training set, is adopted as the node processor. With a single value for each hyperparameter, it just
+    cross-validates that pipeline.
+
+    The input data must be epoched (channels X epochs X samples), with one label per epoch.
+
+    Attributes:
+        _MODULE_NAME (str): The name of the module(in this case ``node.processing.trainable.classifier.cspldasearch``)
+
+    configuration.json usage:
+        **module** (*str*): The name of the module (``node.processing.trainable.classifier``)\n
+        **type** (*str*): The name of the class (``CSPLDASearch``)\n
+        **number_of_components** (*List[int]*): CSP number of components candidates. This is a optional parameter, the default value is ``[2, 4, 6]``.\n
+        **shrinkage** (*List[float or str]*): LDA shrinkage candidates, between 0 and 1, or ``auto``. This is a optional parameter, the default value is ``[0.1, "auto"]``.\n
+        **folds** (*int*): Number of cross-validation folds. This is a optional parameter, the default value is 5.\n
+        **workers** (*int*): Number of worker processes, -1 meaning all cores. This is a optional parameter, the default value is -1.\n
+        **scoring** (*str*): sklearn scoring used to choose the best pipeline. This is a optional parameter, the default value is ``accuracy``.\n
+        **training_set_size** (*int*): The size of the training set in epochs.\n
+        **save_after_training** (*bool*): Whether to save the trained processor after training. This is a optional parameter.\n
+        **save_file_path** (*str*): The path to save the trained processor if ``save_after_training`` is True. Only mandatory if ``save_after_training`` is True.\n
+        **load_trained** (*bool*): Whether to load a trained processor.\n
+        **load_file_path** (*str*): The path to load the trained processor if ``load_trained`` is True. Only mandatory if ``load_trained`` is True.\n
+        **buffer_options** (*dict*): Buffer options.\n
+            **clear_input_buffer_after_training** (*bool*): Whether to clear the input buffer after training.\n
+            **process_input_buffer_after_training** (*bool*): Whether to process the input buffer after training.\n
+            **clear_output_buffer_on_data_input** (*bool*): Whether to clear the output buffer when new data is inserted in the input buffer.\n
+            **clear_input_buffer_after_process** (*bool*): Whether to clear the input buffer after processing.\n
+            **clear_output_buffer_after_process** (*bool*): Whether to clear the output buffer after processing.\n
+    """
+    _MODULE_NAME: Final[str] = 'node.processing.trainable.classifier.cspldasearch'
+
+    @abc.abstractmethod
+    def _validate_parameters(self, parameters: dict):
+        """ Validates the parameters passed to this node, setting the default values of the optional ones.
+
+        :param parameters: The parameters to validate.
+        :type parameters: dict
+
+        :raises InvalidParameterValue: the ``number_of_components`` parameter must be a list of ints greater than 0.
+        :raises InvalidParameterValue: the ``shrinkage`` parameter must be a list of numbers between 0 and 1 or ``auto``.
+        :raises InvalidParameterValue: the ``folds`` parameter must be an int greater than 1.
+        :raises InvalidParameterValue: the ``workers`` parameter must be an int different from 0.
+        :raises InvalidParameterValue: the ``scoring`` parameter must be a str.
+        """
+        super()._validate_parameters(parameters)
+        if 'number_of_components' not in parameters:
+            parameters['number_of_components'] = [2, 4, 6]
+        if 'shrinkage' not in parameters:
+            parameters['shrinkage'] = [0.1, 'auto']
+        if 'folds' not in parameters:
+            parameters['folds'] = 5
+        if 'workers' not in parameters:
+            parameters['workers'] = -1
+        if 'scoring' not in parameters:
+            parameters['scoring'] = 'accuracy'
+
+        if type(parameters['number_of_components']) is not list or len(parameters['number_of_components']) < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='number_of_components',
+                                        cause='must_be_non_empty_list')
+        for number_of_components in parameters['number_of_components']:
+            if type(number_of_components) is not int or number_of_components < 1:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter=f'number_of_components[{number_of_components}]',
+                                            cause='must_be_int_greater_than_0')
+        if type(parameters['shrinkage']) is not list or len(parameters['shrinkage']) < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='shrinkage',
+                                        cause='must_be_non_empty_list')
+        for shrinkage in parameters['shrinkage']:
+            if shrinkage == 'auto':
+                continue
+            if (type(shrinkage) is not float and type(shrinkage) is not int) or not 0 <= shrinkage <= 1:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter=f'shrinkage[{shrinkage}]',
+                                            cause='must_be_number_between_0_and_1_or_auto')
+        if type(parameters['folds']) is not int or parameters['folds'] < 2:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='folds',
+                                        cause='must_be_int_greater_than_1')
+        if type(parameters['workers']) is not int or parameters['workers'] == 0:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='workers',
+                                        cause='must_be_int_different_from_0')
+        if type(parameters['scoring']) is not str:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='scoring',
+                                        cause='must_be_str')
+
+    def _initialize_parameter_fields(self, parameters: dict):
+        """ Initializes the parameters of this node. In this case it initializes the search parameters and the parameters
+        from its superclass.
+
+        :param parameters: The parameters to initialize.
+        :type parameters: dict
+        """
+        self.number_of_components: List[int] = parameters['number_of_components']
+        self.shrinkage: List[Any] = parameters['shrinkage']
+        self.folds: int = parameters['folds']
+        self.workers: int = parameters['workers']
+        self.scoring: str = parameters['scoring']
+        super()._initialize_parameter_fields(parameters)
+
+    def _initialize_trainable_processor(self) -> (TransformerMixin, BaseEstimator):
+        """ Initializes the trainable processor. In this case it is a CSP + LDA pipeline using the first candidate of each
+        hyperparameter, which is replaced by the best pipeline found by the search after training.
+
+        :return: The initialized pipeline.
+        :rtype: (TransformerMixin, BaseEstimator)
+        """
+        return Pipeline([
+            ('csp', mne.decoding.CSP(n_components=self.number_of_components[0], reg='ledoit_wolf')),
+            ('lda', LinearDiscriminantAnalysis(solver='lsqr', shrinkage=self.shrinkage[0]))
+        ])
+
+    def _inner_train_processor(self, data: Any, label: Any):
+        """ Runs the cross-validated grid search on a joblib process pool with ``workers`` processes and adopts the best
+        pipeline, refitted on all training data.
+
+        :param data: The data to train the processor.
+        :type data: Any
+        :param label: The label to train the processor.
+        :type label: Any
+
+        :return: The trained processor.
+        :rtype: Any
+        """
+        search = GridSearchCV(
+            self.sklearn_processor,
+            param_grid={
+                'csp__n_components': self.number_of_components,
+                'lda__shrinkage': self.shrinkage
+            },
+            scoring=self.scoring,
+            cv=self.folds,
+            refit=True
+        )
+        with joblib.parallel_backend('loky', n_jobs=self.workers):
+            search.fit(data, label)
+        self.print(f'Best parameters {search.best_params_} with {self.scoring} {search.best_score_} '
+                   f'({self.folds}-fold cross-validation)')
+        self.sklearn_processor = search.best_estimator_
+        return self.sklearn_processor
+
+    @abc.abstractmethod
+    def _should_retrain(self) -> bool:
+        """ Checks if the processor should be retrained. In this case it always returns False, so the processor will
+        never be retrained.
+        """
+        return False
+
+    @abc.abstractmethod
+    def _is_next_node_call_enabled(self) -> bool:
+        """ Checks if the next node call is enabled. In this case it checks if the processor is trained.
+        """
+        return self._is_trained
+
+    def _format_processed_data(self, processed_data: Any, sampling_frequency: float) -> FrameworkData:
+        """ Formats the processed data. In this case it creates a ``FrameworkData`` object and adds the processed data
+        to it.
+
+        :param processed_data: The processed data.
+        :type processed_data: Any
+        :param sampling_frequency: The sampling frequency of the processed data.
+        :type sampling_frequency: float
+
+        :return: The formatted data.
+        :rtype: FrameworkData
+        """
+        formatted_data = FrameworkData(sampling_frequency_hz=sampling_frequency)
+        formatted_data.input_data_on_channel(processed_data)
+        return formatted_data
@@ -1,11 +1,14 @@
 import abc
-from typing import Final, Any
+from typing import Final, Any, Dict
+
+import numpy as np
 
 from sklearn.base import TransformerMixin, BaseEstimator
 from sklearn.discriminant_analysis import LinearDiscriminantAnalysis
 
 from models.framework_data import FrameworkData
 from models.node.processing.trainable.classifier.sklearn_classifier import SKLearnClassifier
+from models.utils.exported_model import KIND_LDA
 
 
 class LDA(SKLearnClassifier):
@@ -61,6 +64,19 @@ class LDA(SKLearnClassifier):
         """
         return LinearDiscriminantAnalysis(solver='lsqr', shrinkage=0.1)
 
+    def _get_exported_parameters(self) -> (str, Dict[str, np.ndarray]):
+        """ Returns the parameters needed to reproduce the ``LinearDiscriminantAnalysis`` predictions, which are the
+        decision function coefficients, its intercept and the class labels.
+
+        :return: The kind of the exported model and its parameters.
+        :rtype: (str, Dict[str, np.ndarray])
+        """
+        return KIND_LDA, {
+            'coefficients': self.sklearn_processor.coef_,
+            'intercept': self.sklearn_processor.intercept_,
+            'classes': self.sklearn_processor.classes_
+        }
+
     @abc.abstractmethod
     def _should_retrain(self) -> bool:
         """ Checks if the processor should be retrained. In this case it always returns False, so the processor will
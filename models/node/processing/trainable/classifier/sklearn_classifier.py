@@ -4,6 +4,8 @@ from typing import Final, Any, List, Dict
 import numpy as np
 from sklearn.base import TransformerMixin, BaseEstimator
 
+from models.exception.invalid_parameter_value import InvalidParameterValue
+from models.exception.non_compatible_data import NonCompatibleData
 from models.framework_data import FrameworkData
 from models.node.processing.trainable.sklearn_compatible_trainable_node import SKLearnCompatibleTrainableNode
 
@@ -14,6 +16,22 @@ class SKLearnClassifier(SKLearnCompatibleTrainableNode):
 
     Attributes:
         _MODULE_NAME (str): The name of the module(in this case ``node.processing.trainable.classifier``)
+
+    Every classifier can use dynamic stopping. In this mode, instead of emitting one decision per input window, the
+    log-probabilities of consecutive windows are summed, and a decision is emitted as soon as the resulting class
+    posterior reaches ``confidence_threshold``, or when ``maximum_evidence_windows`` windows were accumulated. The
+    ``probability`` output holds the posterior at each decision.
+
+    When ``trial_length`` is set, the input windows are grouped in trials of ``trial_length`` consecutive windows. The
+    evidence is reset at the start of each trial, each trial emits a single decision (forced at its last window if
+    neither condition was reached before), and the remaining windows of a trial after its decision are ignored.
+    Otherwise each trial lasts until its decision, so the evidence is reset after every decision.
+
+    configuration.json usage:
+        **dynamic_stopping** (*bool*): Whether to use dynamic stopping. This is a optional parameter, the default value is False.\n
+        **confidence_threshold** (*float*): Posterior probability, between 0 and 1, needed to emit a decision. This is a optional parameter, the default value is 0.9.\n
+        **maximum_evidence_windows** (*int*): Maximum number of windows accumulated before a decision is forced. This is a optional parameter, the default value is 10.\n
+        **trial_length** (*int*): Number of windows of each trial. This is a optional parameter, by default each trial lasts until its decision.\n
     """
     _MODULE_NAME: Final[str] = 'node.processing.trainable.classifier.sklearn_classifier'
 
@@ -22,10 +40,49 @@ class SKLearnClassifier(SKLearnCompatibleTrainableNode):
     @abc.abstractmethod
     def _initialize_parameter_fields(self, parameters: dict):
         super()._initialize_parameter_fields(parameters)
+        self._dynamic_stopping: bool = parameters['dynamic_stopping']
+        self._confidence_threshold: float = parameters['confidence_threshold']
+        self._maximum_evidence_windows: int = parameters['maximum_evidence_windows']
+        self._trial_length: int = parameters['trial_length']
+        self._start_trial()
 
     @abc.abstractmethod
     def _validate_parameters(self, parameters: dict):
         super()._validate_parameters(parameters)
+        if 'dynamic_stopping' not in parameters:
+            parameters['dynamic_stopping'] = False
+        if 'confidence_threshold' not in parameters:
+            parameters['confidence_threshold'] = 0.9
+        if 'maximum_evidence_windows' not in parameters:
+            parameters['maximum_evidence_windows'] = 10
+        if 'trial_length' not in parameters:
+            parameters['trial_length'] = None
+
+        if type(parameters['dynamic_stopping']) is not bool:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='dynamic_stopping',
+                                        cause='must_be_bool')
+        if type(parameters['confidence_threshold']) is not float and type(parameters['confidence_threshold']) is not int:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='confidence_threshold',
+                                        cause='must_be_number')
+        if not 0 < parameters['confidence_threshold'] <= 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='confidence_threshold',
+                                        cause='must_be_between_0_and_1')
+        if type(parameters['maximum_evidence_windows']) is not int:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='maximum_evidence_windows',
+                                        cause='must_be_int')
+        if parameters['maximum_evidence_windows'] < 1:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='maximum_evidence_windows',
+                                        cause='must_be_greater_than_0')
+        if parameters['trial_length'] is not None \
+                and (type(parameters['trial_length']) is not int or parameters['trial_length'] < 1):
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='trial_length',
+                                        cause='must_be_int_greater_than_0')
 
     @abc.abstractmethod
     def _initialize_trainable_processor(self) -> (TransformerMixin, BaseEstimator):
@@ -55,9 +112,12 @@ class SKLearnClassifier(SKLearnCompatibleTrainableNode):
         :rtype: defined by the developer in the ``_format_processed_data`` method.
         """
         raw_data: Any = self._format_raw_data(data[self.INPUT_DATA])
-        processed_data: Any = self._inner_process_data(raw_data)
-        class_probabilities: Any = np.transpose(self._get_probability(raw_data))
         sampling_frequency: float = data[self.INPUT_DATA].sampling_frequency
+        if self._dynamic_stopping:
+            processed_data, class_probabilities = self._accumulate_evidence(self._get_probability(raw_data))
+        else:
+            processed_data: Any = self._inner_process_data(raw_data)
+            class_probabilities: Any = np.transpose(self._get_probability(raw_data))
 
         formated_prediction = FrameworkData(sampling_frequency_hz=sampling_frequency)
         formated_prediction.input_data_on_channel(processed_data)
@@ -68,6 +128,54 @@ class SKLearnClassifier(SKLearnCompatibleTrainableNode):
             self.OUTPUT_PROBABILITY: formated_probability
         }
 
+    def _start_trial(self) -> None:
+        """ Resets the accumulated evidence, starting a new trial.
+        """
+        self._evidence = None
+        self._evidence_window_count: int = 0
+        self._trial_window_count: int = 0
+        self._trial_decided: bool = False
+
+    def _accumulate_evidence(self, probabilities: Any) -> (list, Any):
+        """ Sums the log-probabilities of each window of the current trial to the accumulated evidence, emitting the
+        trial decision when the class posterior reaches the confidence threshold, the maximum number of windows is
+        reached or the trial ends. The evidence is kept between calls, so a trial can span multiple input chunks.
+
+        :param probabilities: The class probabilities of each window, in windows X classes format.
+        :type probabilities: Any
+
+        :return: The decisions emitted and their class posteriors, in classes X decisions format.
+        :rtype: (list, Any)
+
+        :raises NonCompatibleData: The classifier doesn't provide class probabilities.
+        """
+        probabilities = np.asarray(probabilities, dtype=float)
+        if probabilities.ndim != 2 or probabilities.shape[1] == 0:
+            raise NonCompatibleData(module=self._MODULE_NAME, name=self.name,
+                                    cause='dynamic_stopping_requires_class_probabilities')
+        log_probabilities = np.log(np.clip(probabilities, np.finfo(float).tiny, 1))
+        classes = self.sklearn_processor.classes_
+        decisions = []
+        posteriors = []
+        for window_log_probability in log_probabilities:
+            self._trial_window_count += 1
+            if not self._trial_decided:
+                if self._evidence is None:
+                    self._evidence = np.zeros(window_log_probability.shape[0])
+                self._evidence += window_log_probability
+                self._evidence_window_count += 1
+                posterior = np.exp(self._evidence - np.max(self._evidence))
+                posterior /= np.sum(posterior)
+                if np.max(posterior) >= self._confidence_threshold \
+                        or self._evidence_window_count >= self._maximum_evidence_windows \
+                        or self._trial_window_count == self._trial_length:
+                    decisions.append(classes[np.argmax(posterior)])
+                    posteriors.append(posterior)
+                    self._trial_decided = True
+            if self._trial_window_count == self._trial_length or (self._trial_length is None and self._trial_decided):
+                self._start_trial()
+        return decisions, np.transpose(np.asarray(posteriors).reshape(len(posteriors), log_probabilities.shape[1]))
+
     def _inner_process_data(self, data: Any) -> Any:
         return self.sklearn_processor.predict(data)
 
@@ -1,5 +1,5 @@
 import abc
-from typing import Final, Any
+from typing import Final, Any, Dict
 
 import mne.decoding
 import numpy as np
@@ -9,6 +9,7 @@ from models.exception.invalid_parameter_value import InvalidParameterValue
 from models.exception.missing_parameter import MissingParameterError
 from models.framework_data import FrameworkData
 from models.node.processing.trainable.feature_extractor.sklearn_feature_extractor import SKLearnFeatureExtractor
+from models.utils.exported_model import KIND_CSP
 
 
 class CSP(SKLearnFeatureExtractor):
@@ -77,6 +78,16 @@ class CSP(SKLearnFeatureExtractor):
         """
         return mne.decoding.CSP(n_components=self.number_of_components, reg="ledoit_wolf")
 
+    def _get_exported_parameters(self) -> (str, Dict[str, np.ndarray]):
+        """ Returns the spatial filters used by ``_inner_process_data``.
+
+        :return: The kind of the exported model and its parameters.
+        :rtype: (str, Dict[str, np.ndarray])
+        """
+        return KIND_CSP, {
+            'filters': self.sklearn_processor.filters_[0:self.number_of_components]
+        }
+
     @abc.abstractmethod
     def _should_retrain(self) -> bool:
         """ Returns whether the processor should be retrained. In this case it returns False always.
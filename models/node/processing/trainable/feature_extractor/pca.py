@@ -1,5 +1,5 @@
 import abc
-from typing import Final, Any
+from typing import Final, Any, Dict
 
 import numpy as np
 from sklearn import decomposition
@@ -9,6 +9,7 @@ from models.exception.invalid_parameter_value import InvalidParameterValue
 from models.exception.missing_parameter import MissingParameterError
 from models.framework_data import FrameworkData
 from models.node.processing.trainable.feature_extractor.sklearn_feature_extractor import SKLearnFeatureExtractor
+from models.utils.exported_model import KIND_PCA
 
 
 class PCA(SKLearnFeatureExtractor):
@@ -77,6 +78,17 @@ class PCA(SKLearnFeatureExtractor):
         """
         return decomposition.PCA(n_components=self.number_of_components)
 
+    def _get_exported_parameters(self) -> (str, Dict[str, np.ndarray]):
+        """ Returns the principal axes and the per-feature mean used by the ``PCA`` transform.
+
+        :return: The kind of the exported model and its parameters.
+        :rtype: (str, Dict[str, np.ndarray])
+        """
+        return KIND_PCA, {
+            'components': self.sklearn_processor.components_,
+            'mean': self.sklearn_processor.mean_
+        }
+
     @abc.abstractmethod
     def _should_retrain(self) -> bool:
         """ Returns whether the processor should be retrained. In this case it returns False always.
@@ -6,6 +6,7 @@ import numpy as np
 from sklearn.base import TransformerMixin, BaseEstimator
 
 from models.framework_data import FrameworkData
+from models.utils.exported_model import save_exported_model
 from models.node.processing.trainable.trainable_processing_node import TrainableProcessingNode
 
 
@@ -80,6 +81,33 @@ class SKLearnCompatibleTrainableNode(TrainableProcessingNode):
         """
         joblib.dump(self.sklearn_processor, save_path)
 
+    def _export_trained_processor(self, export_path: str) -> None:
+        """ Exports the inference parameters returned by ``_get_exported_parameters`` to a ``.npz`` file, so that the
+        trained model can be used by the ``NumpyInference`` node without importing sklearn.
+
+        :param export_path: The path to export the trained processor.
+        :type export_path: str
+        """
+        kind, arrays = self._get_exported_parameters()
+        save_exported_model(export_path, kind, arrays)
+
+    def _get_exported_parameters(self) -> (str, Dict[str, np.ndarray]):
+        """ Returns the kind of the exported model and the matrices and bias vectors needed for inference. This method
+        should be implemented by the subclasses that support exporting.
+
+        :raises NotImplementedError: If the method is not implemented by the subclass.
+        """
+        raise NotImplementedError()
+
+    def _is_export_supported(self) -> bool:
+        """ Returns whether the node supports exporting the trained processor, that is, whether it implements
+        ``_get_exported_parameters``.
+
+        :return: Whether the node supports exporting.
+        :rtype: bool
+        """
+        return type(self)._get_exported_parameters is not SKLearnCompatibleTrainableNode._get_exported_parameters
+
     @classmethod
     def from_config_json(cls, parameters: dict):
         """ Creates a new instance of this node using the parameters specified in the configuration.json file.
@@ -117,16 +145,19 @@ class SKLearnCompatibleTrainableNode(TrainableProcessingNode):
             self.OUTPUT_MAIN: self._format_processed_data(processed_data, data[self.INPUT_DATA].sampling_frequency)
         }
 
-    def _format_raw_data(self, raw_data: FrameworkData) -> Any:
+    def _format_raw_data(self, raw_data: Any) -> Any:
         """ Formats the raw data. This method is used to format the raw data in a way that is compatible with the sklearn processors.
-        It first converts the raw data to a numpy 2d array and then moves the axis to the first position.
+        It first converts the raw data to a numpy 2d array and then moves the axis to the first position. Arrays coming from the
+        training buffer are already in this format, so they are returned as they are.
 
         :param raw_data: The raw data to format.
-        :type raw_data: FrameworkData
+        :type raw_data: FrameworkData or ndarray
 
         :return: The formatted data.
         :rtype: ndarray
         """
+        if isinstance(raw_data, np.ndarray):
+            return raw_data
         formatted_data = np.asarray(raw_data.get_data_as_2d_array())
         formatted_data = np.moveaxis(formatted_data, 1, 0)
         # if len(formatted_data.shape) > 2:
@@ -194,7 +225,7 @@ class SKLearnCompatibleTrainableNode(TrainableProcessingNode):
         """
         return self.sklearn_processor.fit(data, label)
 
-    def _train(self, data: FrameworkData, label: FrameworkData):
+    def _train(self, data: Any, label: FrameworkData):
         """ This method is used to train the processor. This is method just get the raw data and label, formats them 
         and then calls the ``_inner_train_processor`` method that will train the processor. This is done for each set 
         size specified in the ``training_set_size`` parameter.
@@ -3,11 +3,14 @@ import os
 from typing import Final, List, Any
 
 import joblib
+import numpy as np
 
 from models.exception.invalid_parameter_value import InvalidParameterValue
 from models.exception.missing_parameter import MissingParameterError
 from models.framework_data import FrameworkData
 from models.node.processing.processing_node import ProcessingNode
+from models.utils.spilling_buffer import SpillingBuffer
+from models.utils.training_cache import TrainingCache
 
 
 class TrainableProcessingNode(ProcessingNode):
@@ -29,6 +32,12 @@ class TrainableProcessingNode(ProcessingNode):
         **save_file_path** (*str*): The path to save the trained processor if ``save_after_training`` is True. Only mandatory if ``save_after_training`` is True.\n
         **load_trained** (*bool*): Whether to load a trained processor.\n
         **load_file_path** (*str*): The path to load the trained processor if ``load_trained`` is True. Only mandatory if ``load_trained`` is True.\n
+        **export_after_training** (*bool*): Whether to export the trained processor to a compact ``.npz`` file after training, so that it can be used by the ``NumpyInference`` node. This is a optional parameter.\n
+        **export_file_path** (*str*): The path of the ``.npz`` file if ``export_after_training`` is True. Only mandatory if ``export_after_training`` is True.\n
+        **training_buffer_ram_budget_mb** (*float*): Size in megabytes of the training data kept in memory. Past this size, the training data is stored in a memory-mapped file and ``_train`` receives a memory-mapped array. This is a optional parameter, if it's not set all training data is kept in the input buffer.\n
+        **training_buffer_spill_directory** (*str*): Directory of the memory-mapped training data file. This is a optional parameter, the system temporary directory is used by default.\n
+        **training_cache_directory** (*str*): Directory where trained processors are cached, keyed by a fingerprint of the training data, labels and node parameters. When the same training happens again, the cached processor is loaded instead of training. This is a optional parameter, if it's not set the cache is disabled.\n
+        **training_cache_max_size_mb** (*float*): Maximum size in megabytes of the training cache, the least recently used processors are removed past it. This is a optional parameter, the default value is 1024.\n
         **buffer_options** (*dict*): Buffer options.\n
             **clear_input_buffer_after_training** (*bool*): Whether to clear the input buffer after training.\n
             **process_input_buffer_after_training** (*bool*): Whether to process the input buffer after training.\n
@@ -64,6 +73,17 @@ class TrainableProcessingNode(ProcessingNode):
         :raises MissingParameterError: the ``load_file_path`` parameter is required.
         :raises InvalidParameterValue: the ``load_file_path`` parameter must be a str.
         :raises InvalidParameterValue: the ``load_file_path`` parameter must be a valid path.
+        :raises InvalidParameterValue: the ``export_after_training`` parameter must be a bool.
+        :raises InvalidParameterValue: the ``export_after_training`` parameter can't be True if the node doesn't support exporting.
+        :raises MissingParameterError: the ``export_file_path`` parameter is required.
+        :raises InvalidParameterValue: the ``export_file_path`` parameter must be a str.
+        :raises InvalidParameterValue: the ``export_file_path`` parameter must be a npz file path.
+        :raises InvalidParameterValue: the ``training_buffer_ram_budget_mb`` parameter must be a number.
+        :raises InvalidParameterValue: the ``training_buffer_ram_budget_mb`` parameter must not be negative.
+        :raises InvalidParameterValue: the ``training_buffer_spill_directory`` parameter must be a str.
+        :raises InvalidParameterValue: the ``training_cache_directory`` parameter must be a str.
+        :raises InvalidParameterValue: the ``training_cache_max_size_mb`` parameter must be a number.
+        :raises InvalidParameterValue: the ``training_cache_max_size_mb`` parameter must be greater than 0.
         :raises MissingParameterError: the ``clear_input_buffer_after_training`` parameter is required.
         :raises InvalidParameterValue: the ``clear_input_buffer_after_training`` parameter must be a bool.
         :raises MissingParameterError: the ``process_input_buffer_after_training`` parameter is required.
@@ -133,6 +153,60 @@ class TrainableProcessingNode(ProcessingNode):
                 raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
                                             parameter='load_file_path',
                                             cause='file_doesnt_exist')
+        if 'export_after_training' not in parameters:
+            parameters['export_after_training'] = False
+
+        if type(parameters['export_after_training']) is not bool:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='export_after_training',
+                                        cause='must_be_bool')
+        if parameters['export_after_training'] is True:
+            if not self._is_export_supported():
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='export_after_training',
+                                            cause='not_supported_by_node')
+            if 'export_file_path' not in parameters:
+                raise MissingParameterError(module=self._MODULE_NAME, name=self.name,
+                                            parameter='export_file_path')
+            if type(parameters['export_file_path']) is not str:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='export_file_path',
+                                            cause='must_be_str')
+            if os.path.splitext(parameters['export_file_path'])[1] != '.npz':
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='export_file_path',
+                                            cause='must_be_npz_file')
+        if 'training_buffer_ram_budget_mb' in parameters:
+            if type(parameters['training_buffer_ram_budget_mb']) is not float \
+                    and type(parameters['training_buffer_ram_budget_mb']) is not int:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='training_buffer_ram_budget_mb',
+                                            cause='must_be_number')
+            if parameters['training_buffer_ram_budget_mb'] < 0:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='training_buffer_ram_budget_mb',
+                                            cause='must_not_be_negative')
+        if 'training_buffer_spill_directory' in parameters \
+                and type(parameters['training_buffer_spill_directory']) is not str:
+            raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                        parameter='training_buffer_spill_directory',
+                                        cause='must_be_str')
+        if 'training_cache_directory' in parameters:
+            if type(parameters['training_cache_directory']) is not str:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='training_cache_directory',
+                                            cause='must_be_str')
+            if 'training_cache_max_size_mb' not in parameters:
+                parameters['training_cache_max_size_mb'] = 1024
+            if type(parameters['training_cache_max_size_mb']) is not float \
+                    and type(parameters['training_cache_max_size_mb']) is not int:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='training_cache_max_size_mb',
+                                            cause='must_be_number')
+            if parameters['training_cache_max_size_mb'] <= 0:
+                raise InvalidParameterValue(module=self._MODULE_NAME, name=self.name,
+                                            parameter='training_cache_max_size_mb',
+                                            cause='must_be_greater_than_0')
 
     @abc.abstractmethod
     def _initialize_parameter_fields(self, parameters: dict):
@@ -150,6 +224,24 @@ class TrainableProcessingNode(ProcessingNode):
             else parameters['buffer_options']['process_input_buffer_after_training']
         self.training_set_size: int = parameters['training_set_size']
 
+        self._training_buffer: SpillingBuffer = None
+        if 'training_buffer_ram_budget_mb' in parameters:
+            self._training_buffer = SpillingBuffer(
+                int(parameters['training_buffer_ram_budget_mb'] * 1024 * 1024),
+                parameters['training_buffer_spill_directory']
+                if 'training_buffer_spill_directory' in parameters
+                else None
+            )
+            self._training_buffer_channels: List[str] = []
+            self._training_buffer_sampling_frequency: float = None
+
+        self._training_cache: TrainingCache = None
+        if 'training_cache_directory' in parameters:
+            self._training_cache = TrainingCache(
+                parameters['training_cache_directory'],
+                int(parameters['training_cache_max_size_mb'] * 1024 * 1024)
+            )
+
         self._is_trained: bool = False
 
         if parameters['load_trained']:
@@ -162,6 +254,10 @@ class TrainableProcessingNode(ProcessingNode):
         if self._save_after_training:
             self._save_file_path = parameters['save_file_path']
 
+        self._export_after_training = parameters['export_after_training']
+        if self._export_after_training:
+            self._export_file_path = parameters['export_file_path']
+
     @abc.abstractmethod
     def _load_trained_processor(self, loaded_processor: Any) -> None:
         """ Loads a trained processor. This method must be implemented by the subclasses.
@@ -184,6 +280,109 @@ class TrainableProcessingNode(ProcessingNode):
         """
         raise NotImplementedError()
 
+    def _export_trained_processor(self, export_path: str) -> None:
+        """ Exports the trained processor to a compact ``.npz`` file that can be loaded without the library used for
+        training. Only nodes whose inference is a linear operation support it, so this method must be overridden by them.
+
+        :param export_path: The path to export the trained processor.
+        :type export_path: str
+
+        :raises NotImplementedError: The node doesn't support exporting.
+        """
+        raise NotImplementedError()
+
+    def _is_export_supported(self) -> bool:
+        """ Returns whether the node supports exporting the trained processor, that is, whether it overrides
+        ``_export_trained_processor``.
+
+        :return: Whether the node supports exporting.
+        :rtype: bool
+        """
+        return type(self)._export_trained_processor is not TrainableProcessingNode._export_trained_processor
+
+    def _insert_new_input_data(self, data: FrameworkData, input_name: str):
+        """ Appends new data to the end of the input buffer. While the processor isn't trained, if the
+        ``training_buffer_ram_budget_mb`` parameter is set, the training data is appended to the spilling training
+        buffer instead, in samples (or epochs) X channels format.
+
+        :param data: Data to be added.
+        :type data: FrameworkData
+        :param input_name: Node input name.
+        :type input_name: str
+        """
+        if self._training_buffer is None or self._is_trained or input_name != self.INPUT_DATA or not data.has_data():
+            super()._insert_new_input_data(data, input_name)
+            return
+        self._training_buffer_channels = data.channels
+        self._training_buffer_sampling_frequency = data.sampling_frequency
+        self._training_buffer.append(np.moveaxis(np.asarray(data.get_data_as_2d_array()), 1, 0))
+
+    def _get_training_data(self) -> Any:
+        """ Returns the data that will be passed to ``_train``. If the ``training_buffer_ram_budget_mb`` parameter is
+        set, it is the training buffer array (memory-mapped if it was spilled to disk), otherwise it is the data input
+        buffer.
+
+        :return: The training data.
+        :rtype: Any
+        """
+        if self._training_buffer is None:
+            return self._input_buffer[self.INPUT_DATA]
+        return self._training_buffer.get_array()
+
+    def _get_training_data_count(self) -> int:
+        """ Returns the number of samples (or epochs) available for training.
+
+        :return: The number of samples available for training.
+        :rtype: int
+        """
+        if self._training_buffer is None:
+            return self._input_buffer[self.INPUT_DATA].get_data_count()
+        return self._training_buffer.count
+
+    def _get_fingerprint_parameters(self) -> dict:
+        """ Returns the node parameters that change the training result, used in the training cache fingerprint. All
+        parameters are used, except the ones related to buffers, files and outputs.
+
+        :return: The parameters used in the training fingerprint.
+        :rtype: dict
+        """
+        ignored_parameters = ['name', 'outputs', 'buffer_options', 'enable_log']
+        ignored_prefixes = ('save_', 'load_', 'export_', 'training_buffer_', 'training_cache_')
+        return {key: value for key, value in self.parameters.items()
+                if key not in ignored_parameters and not key.startswith(ignored_prefixes)}
+
+    def _train_or_load_cached(self) -> None:
+        """ Trains the processor. If the training cache is enabled and a processor was already trained with the same
+        data, labels and parameters, the cached processor is loaded instead, otherwise the trained processor is cached.
+        """
+        training_data = self._get_training_data()
+        training_label = self._input_buffer[self.INPUT_LABEL]
+        if self._training_cache is None:
+            self._train(training_data, training_label)
+            return
+        fingerprint = self._training_cache.fingerprint(training_data, training_label,
+                                                       self._get_fingerprint_parameters())
+        cached_file_path = self._training_cache.get(fingerprint)
+        if cached_file_path is not None:
+            self.print(f'Loading cached trained processor from {cached_file_path}')
+            self._load_trained_processor(joblib.load(cached_file_path))
+            return
+        self._train(training_data, training_label)
+        self._training_cache.put(fingerprint, self._save_trained_processor)
+
+    def _release_training_buffer(self) -> None:
+        """ Empties the spilling training buffer. If the input buffer isn't cleared after training, the training data is
+        moved back to the data input buffer, so that it is handled the same way as when there's no training buffer.
+        """
+        if self._training_buffer is None:
+            return
+        if not self._clear_input_buffer_after_training and self._training_buffer.count > 0:
+            training_data = np.moveaxis(self._training_buffer.get_array(), 0, 1)
+            restored_data = FrameworkData(self._training_buffer_sampling_frequency, self._training_buffer_channels)
+            restored_data.input_2d_data(training_data.tolist())
+            self._input_buffer[self.INPUT_DATA].extend(restored_data)
+        self._training_buffer.clear()
+
     def _process_input_buffer(self):
         """ TrainableProcessingNode node implementation of the processing logic. This method is called when the
         processing condition is satisfied. In this case, the processing condition is satisfied when the input buffer
@@ -204,9 +403,10 @@ class TrainableProcessingNode(ProcessingNode):
         if not self._is_training_condition_satisfied():
             return
         self.print(f'Starting training of {self._MODULE_NAME}')
-        self._train(self._input_buffer[self.INPUT_DATA], self._input_buffer[self.INPUT_LABEL])
+        self._train_or_load_cached()
         self.print(f'Finished training of {self._MODULE_NAME}')
         self._is_trained = True
+        self._release_training_buffer()
         trained_signal = FrameworkData()
         trained_signal.input_data_on_channel([True])
         self._insert_new_output_data(trained_signal, self.OUTPUT_TRAINING_FINISHED)
@@ -218,6 +418,10 @@ class TrainableProcessingNode(ProcessingNode):
                 os.makedirs('\\'.join(save_path.split('\\')[0:-1]))
             self._save_trained_processor(save_path)
 
+        if self._export_after_training:
+            self.print(f'Exporting trained {self._MODULE_NAME}')
+            self._export_trained_processor(self._export_file_path)
+
         if self._clear_input_buffer_after_training:
             super()._clear_input_buffer()
             return
@@ -227,11 +431,11 @@ class TrainableProcessingNode(ProcessingNode):
             return
 
     @abc.abstractmethod
-    def _train(self, data: FrameworkData, label: FrameworkData):
+    def _train(self, data: Any, label: FrameworkData):
         """ Trains the processor. This method must be implemented by the subclasses.
 
-        :param data: The data to train the processor.
-        :type data: FrameworkData
+        :param data: The data to train the processor. It is a ``FrameworkData`` object, or a samples X channels array if the ``training_buffer_ram_budget_mb`` parameter is set.
+        :type data: Any
         :param label: The label to train the processor.
         :type label: FrameworkData
 
@@ -246,9 +450,9 @@ class TrainableProcessingNode(ProcessingNode):
         :return: Whether the training condition is satisfied.
         :rtype: bool
         """
-        return self._input_buffer[self.INPUT_DATA].get_data_count() >= self.training_set_size \
+        return self._get_training_data_count() >= self.training_set_size \
                and self._input_buffer[self.INPUT_LABEL].get_data_count() >= self.training_set_size \
-               and self._input_buffer[self.INPUT_DATA].get_data_count() == self._input_buffer[self.INPUT_LABEL].get_data_count()
+               and self._get_training_data_count() == self._input_buffer[self.INPUT_LABEL].get_data_count()
 
     def _is_processing_condition_satisfied(self) -> bool:
         """ Returns whether the processing condition is satisfied. In this case it returns True if the input buffer
@@ -259,6 +463,13 @@ class TrainableProcessingNode(ProcessingNode):
         """
         return self._input_buffer[self.INPUT_DATA].get_data_count() > 0
 
+    def dispose(self) -> None:
+        """ Clears the node buffers, deleting the training buffer memory-mapped file if it exists.
+        """
+        super().dispose()
+        if self._training_buffer is not None:
+            self._training_buffer.clear()
+
     @abc.abstractmethod
     def _should_retrain(self) -> bool:
         """ Returns whether the processor should be retrained. This method must be implemented by the subclasses.
@@ -0,0 +1,249 @@
+import json
+import struct
+from typing import Final, List, Iterator, Tuple, Optional
+
+import numpy as np
+
+from models.exception.non_compatible_data import NonCompatibleData
+
+_MODULE_NAME: Final[str] = 'utils.binary_recording'
+
+FILE_MAGIC: Final[bytes] = b'OBCIBIN\x00'
+BLOCK_MAGIC: Final[bytes] = b'BLK0'
+INDEX_MAGIC: Final[bytes] = b'IDX0'
+TRAILER_MAGIC: Final[bytes] = b'OBCIEND\x00'
+FORMAT_VERSION: Final[int] = 1
+
+# File header: magic, JSON header length, format version, followed by the JSON header padded to 8 bytes
+_FILE_HEADER: Final[struct.Struct] = struct.Struct('<8sII')
+# Block header: magic, sample count, first timestamp, followed by the channel-major samples and the timestamps
+_BLOCK_HEADER: Final[struct.Struct] = struct.Struct('<4sId')
+# Index header: magic, block count, followed by one _INDEX_ENTRY_DTYPE entry per block
+_INDEX_HEADER: Final[struct.Struct] = struct.Struct('<4sI')
+# Trailer: index offset, magic
+_TRAILER: Final[struct.Struct] = struct.Struct('<Q8s')
+
+_INDEX_ENTRY_DTYPE: Final[np.dtype] = np.dtype([
+    ('offset', '<u8'),
+    ('first_sample', '<u8'),
+    ('sample_count', '<u8'),
+    ('first_timestamp', '<f8')
+])
+_TIMESTAMP_DTYPE: Final[np.dtype] = np.dtype('<f8')
+_ALIGNMENT: Final[int] = 8
+
+
+def _get_padding(size: int) -> int:
+    return -size % _ALIGNMENT
+
+
+class BinaryRecordingWriter:
+    """This class writes an append-only binary recording: a header with the channels, the sampling frequency and the
+    samples dtype, followed by blocks of samples, each one with its timestamps. Each block is written with a single
+    conversion of the samples to the recording dtype, so writing costs little more than copying the samples.
+
+    When closed, a sparse timestamp index, with the first timestamp and sample of each block, is appended to the file.
+    If the writer isn't closed, the index is rebuilt by the reader from the blocks headers.
+
+    :param file_path: Path to the recording file. It is overwritten if it exists.
+    :type file_path: str
+    :param channels: Channel names.
+    :type channels: List[str]
+    :param sampling_frequency: Sampling frequency of the samples.
+    :type sampling_frequency: float
+    :param dtype: NumPy dtype of the samples.
+    :type dtype: str
+    """
+
+    def __init__(self, file_path: str, channels: List[str], sampling_frequency: float, dtype: str = 'float32') -> None:
+        self.file_path = file_path
+        self.channels = list(channels)
+        self.sampling_frequency = sampling_frequency
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self._file = open(file_path, 'wb')
+        self._index: List[Tuple[int, int, int, float]] = []
+        self.sample_count = 0
+        header = json.dumps({
+            'version': FORMAT_VERSION,
+            'channels': self.channels,
+            'sampling_frequency': sampling_frequency,
+            'dtype': self.dtype.str
+        }).encode('utf-8')
+        header += b' ' * _get_padding(_FILE_HEADER.size + len(header))
+        self._file.write(_FILE_HEADER.pack(FILE_MAGIC, len(header), FORMAT_VERSION))
+        self._file.write(header)
+        self._offset = _FILE_HEADER.size + len(header)
+
+    def write_block(self, samples: np.ndarray, timestamps: np.ndarray) -> None:
+        """Appends a block of samples to the recording.
+
+        :param samples: The samples, with one row per channel.
+        :type samples: np.ndarray
+        :param timestamps: The timestamp of each sample.
+        :type timestamps: np.ndarray
+        """
+        sample_count = samples.shape[1]
+        if sample_count == 0:
+            return
+        if samples.shape[0] != len(self.channels) or timestamps.shape[0] != sample_count:
+            raise NonCompatibleData(module=_MODULE_NAME, name='binary_recording_writer',
+                                    cause='block_shape_doesnt_match_channels_or_timestamps')
+        samples = np.ascontiguousarray(samples, dtype=self.dtype)
+        timestamps = np.ascontiguousarray(timestamps, dtype=_TIMESTAMP_DTYPE)
+        block_size = _BLOCK_HEADER.size + samples.nbytes + timestamps.nbytes
+        self._file.write(_BLOCK_HEADER.pack(BLOCK_MAGIC, sample_count, timestamps[0]))
+        self._file.write(samples.data)
+        self._file.write(timestamps.data)
+        self._file.write(b'\x00' * _get_padding(block_size))
+        self._index.append((self._offset, self.sample_count, sample_count, float(timestamps[0])))
+        self._offset += block_size + _get_padding(block_size)
+        self.sample_count += sample_count
+
+    def flush(self) -> None:
+        """Flushes the written blocks to the operating system.
+        """
+        self._file.flush()
+
+    def close(self) -> None:
+        """Appends the timestamp index and closes the file.
+        """
+        if self._file.closed:
+            return
+        index = np.array(self._index, dtype=_INDEX_ENTRY_DTYPE)
+        self._file.write(_INDEX_HEADER.pack(INDEX_MAGIC, index.shape[0]))
+        self._file.write(index.data)
+        self._file.write(_TRAILER.pack(self._offset, TRAILER_MAGIC))
+        self._file.close()
+
+
+class BinaryRecordingReader:
+    """This class reads a binary recording written by ``BinaryRecordingWriter``. The file is memory mapped, and the
+    samples are returned as read only views of the file, without copying them.
+
+    Time range seeks use the sparse timestamp index, and then the timestamps of a single block, so the timestamps must
+    not decrease along the recording.
+
+    :param file_path: Path to the recording file.
+    :type file_path: str
+
+    :raises NonCompatibleData: The file isn't a binary recording.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        self._memory_map = np.memmap(file_path, dtype=np.uint8, mode='r')
+        if self._memory_map.shape[0] < _FILE_HEADER.size:
+            raise NonCompatibleData(module=_MODULE_NAME, name='binary_recording_reader', cause='not_a_binary_recording')
+        magic, header_length, version = _FILE_HEADER.unpack_from(self._memory_map, 0)
+        if magic != FILE_MAGIC or version > FORMAT_VERSION:
+            raise NonCompatibleData(module=_MODULE_NAME, name='binary_recording_reader', cause='not_a_binary_recording')
+        header = json.loads(bytes(self._memory_map[_FILE_HEADER.size:_FILE_HEADER.size + header_length]))
+        self.channels: List[str] = header['channels']
+        self.sampling_frequency: float = header['sampling_frequency']
+        self.dtype = np.dtype(header['dtype'])
+        self._data_offset = _FILE_HEADER.size + header_length
+        index = self._read_index()
+        self._index = index if index is not None else self._rebuild_index()
+        self.sample_count = int(self._index['first_sample'][-1] + self._index['sample_count'][-1]) \
+            if self._index.shape[0] > 0 \
+            else 0
+
+    def _read_index(self) -> Optional[np.ndarray]:
+        """Reads the index appended when the recording was closed.
+
+        :return: The index, or ``None`` if the recording wasn't closed.
+        :rtype: Optional[np.ndarray]
+        """
+        file_size = self._memory_map.shape[0]
+        if file_size < self._data_offset + _INDEX_HEADER.size + _TRAILER.size:
+            return None
+        index_offset, magic = _TRAILER.unpack_from(self._memory_map, file_size - _TRAILER.size)
+        if magic != TRAILER_MAGIC or index_offset + _INDEX_HEADER.size > file_size - _TRAILER.size:
+            return None
+        magic, block_count = _INDEX_HEADER.unpack_from(self._memory_map, index_offset)
+        if magic != INDEX_MAGIC:
+            return None
+        return np.ndarray((block_count,), dtype=_INDEX_ENTRY_DTYPE, buffer=self._memory_map,
+                          offset=index_offset + _INDEX_HEADER.size)
+
+    def _rebuild_index(self) -> np.ndarray:
+        """Rebuilds the index from the blocks headers, ignoring a last block that wasn't completely written.
+        """
+        file_size = self._memory_map.shape[0]
+        sample_size = len(self.channels) * self.dtype.itemsize + _TIMESTAMP_DTYPE.itemsize
+        entries: List[Tuple[int, int, int, float]] = []
+        offset = self._data_offset
+        first_sample = 0
+        while offset + _BLOCK_HEADER.size <= file_size:
+            magic, sample_count, first_timestamp = _BLOCK_HEADER.unpack_from(self._memory_map, offset)
+            block_size = _BLOCK_HEADER.size + sample_count * sample_size
+            if magic != BLOCK_MAGIC or offset + block_size > file_size:
+                break
+            entries.append((offset, first_sample, sample_count, first_timestamp))
+            offset += block_size + _get_padding(block_size)
+            first_sample += sample_count
+        return np.array(entries, dtype=_INDEX_ENTRY_DTYPE)
+
+    @property
+    def block_count(self) -> int:
+        return self._index.shape[0]
+
+    def get_block(self, block_index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Returns a block of the recording.
+
+        :return: A view of the block samples, with one row per channel, and a view of the block timestamps.
+        :rtype: Tuple[np.ndarray, np.ndarray]
+        """
+        offset, _, sample_count, _ = self._index[block_index]
+        samples_offset = int(offset) + _BLOCK_HEADER.size
+        samples = np.ndarray((len(self.channels), int(sample_count)), dtype=self.dtype, buffer=self._memory_map,
+                             offset=samples_offset)
+        timestamps = np.ndarray((int(sample_count),), dtype=_TIMESTAMP_DTYPE, buffer=self._memory_map,
+                                offset=samples_offset + samples.nbytes)
+        return samples, timestamps
+
+    def find_sample(self, timestamp: float) -> int:
+        """Returns the index of the first sample whose timestamp is greater than or equal to ``timestamp``.
+        """
+        block_index = int(np.searchsorted(self._index['first_timestamp'], timestamp, side='right')) - 1
+        if block_index < 0:
+            return 0
+        _, timestamps = self.get_block(block_index)
+        return int(self._index['first_sample'][block_index]) + int(np.searchsorted(timestamps, timestamp, side='left'))
+
+    def iterate(self, start_sample: int = 0, end_sample: int = None, chunk_size: int = None) \
+            -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """Iterates over a range of samples, in chunks that don't cross blocks.
+
+        :param start_sample: Index of the first sample.
+        :type start_sample: int
+        :param end_sample: Index after the last sample. If ``None``, the range ends with the recording.
+        :type end_sample: int
+        :param chunk_size: Maximum number of samples of each chunk. If ``None``, each block is a chunk.
+        :type chunk_size: int
+
+        :return: An iterator over the chunks, each one a view of the samples, with one row per channel, and a view of
+            the timestamps.
+        :rtype: Iterator[Tuple[np.ndarray, np.ndarray]]
+        """
+        end_sample = self.sample_count if end_sample is None else min(end_sample, self.sample_count)
+        if start_sample >= end_sample:
+            return
+        first_block = int(np.searchsorted(self._index['first_sample'], start_sample, side='right')) - 1
+        for block_index in range(first_block, self.block_count):
+            block_first_sample = int(self._index['first_sample'][block_index])
+            if block_first_sample >= end_sample:
+                return
+            samples, timestamps = self.get_block(block_index)
+            block_start = max(start_sample - block_first_sample, 0)
+            block_end = min(end_sample - block_first_sample, samples.shape[1])
+            step = chunk_size if chunk_size is not None else block_end - block_start
+            for chunk_start in range(block_start, block_end, step):
+                chunk_end = min(chunk_start + step, block_end)
+                yield samples[:, chunk_start:chunk_end], timestamps[chunk_start:chunk_end]
+
+    def close(self) -> None:
+        """Releases the memory map. Views returned before closing keep the file mapped until they are released.
+        """
+        self._index = self._index.copy()
+        self._memory_map = None
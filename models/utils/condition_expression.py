@@ -0,0 +1,373 @@
+import ast
+import functools
+import math
+import operator
+import statistics
+from typing import Final, Any, Callable, Dict, List
+
+import numpy as np
+
+from models.exception.non_compatible_data import NonCompatibleData
+from models.framework_data import FrameworkData
+
+_MODULE_NAME: Final[str] = 'utils.condition_expression'
+
+
+class _UnsupportedExpression(SyntaxError):
+    """Raised while compiling an expression that uses something outside of the vectorized subset."""
+
+
+class _EvaluationContext:
+    """Holds the data of a single evaluation, converting each channel to an array only once and only if it's used.
+
+    :param data: The data the condition is evaluated on.
+    :type data: FrameworkData
+    """
+
+    def __init__(self, data: FrameworkData) -> None:
+        self.data = data
+        self._channels: Dict[str, np.ndarray] = {}
+
+    def channel(self, channel: str) -> np.ndarray:
+        if channel not in self._channels:
+            if channel not in self.data.get_channels_as_set():
+                raise NonCompatibleData(module=_MODULE_NAME, name='condition_expression',
+                                        cause=f'unknown_channel_{channel}')
+            self._channels[channel] = np.asarray(self.data.get_data_on_channel(channel))
+        return self._channels[channel]
+
+    def single_channel(self) -> np.ndarray:
+        if len(self.data.channels) != 1:
+            raise NonCompatibleData(module=_MODULE_NAME, name='condition_expression',
+                                    cause=f'operation_allowed_on_single_channel_only. data dimension is '
+                                          f'{len(self.data.channels)} != 1')
+        return self.channel(self.data.channels[0])
+
+    def all_channels(self) -> np.ndarray:
+        return np.asarray([self.channel(channel) for channel in self.data.channels])
+
+
+def _first(values: Any) -> Any:
+    return np.asarray(values)[..., 0]
+
+
+def _last(values: Any) -> Any:
+    return np.asarray(values)[..., -1]
+
+
+def _count(values: Any) -> int:
+    return np.asarray(values).shape[-1]
+
+
+_REDUCTIONS: Final[Dict[str, Callable]] = {
+    'mean': np.mean,
+    'max': np.max,
+    'min': np.min,
+    'sum': np.sum,
+    'median': np.median,
+    'std': np.std,
+    'var': np.var,
+    'any': np.any,
+    'all': np.all,
+    'abs': np.abs,
+    'first': _first,
+    'last': _last,
+    'count': _count,
+    'len': _count
+}
+
+_MODULE_FUNCTIONS: Final[Dict[str, Dict[str, Callable]]] = {
+    'statistics': {
+        'mean': np.mean,
+        'fmean': np.mean,
+        'median': np.median,
+        'pstdev': np.std,
+        'pvariance': np.var,
+        'stdev': functools.partial(np.std, ddof=1),
+        'variance': functools.partial(np.var, ddof=1)
+    },
+    'math': {
+        'fabs': np.abs,
+        'sqrt': np.sqrt,
+        'exp': np.exp,
+        'log': np.log,
+        'log10': np.log10,
+        'floor': np.floor,
+        'ceil': np.ceil,
+        'isnan': np.isnan
+    }
+}
+
+_MODULE_CONSTANTS: Final[Dict[str, Dict[str, float]]] = {
+    'math': {
+        'pi': math.pi,
+        'e': math.e,
+        'inf': math.inf
+    }
+}
+
+_BINARY_OPERATORS: Final[Dict[type, Callable]] = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow
+}
+
+_UNARY_OPERATORS: Final[Dict[type, Callable]] = {
+    ast.USub: operator.neg,
+    ast.UAdd: operator.pos,
+    ast.Not: np.logical_not
+}
+
+_COMPARISON_OPERATORS: Final[Dict[type, Callable]] = {
+    ast.Eq: operator.eq,
+    ast.NotEq: operator.ne,
+    ast.Lt: operator.lt,
+    ast.LtE: operator.le,
+    ast.Gt: operator.gt,
+    ast.GtE: operator.ge
+}
+
+_DATA_NAME: Final[str] = 'data'
+_LEGACY_DATA_NAME: Final[str] = 'condition_data'
+
+
+class ConditionExpression:
+    """This class evaluates a gate or trigger condition over the channels of a ``FrameworkData``. The expression is
+    parsed once, when the object is created, into a tree of closures over NumPy arrays, so evaluating it doesn't run
+    ``exec`` or ``eval`` and costs a few microseconds plus the NumPy operations.
+
+    The expression may use:
+     - channel names, which are replaced by the channel data array, or ``channel("name")`` for any channel name;
+     - ``data``, the data of all channels in channels X samples format;
+     - the reductions ``mean``, ``max``, ``min``, ``sum``, ``median``, ``std``, ``var``, ``any``, ``all``, ``first``,
+       ``last``, ``count`` (or ``len``) and the function ``abs``;
+     - numbers, arithmetic operators, comparisons, ``and``, ``or``, ``not`` and constant index or slice subscripts.
+
+    ``and`` and ``or`` short-circuit like in Python while their operands are scalars, so guards such as
+    ``condition_data.has_data() and mean(C3) > 0.5`` don't evaluate the right side on empty data. Operands that are
+    arrays are combined elementwise.
+
+    Expressions written for the previous ``exec`` based evaluation, using ``condition_data`` methods and the ``math``
+    and ``statistics`` modules, e.g. ``statistics.mean(condition_data.get_data_single_channel())>0.5``, are compiled in
+    the same way when they only use the data accessors and the ``math``/``statistics`` functions mapped to NumPy. Any
+    other expression is rejected, unless ``allow_legacy`` is set, in which case it is compiled once by Python and
+    evaluated with ``condition_data``, ``math`` and ``statistics`` available, as before, at a much higher cost.
+
+    :param expression: The condition expression.
+    :type expression: str
+    :param allow_legacy: Whether expressions outside of the supported subset are evaluated by Python.
+    :type allow_legacy: bool
+
+    :raises SyntaxError: The expression isn't a valid Python expression, or it is outside of the supported subset and
+        ``allow_legacy`` isn't set.
+    """
+
+    def __init__(self, expression: str, allow_legacy: bool = False) -> None:
+        self.expression = expression
+        tree = ast.parse(expression.strip(), mode='eval')
+        try:
+            self._evaluate = self._compile(tree.body)
+            self.is_vectorized = True
+        except _UnsupportedExpression:
+            if not allow_legacy:
+                raise
+            self._evaluate = self._compile_legacy(expression)
+            self.is_vectorized = False
+
+    def evaluate(self, data: FrameworkData) -> Any:
+        """Evaluates the condition over the given data.
+
+        :param data: The data the condition is evaluated on.
+        :type data: FrameworkData
+
+        :return: The condition result, converted to ``bool`` if it is a NumPy boolean scalar.
+        :rtype: Any
+        """
+        result = self._evaluate(_EvaluationContext(data))
+        if isinstance(result, np.bool_) or (isinstance(result, np.ndarray) and result.shape == ()
+                                            and result.dtype == bool):
+            return bool(result)
+        return result
+
+    @staticmethod
+    def _compile_legacy(expression: str) -> Callable[[_EvaluationContext], Any]:
+        code = compile(expression.strip(), '<condition>', 'eval')
+        global_variables: Dict[str, Any] = {'math': math, 'statistics': statistics}
+
+        def evaluate(context: _EvaluationContext) -> Any:
+            # Compiled conditions are shared between nodes, so the data goes in a local namespace of each evaluation
+            return eval(code, global_variables, {_LEGACY_DATA_NAME: context.data})
+
+        return evaluate
+
+    def _compile(self, node: ast.AST) -> Callable[[_EvaluationContext], Any]:
+        if isinstance(node, ast.Constant) and type(node.value) in [int, float, bool, str]:
+            value = node.value
+            return lambda context: value
+        if isinstance(node, ast.Name):
+            return self._compile_name(node.id)
+        if isinstance(node, ast.Attribute):
+            return self._compile_module_constant(node)
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            return self._compile_operation(_BINARY_OPERATORS[type(node.op)], [node.left, node.right])
+        if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPERATORS:
+            return self._compile_operation(_UNARY_OPERATORS[type(node.op)], [node.operand])
+        if isinstance(node, ast.BoolOp):
+            return self._compile_boolean_operation(node)
+        if isinstance(node, ast.Compare):
+            return self._compile_comparison(node)
+        if isinstance(node, ast.Call):
+            return self._compile_call(node)
+        if isinstance(node, ast.Subscript):
+            return self._compile_subscript(node)
+        raise _UnsupportedExpression()
+
+    def _compile_name(self, name: str) -> Callable[[_EvaluationContext], Any]:
+        if name == _DATA_NAME:
+            return lambda context: context.all_channels()
+        if name in [_LEGACY_DATA_NAME, 'channel'] or name in _MODULE_FUNCTIONS or name in _REDUCTIONS:
+            raise _UnsupportedExpression()
+        return lambda context: context.channel(name)
+
+    @staticmethod
+    def _compile_module_constant(node: ast.Attribute) -> Callable[[_EvaluationContext], Any]:
+        if not isinstance(node.value, ast.Name) or node.value.id not in _MODULE_CONSTANTS \
+                or node.attr not in _MODULE_CONSTANTS[node.value.id]:
+            raise _UnsupportedExpression()
+        value = _MODULE_CONSTANTS[node.value.id][node.attr]
+        return lambda context: value
+
+    def _compile_operation(self, function: Callable, operands: List[ast.AST]) -> Callable[[_EvaluationContext], Any]:
+        compiled_operands = [self._compile(operand) for operand in operands]
+        if len(compiled_operands) == 1:
+            operand = compiled_operands[0]
+            return lambda context: function(operand(context))
+        if len(compiled_operands) == 2:
+            left, right = compiled_operands
+            return lambda context: function(left(context), right(context))
+        return lambda context: function(*[operand(context) for operand in compiled_operands])
+
+    def _compile_boolean_operation(self, node: ast.BoolOp) -> Callable[[_EvaluationContext], Any]:
+        is_and = isinstance(node.op, ast.And)
+        reduction = np.logical_and if is_and else np.logical_or
+        operands = [self._compile(operand) for operand in node.values]
+
+        def evaluate(context: _EvaluationContext) -> Any:
+            result = operands[0](context)
+            for operand in operands[1:]:
+                if np.ndim(result) > 0:
+                    result = reduction(result, operand(context))
+                elif bool(result) != is_and:
+                    # A falsy operand of ``and`` or a truthy operand of ``or`` decides the result
+                    return result
+                else:
+                    result = operand(context)
+            return result
+
+        return evaluate
+
+    def _compile_comparison(self, node: ast.Compare) -> Callable[[_EvaluationContext], Any]:
+        if any(type(comparison) not in _COMPARISON_OPERATORS for comparison in node.ops):
+            raise _UnsupportedExpression()
+        operands = [self._compile(operand) for operand in [node.left] + node.comparators]
+        comparisons = [_COMPARISON_OPERATORS[type(comparison)] for comparison in node.ops]
+        if len(comparisons) == 1:
+            left, right = operands
+            comparison = comparisons[0]
+            return lambda context: comparison(left(context), right(context))
+
+        def compare(context: _EvaluationContext) -> Any:
+            values = [operand(context) for operand in operands]
+            return functools.reduce(np.logical_and, [comparison(values[index], values[index + 1])
+                                                     for index, comparison in enumerate(comparisons)])
+
+        return compare
+
+    def _compile_call(self, node: ast.Call) -> Callable[[_EvaluationContext], Any]:
+        if node.keywords:
+            raise _UnsupportedExpression()
+        function = node.func
+        if isinstance(function, ast.Name) and function.id == 'channel':
+            if len(node.args) != 1 or not isinstance(node.args[0], ast.Constant) or type(node.args[0].value) is not str:
+                raise _UnsupportedExpression()
+            return self._compile_name_reference(node.args[0].value)
+        if isinstance(function, ast.Name) and function.id in _REDUCTIONS:
+            if len(node.args) > 1 and function.id in ['max', 'min']:
+                # max(a, b) compares its arguments instead of reducing one
+                elementwise = np.maximum if function.id == 'max' else np.minimum
+                return self._compile_operation(lambda *values: functools.reduce(elementwise, values), node.args)
+            if len(node.args) != 1:
+                raise _UnsupportedExpression()
+            return self._compile_operation(_REDUCTIONS[function.id], node.args)
+        if isinstance(function, ast.Attribute) and isinstance(function.value, ast.Name):
+            if function.value.id == _LEGACY_DATA_NAME:
+                return self._compile_data_accessor(function.attr, node.args)
+            if function.value.id in _MODULE_FUNCTIONS and function.attr in _MODULE_FUNCTIONS[function.value.id] \
+                    and len(node.args) == 1:
+                return self._compile_operation(_MODULE_FUNCTIONS[function.value.id][function.attr], node.args)
+        raise _UnsupportedExpression()
+
+    @staticmethod
+    def _compile_name_reference(name: str) -> Callable[[_EvaluationContext], Any]:
+        return lambda context: context.channel(name)
+
+    def _compile_data_accessor(self, method: str, arguments: List[ast.AST]) -> Callable[[_EvaluationContext], Any]:
+        if method == 'get_data_single_channel' and len(arguments) == 0:
+            return lambda context: context.single_channel()
+        if method == 'get_data_as_2d_array' and len(arguments) == 0:
+            return lambda context: context.all_channels()
+        if method == 'get_data_count' and len(arguments) == 0:
+            return lambda context: context.data.get_data_count()
+        if method == 'has_data' and len(arguments) == 0:
+            return lambda context: context.data.has_data()
+        if method in ['get_data_on_channel', '__getitem__'] and len(arguments) == 1 \
+                and isinstance(arguments[0], ast.Constant) and type(arguments[0].value) is str:
+            return self._compile_name_reference(arguments[0].value)
+        raise _UnsupportedExpression()
+
+    def _compile_subscript(self, node: ast.Subscript) -> Callable[[_EvaluationContext], Any]:
+        value = self._compile(node.value)
+        # Python 3.8 wraps the subscript index in an ast.Index node
+        index = node.slice.value if type(node.slice).__name__ == 'Index' else node.slice
+        if isinstance(index, ast.Slice):
+            bounds = [self._get_constant_int(bound) for bound in [index.lower, index.upper, index.step]]
+            key = slice(*bounds)
+        else:
+            key = self._get_constant_int(index)
+            if key is None:
+                raise _UnsupportedExpression()
+        return lambda context: np.asarray(value(context))[..., key]
+
+    @staticmethod
+    def _get_constant_int(node: ast.AST) -> Any:
+        if node is None:
+            return None
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            value = ConditionExpression._get_constant_int(node.operand)
+            return -value if value is not None else None
+        if isinstance(node, ast.Constant) and type(node.value) is int:
+            return node.value
+        raise _UnsupportedExpression()
+
+
+@functools.lru_cache(maxsize=None)
+def compile_condition_expression(expression: str, allow_legacy: bool = False) -> ConditionExpression:
+    """Returns the compiled condition for an expression, compiling it only the first time the expression is used.
+    Compiled conditions keep no state between evaluations, so they are shared by all nodes.
+
+    :param expression: The condition expression.
+    :type expression: str
+    :param allow_legacy: Whether expressions outside of the supported subset are evaluated by Python.
+    :type allow_legacy: bool
+
+    :raises SyntaxError: The expression isn't a valid Python expression, or it is outside of the supported subset and
+        ``allow_legacy`` isn't set.
+
+    :return: The compiled condition.
+    :rtype: ConditionExpression
+    """
+    return ConditionExpression(expression, allow_legacy)
@@ -0,0 +1,109 @@
+import csv
+import warnings
+from typing import Final, List, Dict, Iterator
+
+import numpy as np
+
+from models.exception.non_compatible_data import NonCompatibleData
+
+
+class CSVBlockReader:
+    """This class reads a CSV file in blocks of rows, converting each selected column to a typed NumPy array. Each block
+    is parsed by ``np.loadtxt`` straight from the open file, into a structured array with one field for each selected
+    column, so columns that aren't used are never converted and no intermediate string arrays are built.
+
+    :param file_path: Path to the CSV file. Its first row must be the column names.
+    :type file_path: str
+    :param columns: Names of the columns to read. If ``None``, all columns are read.
+    :type columns: List[str]
+    :param delimiter: Column delimiter.
+    :type delimiter: str
+    :param dtype: NumPy dtype of the columns.
+    :type dtype: str
+    :param column_dtypes: NumPy dtype of specific columns, overriding ``dtype``.
+    :type column_dtypes: Dict[str, str]
+
+    :raises NonCompatibleData: A selected column doesn't exist in the file.
+    """
+    _MODULE_NAME: Final[str] = 'utils.csv_block_reader'
+    DEFAULT_BLOCK_SIZE: Final[int] = 65536
+
+    def __init__(self, file_path: str, columns: List[str] = None, delimiter: str = ',', dtype: str = 'float64',
+                 column_dtypes: Dict[str, str] = None) -> None:
+        self.file_path = file_path
+        self._file = open(file_path, newline='')
+        self._delimiter = delimiter
+        header = next(csv.reader(self._file, delimiter=delimiter), [])
+        self.columns: List[str] = list(header) if columns is None else list(columns)
+        missing_columns = [column for column in self.columns if column not in header]
+        if len(missing_columns) > 0:
+            self.close()
+            raise NonCompatibleData(module=self._MODULE_NAME, name='csv_block_reader',
+                                    cause=f'columns_not_found_{missing_columns}')
+        self._column_indexes: List[int] = [header.index(column) for column in self.columns]
+        column_dtypes = column_dtypes if column_dtypes is not None else {}
+        self.dtypes: Dict[str, np.dtype] = {column: np.dtype(column_dtypes.get(column, dtype))
+                                            for column in self.columns}
+        self._block_dtype = np.dtype([(f'column_{column_index}', self.dtypes[column])
+                                      for column_index, column in enumerate(self.columns)])
+
+    def read_blocks(self, block_size: int = None) -> Iterator[Dict[str, np.ndarray]]:
+        """Reads the file in blocks, from the current position to its end.
+
+        :param block_size: Number of rows of each block. If ``None``, the default block size is used.
+        :type block_size: int
+
+        :return: An iterator over the blocks, each one a dict from column name to column array.
+        :rtype: Iterator[Dict[str, np.ndarray]]
+        """
+        block_size = block_size if block_size is not None else self.DEFAULT_BLOCK_SIZE
+        while True:
+            block = self._read_block(block_size)
+            if len(block[self.columns[0]]) == 0:
+                return
+            yield block
+
+    def read_all(self) -> Dict[str, np.ndarray]:
+        """Reads the file from the current position to its end.
+
+        :return: A dict from column name to column array.
+        :rtype: Dict[str, np.ndarray]
+        """
+        blocks = list(self.read_blocks())
+        if len(blocks) == 0:
+            return {column: np.empty(0, dtype=self.dtypes[column]) for column in self.columns}
+        return {column: np.concatenate([block[column] for block in blocks]) for column in self.columns}
+
+    def _read_block(self, block_size: int) -> Dict[str, np.ndarray]:
+        """Parses the next block of rows to typed columns.
+
+        :param block_size: Maximum number of rows read.
+        :type block_size: int
+
+        :return: A dict from column name to column array, empty at the end of the file.
+        :rtype: Dict[str, np.ndarray]
+
+        :raises NonCompatibleData: A value can't be converted to its column dtype.
+        """
+        try:
+            with warnings.catch_warnings():
+                # an empty block only means the end of the file was reached
+                warnings.simplefilter('ignore', UserWarning)
+                rows = np.loadtxt(self._file, dtype=self._block_dtype, delimiter=self._delimiter, comments=None,
+                                  usecols=self._column_indexes, max_rows=block_size, ndmin=1)
+        except ValueError as error:
+            raise NonCompatibleData(module=self._MODULE_NAME, name='csv_block_reader',
+                                    cause=f'invalid_value_in_{self.file_path}: {error}')
+        return {column: rows[f'column_{column_index}'] for column_index, column in enumerate(self.columns)}
+
+    def close(self) -> None:
+        """Closes the file.
+        """
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
@@ -0,0 +1,395 @@
+import datetime
+from typing import Final, List, Tuple, Dict
+
+import numpy as np
+
+from models.exception.non_compatible_data import NonCompatibleData
+
+_MODULE_NAME: Final[str] = 'utils.edf_format'
+
+EDF_VERSION: Final[bytes] = b'0       '
+BDF_VERSION: Final[bytes] = b'\xffBIOSEMI'
+EDF_ANNOTATIONS_LABEL: Final[str] = 'EDF Annotations'
+BDF_ANNOTATIONS_LABEL: Final[str] = 'BDF Annotations'
+EDF_DIGITAL_RANGE: Final[Tuple[int, int]] = (-32768, 32767)
+BDF_DIGITAL_RANGE: Final[Tuple[int, int]] = (-8388608, 8388607)
+
+FIXED_HEADER_SIZE: Final[int] = 256
+SIGNAL_HEADER_SIZE: Final[int] = 256
+RECORD_COUNT_OFFSET: Final[int] = 236
+
+# (field name, field size) of the fixed header, followed by the (field name, field size) of each signal header field,
+# which are stored field by field, for all signals
+FIXED_HEADER_FIELDS: Final[List[Tuple[str, int]]] = [
+    ('version', 8), ('patient', 80), ('recording', 80), ('start_date', 8), ('start_time', 8), ('header_size', 8),
+    ('reserved', 44), ('record_count', 8), ('record_duration', 8), ('signal_count', 4)
+]
+SIGNAL_HEADER_FIELDS: Final[List[Tuple[str, int]]] = [
+    ('label', 16), ('transducer', 80), ('physical_dimension', 8), ('physical_minimum', 8), ('physical_maximum', 8),
+    ('digital_minimum', 8), ('digital_maximum', 8), ('prefiltering', 80), ('samples_per_record', 8), ('reserved', 32)
+]
+
+_MONTHS: Final[List[str]] = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
+
+
+def _format_field(value, size: int) -> bytes:
+    """Formats a header field as a left aligned, space padded, ASCII string.
+    """
+    field = value if isinstance(value, bytes) else str(value).encode('ascii', 'replace')
+    return field[:size].ljust(size, b' ')
+
+
+def _format_number(value: float, size: int = 8) -> str:
+    """Formats a number with as many digits as fit in a header field.
+    """
+    if float(value).is_integer() and len(str(int(value))) <= size:
+        return str(int(value))
+    for precision in range(size, 0, -1):
+        text = f'{value:.{precision}g}'
+        if len(text) <= size:
+            return text
+    raise NonCompatibleData(module=_MODULE_NAME, name='edf_format', cause=f'number_{value}_doesnt_fit_header_field')
+
+
+def _format_onset(value: float) -> str:
+    text = f'{value:+.6f}'.rstrip('0')
+    return text[:-1] if text.endswith('.') else text
+
+
+def encode_annotation(onset: float, text: str, duration: float = None) -> bytes:
+    """Encodes an annotation as an EDF+ time-stamped annotations list (TAL).
+
+    :param onset: Onset of the annotation, in seconds since the start of the recording.
+    :type onset: float
+    :param text: Annotation text.
+    :type text: str
+    :param duration: Duration of the annotation, in seconds. If ``None``, no duration is encoded.
+    :type duration: float
+
+    :return: The encoded annotation.
+    :rtype: bytes
+    """
+    duration_text = '' if duration is None else f'\x15{_format_onset(duration)[1:]}'
+    return f'{_format_onset(onset)}{duration_text}\x14{text}\x14\x00'.encode('utf-8')
+
+
+class EDFWriter:
+    """This class writes EDF+ (16 bits samples) or BDF+ (24 bits samples) recordings, one data record at a time.
+
+    Each data record has ``record_duration`` seconds of every channel, followed by an annotations signal with the
+    record onset and the annotations that fit in ``annotation_size`` bytes. The physical values are quantized to the
+    digital range with a single vectorized scaling of all channels of the record.
+
+    Encoding a record (``encode_record``) and writing it (``write_record``) are separated, so records can be encoded
+    in preallocated buffers by one thread, and written by another. The number of data records is written to the header
+    when the writer is closed.
+
+    :param file_path: Path to the recording file. It is overwritten if it exists.
+    :type file_path: str
+    :param channels: Channel names.
+    :type channels: List[str]
+    :param sampling_frequency: Sampling frequency of the channels. ``sampling_frequency * record_duration`` must be an
+        integer.
+    :type sampling_frequency: float
+    :param record_duration: Duration of each data record, in seconds.
+    :type record_duration: float
+    :param physical_minimum: Physical value mapped to the minimum digital value, for all channels.
+    :type physical_minimum: float
+    :param physical_maximum: Physical value mapped to the maximum digital value, for all channels.
+    :type physical_maximum: float
+    :param physical_dimension: Physical dimension of the channels, like ``uV``.
+    :type physical_dimension: str
+    :param bdf: If ``True``, the recording is written as BDF+, with 24 bits samples.
+    :type bdf: bool
+    :param annotation_size: Size in bytes of the annotations signal of each record.
+    :type annotation_size: int
+    :param start: Start date and time of the recording. If ``None``, the current date and time is used.
+    :type start: datetime.datetime
+    """
+
+    def __init__(self, file_path: str, channels: List[str], sampling_frequency: float, record_duration: float = 1.0,
+                 physical_minimum: float = -187500.0, physical_maximum: float = 187500.0,
+                 physical_dimension: str = 'uV', bdf: bool = False, annotation_size: int = 240,
+                 start: datetime.datetime = None) -> None:
+        samples_per_record = sampling_frequency * record_duration
+        if not float(samples_per_record).is_integer() or samples_per_record < 1:
+            raise NonCompatibleData(module=_MODULE_NAME, name='edf_writer',
+                                    cause='sampling_frequency_times_record_duration_must_be_integer')
+        self.file_path = file_path
+        self.channels = list(channels)
+        self.sampling_frequency = sampling_frequency
+        self.record_duration = record_duration
+        self.samples_per_record = int(samples_per_record)
+        self.bdf = bdf
+        self.sample_size = 3 if bdf else 2
+        digital_minimum, digital_maximum = BDF_DIGITAL_RANGE if bdf else EDF_DIGITAL_RANGE
+        # The header fields have limited digits, so the scaling uses the physical range as stored in the header
+        physical_minimum = float(_format_number(physical_minimum))
+        physical_maximum = float(_format_number(physical_maximum))
+        if physical_maximum <= physical_minimum:
+            raise NonCompatibleData(module=_MODULE_NAME, name='edf_writer',
+                                    cause='physical_maximum_must_be_greater_than_physical_minimum')
+        self._digital_minimum = digital_minimum
+        self._digital_maximum = digital_maximum
+        self._gain = (digital_maximum - digital_minimum) / (physical_maximum - physical_minimum)
+        self._physical_minimum = physical_minimum
+        self.annotation_size = -(-annotation_size // self.sample_size) * self.sample_size
+        self._samples_size = len(self.channels) * self.samples_per_record * self.sample_size
+        self.record_size = self._samples_size + self.annotation_size
+        self.record_count = 0
+        start = start if start is not None else datetime.datetime.now()
+
+        annotations_label = BDF_ANNOTATIONS_LABEL if bdf else EDF_ANNOTATIONS_LABEL
+        signal_count = len(self.channels) + 1
+        signals = [{
+            'label': channel,
+            'transducer': '',
+            'physical_dimension': physical_dimension,
+            'physical_minimum': _format_number(physical_minimum),
+            'physical_maximum': _format_number(physical_maximum),
+            'digital_minimum': digital_minimum,
+            'digital_maximum': digital_maximum,
+            'prefiltering': '',
+            'samples_per_record': self.samples_per_record,
+            'reserved': ''
+        } for channel in self.channels]
+        signals.append({
+            'label': annotations_label,
+            'transducer': '',
+            'physical_dimension': '',
+            'physical_minimum': -1,
+            'physical_maximum': 1,
+            'digital_minimum': digital_minimum,
+            'digital_maximum': digital_maximum,
+            'prefiltering': '',
+            'samples_per_record': self.annotation_size // self.sample_size,
+            'reserved': ''
+        })
+        fixed_header = {
+            'version': BDF_VERSION if bdf else EDF_VERSION,
+            'patient': 'X X X X',
+            'recording': f'Startdate {start.day:02d}-{_MONTHS[start.month - 1]}-{start.year} X X X',
+            'start_date': start.strftime('%d.%m.%y'),
+            'start_time': start.strftime('%H.%M.%S'),
+            'header_size': FIXED_HEADER_SIZE + signal_count * SIGNAL_HEADER_SIZE,
+            'reserved': 'BDF+C' if bdf else 'EDF+C',
+            'record_count': -1,
+            'record_duration': _format_number(record_duration),
+            'signal_count': signal_count
+        }
+        header = b''.join(_format_field(fixed_header[field], size) for field, size in FIXED_HEADER_FIELDS)
+        for field, size in SIGNAL_HEADER_FIELDS:
+            header += b''.join(_format_field(signal[field], size) for signal in signals)
+        self._file = open(file_path, 'wb')
+        self._file.write(header)
+
+    def new_record_buffer(self) -> np.ndarray:
+        """Allocates a buffer for an encoded data record.
+        """
+        return np.zeros(self.record_size, dtype=np.uint8)
+
+    def encode_record(self, samples: np.ndarray, record_index: int, annotations: List[bytes],
+                      record_buffer: np.ndarray) -> List[bytes]:
+        """Encodes a data record in ``record_buffer``. This doesn't change the writer state, so records can be encoded
+        in parallel with ``write_record``.
+
+        :param samples: The physical values of the record, with one row per channel and ``samples_per_record`` columns.
+        :type samples: np.ndarray
+        :param record_index: Index of the record in the recording, which gives the record onset.
+        :type record_index: int
+        :param annotations: Encoded annotations to store in the record, in order.
+        :type annotations: List[bytes]
+        :param record_buffer: Buffer returned by ``new_record_buffer``.
+        :type record_buffer: np.ndarray
+
+        :return: The annotations that didn't fit in the record, which should be stored in the next records.
+        :rtype: List[bytes]
+        """
+        digital = np.rint((samples - self._physical_minimum) * self._gain + self._digital_minimum)
+        np.clip(digital, self._digital_minimum, self._digital_maximum, out=digital)
+        digital = digital.astype('<i4')
+        samples_bytes = record_buffer[:self._samples_size].reshape(len(self.channels), self.samples_per_record,
+                                                                  self.sample_size)
+        digital_bytes = digital.view(np.uint8).reshape(len(self.channels), self.samples_per_record, 4)
+        samples_bytes[:] = digital_bytes[:, :, :self.sample_size]
+
+        timekeeping = encode_annotation(record_index * self.record_duration, '')
+        annotation_bytes = bytearray(timekeeping)
+        stored_count = 0
+        for annotation in annotations:
+            if len(annotation_bytes) + len(annotation) > self.annotation_size:
+                if len(timekeeping) + len(annotation) > self.annotation_size:
+                    # It would never fit in a record, so it is dropped instead of delaying the next annotations
+                    stored_count += 1
+                    continue
+                break
+            annotation_bytes += annotation
+            stored_count += 1
+        annotation_region = record_buffer[self._samples_size:]
+        annotation_region[:len(annotation_bytes)] = np.frombuffer(bytes(annotation_bytes), dtype=np.uint8)
+        annotation_region[len(annotation_bytes):] = 0
+        return annotations[stored_count:]
+
+    def write_record(self, record_buffer: np.ndarray) -> None:
+        """Appends an encoded data record to the recording.
+        """
+        self._file.write(record_buffer.data)
+        self.record_count += 1
+
+    def close(self) -> None:
+        """Writes the number of data records to the header and closes the file.
+        """
+        if self._file.closed:
+            return
+        self._file.seek(RECORD_COUNT_OFFSET)
+        self._file.write(_format_field(self.record_count, 8))
+        self._file.close()
+
+
+def decode_annotations(annotation_bytes: bytes) -> List[Tuple[float, float, str]]:
+    """Decodes the time-stamped annotations lists (TALs) of an annotations signal, skipping the record timekeeping.
+
+    :return: The annotations, each one with its onset, its duration (``None`` if not set) and its text.
+    :rtype: List[Tuple[float, float, str]]
+    """
+    annotations: List[Tuple[float, float, str]] = []
+    for tal in annotation_bytes.split(b'\x00'):
+        fields = tal.decode('utf-8', 'replace').split('\x14')
+        if len(fields) < 2 or fields[0] == '':
+            continue
+        timing = fields[0].split('\x15')
+        try:
+            onset = float(timing[0])
+            duration = float(timing[1]) if len(timing) > 1 and timing[1] != '' else None
+        except ValueError:
+            continue
+        for text in fields[1:]:
+            if text != '':
+                annotations.append((onset, duration, text))
+    return annotations
+
+
+class EDFReader:
+    """This class reads EDF, EDF+, BDF and BDF+ recordings. The data records are memory mapped, and the samples are
+    decoded only for the requested signals and samples, with a vectorized conversion of all the records involved to
+    physical values.
+
+    :param file_path: Path to the recording file.
+    :type file_path: str
+
+    :raises NonCompatibleData: The file isn't an EDF or BDF recording.
+    """
+
+    def __init__(self, file_path: str) -> None:
+        self.file_path = file_path
+        with open(file_path, 'rb') as header_file:
+            fixed_header_bytes = header_file.read(FIXED_HEADER_SIZE)
+            if len(fixed_header_bytes) < FIXED_HEADER_SIZE:
+                raise NonCompatibleData(module=_MODULE_NAME, name='edf_reader', cause='not_an_edf_or_bdf_recording')
+            fixed_header = self._parse_fields(fixed_header_bytes, FIXED_HEADER_FIELDS, 1)
+            try:
+                signal_count = int(fixed_header['signal_count'][0])
+                header_size = int(fixed_header['header_size'][0])
+                self.record_duration = float(fixed_header['record_duration'][0])
+                record_count = int(fixed_header['record_count'][0])
+            except ValueError:
+                raise NonCompatibleData(module=_MODULE_NAME, name='edf_reader', cause='not_an_edf_or_bdf_recording')
+            signal_header = self._parse_fields(header_file.read(signal_count * SIGNAL_HEADER_SIZE),
+                                               SIGNAL_HEADER_FIELDS, signal_count)
+        self.bdf = fixed_header_bytes[:8] == BDF_VERSION
+        self.sample_size = 3 if self.bdf else 2
+        self.labels: List[str] = signal_header['label']
+        self.physical_dimensions: List[str] = signal_header['physical_dimension']
+        self.samples_per_record = np.array([int(value) for value in signal_header['samples_per_record']])
+        physical_minimum = np.array([float(value) for value in signal_header['physical_minimum']])
+        physical_maximum = np.array([float(value) for value in signal_header['physical_maximum']])
+        digital_minimum = np.array([float(value) for value in signal_header['digital_minimum']])
+        digital_maximum = np.array([float(value) for value in signal_header['digital_maximum']])
+        self._gain = (physical_maximum - physical_minimum) / (digital_maximum - digital_minimum)
+        self._offset = physical_minimum - digital_minimum * self._gain
+        self.annotation_signal_indexes = [signal_index for signal_index, label in enumerate(self.labels)
+                                          if label in [EDF_ANNOTATIONS_LABEL, BDF_ANNOTATIONS_LABEL]]
+
+        signal_sizes = self.samples_per_record * self.sample_size
+        self._signal_offsets = np.concatenate([[0], np.cumsum(signal_sizes)[:-1]])
+        self.record_size = int(np.sum(signal_sizes))
+        self._memory_map = np.memmap(file_path, dtype=np.uint8, mode='r')
+        # The record count is -1 while the recording is being written, and the last record may be incomplete
+        available_record_count = (self._memory_map.shape[0] - header_size) // self.record_size \
+            if self.record_size > 0 \
+            else 0
+        self.record_count = available_record_count if record_count < 0 else min(record_count, available_record_count)
+        self._records = self._memory_map[header_size:header_size + self.record_count * self.record_size] \
+            .reshape(self.record_count, self.record_size)
+
+    @staticmethod
+    def _parse_fields(header_bytes: bytes, fields: List[Tuple[str, int]], count: int) -> Dict[str, List[str]]:
+        """Parses header fields stored field by field, for ``count`` items.
+        """
+        if len(header_bytes) < sum(size for _, size in fields) * count:
+            raise NonCompatibleData(module=_MODULE_NAME, name='edf_reader', cause='truncated_header')
+        parsed: Dict[str, List[str]] = {}
+        position = 0
+        for field, size in fields:
+            parsed[field] = [header_bytes[position + item * size:position + (item + 1) * size].decode('latin-1').strip()
+                             for item in range(count)]
+            position += size * count
+        return parsed
+
+    def get_sampling_frequency(self, signal_index: int) -> float:
+        return self.samples_per_record[signal_index] / self.record_duration
+
+    def get_sample_count(self, signal_index: int) -> int:
+        return int(self.samples_per_record[signal_index]) * self.record_count
+
+    def read(self, signal_indexes: List[int], start_sample: int, end_sample: int) -> np.ndarray:
+        """Decodes samples of signals with the same sampling frequency to physical values.
+
+        :param signal_indexes: Indexes of the signals to decode.
+        :type signal_indexes: List[int]
+        :param start_sample: Index of the first sample.
+        :type start_sample: int
+        :param end_sample: Index after the last sample.
+        :type end_sample: int
+
+        :return: The physical values, with one row per signal.
+        :rtype: np.ndarray
+        """
+        samples_per_record = int(self.samples_per_record[signal_indexes[0]])
+        first_record = start_sample // samples_per_record
+        last_record = -(-end_sample // samples_per_record)
+        records = self._records[first_record:last_record]
+        digital = np.empty((len(signal_indexes), records.shape[0] * samples_per_record), dtype=np.int32)
+        for row, signal_index in enumerate(signal_indexes):
+            signal_offset = int(self._signal_offsets[signal_index])
+            signal_bytes = records[:, signal_offset:signal_offset + samples_per_record * self.sample_size]
+            if self.bdf:
+                signal_bytes = signal_bytes.reshape(-1, 3).astype(np.int32)
+                values = signal_bytes[:, 0] | (signal_bytes[:, 1] << 8) | (signal_bytes[:, 2] << 16)
+                digital[row] = (values ^ 0x800000) - 0x800000
+            else:
+                digital[row] = np.ascontiguousarray(signal_bytes).view('<i2').reshape(-1)
+        first_position = start_sample - first_record * samples_per_record
+        digital = digital[:, first_position:first_position + end_sample - start_sample]
+        return digital * self._gain[signal_indexes, np.newaxis] + self._offset[signal_indexes, np.newaxis]
+
+    def read_annotations(self) -> List[Tuple[float, float, str]]:
+        """Decodes the annotations of every record.
+
+        :return: The annotations, each one with its onset, its duration (``None`` if not set) and its text.
+        :rtype: List[Tuple[float, float, str]]
+        """
+        annotations: List[Tuple[float, float, str]] = []
+        for signal_index in self.annotation_signal_indexes:
+            signal_offset = int(self._signal_offsets[signal_index])
+            signal_size = int(self.samples_per_record[signal_index]) * self.sample_size
+            annotation_bytes = np.ascontiguousarray(self._records[:, signal_offset:signal_offset + signal_size])
+            for record_annotations in annotation_bytes:
+                annotations.extend(decode_annotations(record_annotations.tobytes()))
+        return annotations
+
+    def close(self) -> None:
+        """Releases the memory map. Arrays returned by ``read`` are copies, so they remain valid.
+        """
+        self._records = None
+        self._memory_map = None
@@ -0,0 +1,71 @@
+import os
+import struct
+import zipfile
+from typing import Dict, Final
+
+import numpy as np
+
+KIND_KEY: Final[str] = 'kind'
+
+KIND_CSP: Final[str] = 'csp'
+KIND_LDA: Final[str] = 'lda'
+KIND_PCA: Final[str] = 'pca'
+
+_ZIP_LOCAL_HEADER_SIZE: Final[int] = 30
+
+
+def save_exported_model(file_path: str, kind: str, arrays: Dict[str, np.ndarray]) -> None:
+    """This function saves the inference parameters of a trained linear model as an uncompressed ``.npz`` file. Only
+    plain matrices and bias vectors are stored, so the file can be loaded without importing the library that trained
+    the model.
+
+    :param file_path: The path of the ``.npz`` file.
+    :type file_path: str
+    :param kind: The kind of the exported model (``csp``, ``lda`` or ``pca``).
+    :type kind: str
+    :param arrays: The model parameters, keyed by name.
+    :type arrays: Dict[str, np.ndarray]
+    """
+    directory = os.path.dirname(file_path)
+    if directory != '' and not os.path.exists(directory):
+        os.makedirs(directory)
+    exported_arrays = {name: np.atleast_1d(np.asarray(value)) for name, value in arrays.items()}
+    exported_arrays[KIND_KEY] = np.asarray([kind])
+    # np.savez stores the members uncompressed, which is what allows them to be memory-mapped when loaded.
+    np.savez(file_path, **exported_arrays)
+
+
+def load_exported_model(file_path: str) -> Dict[str, np.ndarray]:
+    """This function loads a model saved by ``save_exported_model``. Every uncompressed numeric member of the archive
+    is memory-mapped directly from the ``.npz`` file, the remaining members are read normally.
+
+    :param file_path: The path of the ``.npz`` file.
+    :type file_path: str
+
+    :return: The model parameters, keyed by name.
+    :rtype: Dict[str, np.ndarray]
+    """
+    arrays: Dict[str, np.ndarray] = {}
+    with zipfile.ZipFile(file_path) as archive, open(file_path, 'rb') as file:
+        for info in archive.infolist():
+            name = os.path.splitext(info.filename)[0]
+            if info.compress_type != zipfile.ZIP_STORED:
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+            file.seek(info.header_offset)
+            local_header = file.read(_ZIP_LOCAL_HEADER_SIZE)
+            name_length, extra_length = struct.unpack('<HH', local_header[26:30])
+            file.seek(info.header_offset + _ZIP_LOCAL_HEADER_SIZE + name_length + extra_length)
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+            if dtype.hasobject or len(shape) == 0 or 0 in shape:
+                file.seek(info.header_offset + _ZIP_LOCAL_HEADER_SIZE + name_length + extra_length)
+                arrays[name] = np.lib.format.read_array(file)
+                continue
+            arrays[name] = np.memmap(file_path, dtype=dtype, mode='r', offset=file.tell(), shape=shape,
+                                     order='F' if fortran_order else 'C')
+    return arrays
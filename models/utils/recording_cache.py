@@ -0,0 +1,266 @@
+import hashlib
+import json
+import os
+import shutil
+import struct
+import uuid
+from typing import Final, Dict, List, Optional, BinaryIO
+
+import numpy as np
+
+
+class RecordingCache:
+    """This class keeps parsed recordings in a cache directory, so a recording that was already parsed can be memory
+    mapped instead of parsed again.
+
+    Each entry is a directory with a ``header.json`` file and one ``.npy`` file per column. Entries are keyed by the
+    source file path, the selected columns with their dtypes and any other reading option that changes the parsed
+    values. The source file size and modification time are kept in the header, and an entry whose source changed or
+    doesn't exist anymore is evicted when it is looked up, or when the cache is created.
+
+    Entries are written to a temporary directory, that is renamed to the entry directory when complete, so a partially
+    written entry is never read. An entry can be written at once, with ``store``, or block by block while the
+    recording is parsed, with the ``RecordingCacheWriter`` returned by ``open_writer``, so the whole recording never
+    needs to be in memory.
+
+    :param cache_directory: Path to the cache directory. It is created if it doesn't exist.
+    :type cache_directory: str
+    :param evict_stale_entries: If ``True``, stale entries are evicted when the cache is created.
+    :type evict_stale_entries: bool
+    """
+    _MODULE_NAME: Final[str] = 'utils.recording_cache'
+
+    _HEADER_FILE_NAME: Final[str] = 'header.json'
+    _TEMPORARY_PREFIX: Final[str] = '.tmp-'
+
+    def __init__(self, cache_directory: str, evict_stale_entries: bool = True) -> None:
+        self.cache_directory = cache_directory
+        os.makedirs(cache_directory, exist_ok=True)
+        if evict_stale_entries:
+            self.evict_stale()
+
+    @staticmethod
+    def _get_key(source_path: str, column_dtypes: Dict[str, str], options: dict = None) -> str:
+        key_data = {
+            'source': os.path.abspath(source_path),
+            'columns': [[column, np.dtype(dtype).str] for column, dtype in column_dtypes.items()],
+            'options': options if options is not None else {}
+        }
+        return hashlib.sha1(json.dumps(key_data, sort_keys=True).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _get_source_state(source_path: str) -> Optional[dict]:
+        try:
+            source_stat = os.stat(source_path)
+        except OSError:
+            return None
+        return {'size': source_stat.st_size, 'mtime_ns': source_stat.st_mtime_ns}
+
+    def _get_entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_directory, key)
+
+    @classmethod
+    def _read_header(cls, entry_path: str) -> Optional[dict]:
+        try:
+            with open(os.path.join(entry_path, cls._HEADER_FILE_NAME)) as header_file:
+                return json.load(header_file)
+        except (OSError, ValueError):
+            return None
+
+    def _is_entry_fresh(self, header: Optional[dict]) -> bool:
+        return header is not None and self._get_source_state(header['source']) == header['source_state']
+
+    @staticmethod
+    def _evict(entry_path: str) -> None:
+        shutil.rmtree(entry_path, ignore_errors=True)
+
+    def load(self, source_path: str, column_dtypes: Dict[str, str], options: dict = None) \
+            -> Optional[Dict[str, np.ndarray]]:
+        """Looks up a recording in the cache.
+
+        :param source_path: Path to the recording source file.
+        :type source_path: str
+        :param column_dtypes: Selected columns, in order, with their dtypes.
+        :type column_dtypes: Dict[str, str]
+        :param options: Other reading options that change the parsed values, like the delimiter.
+        :type options: dict
+
+        :return: A dict from column name to a read only memory mapped column array, or ``None`` if the recording isn't
+            cached, or its entry is stale.
+        :rtype: Optional[Dict[str, np.ndarray]]
+        """
+        entry_path = self._get_entry_path(self._get_key(source_path, column_dtypes, options))
+        if not os.path.isdir(entry_path):
+            return None
+        header = self._read_header(entry_path)
+        if not self._is_entry_fresh(header):
+            self._evict(entry_path)
+            return None
+        try:
+            return {column['name']: np.load(os.path.join(entry_path, column['file']), mmap_mode='r')
+                    for column in header['columns']}
+        except (OSError, ValueError):
+            self._evict(entry_path)
+            return None
+
+    def open_writer(self, source_path: str, column_dtypes: Dict[str, str], options: dict = None) \
+            -> Optional['RecordingCacheWriter']:
+        """Starts writing a recording entry incrementally. The entry replaces the previous one, if any, when the
+        writer is committed.
+
+        :param source_path: Path to the recording source file.
+        :type source_path: str
+        :param column_dtypes: Selected columns, in order, with their dtypes.
+        :type column_dtypes: Dict[str, str]
+        :param options: Other reading options that change the parsed values, like the delimiter.
+        :type options: dict
+
+        :return: The entry writer, or ``None`` if the source file doesn't exist or the entry can't be created.
+        :rtype: Optional[RecordingCacheWriter]
+        """
+        source_state = self._get_source_state(source_path)
+        if source_state is None:
+            return None
+        entry_path = self._get_entry_path(self._get_key(source_path, column_dtypes, options))
+        temporary_path = os.path.join(self.cache_directory, f'{self._TEMPORARY_PREFIX}{uuid.uuid4().hex}')
+        try:
+            return RecordingCacheWriter(source_path, source_state, column_dtypes, entry_path, temporary_path)
+        except OSError:
+            return None
+
+    def store(self, source_path: str, column_dtypes: Dict[str, str], data: Dict[str, np.ndarray],
+              options: dict = None) -> None:
+        """Stores a parsed recording in the cache, replacing its previous entry, if any.
+
+        :param source_path: Path to the recording source file.
+        :type source_path: str
+        :param column_dtypes: Selected columns, in order, with their dtypes.
+        :type column_dtypes: Dict[str, str]
+        :param data: A dict from column name to column array, with every selected column.
+        :type data: Dict[str, np.ndarray]
+        :param options: Other reading options that change the parsed values, like the delimiter.
+        :type options: dict
+        """
+        writer = self.open_writer(source_path, column_dtypes, options)
+        if writer is None:
+            return
+        try:
+            writer.append(data)
+            writer.commit()
+        finally:
+            writer.discard()
+
+    def evict_stale(self) -> None:
+        """Evicts every entry whose source changed or doesn't exist anymore. Temporary entries are left alone, as they
+        may be in the middle of being written.
+        """
+        for entry_name in os.listdir(self.cache_directory):
+            entry_path = os.path.join(self.cache_directory, entry_name)
+            if not os.path.isdir(entry_path):
+                continue
+            if entry_name.startswith(self._TEMPORARY_PREFIX):
+                continue
+            if not self._is_entry_fresh(self._read_header(entry_path)):
+                self._evict(entry_path)
+
+
+class RecordingCacheWriter:
+    """This class writes a ``RecordingCache`` entry block by block. The rows of each block are appended to the column
+    ``.npy`` files of a temporary entry, with a fixed size header that is completed with the row count when the
+    writer is committed, and only then the temporary entry is renamed to the entry directory. If writing a block
+    fails, for example because the disk is full, the entry is discarded and the following calls do nothing, so caching
+    never interrupts the reading of a recording.
+
+    Writers are created by ``RecordingCache.open_writer``.
+    """
+    _MODULE_NAME: Final[str] = 'utils.recording_cache'
+
+    _NPY_HEADER_SIZE: Final[int] = 128
+
+    def __init__(self, source_path: str, source_state: dict, column_dtypes: Dict[str, str], entry_path: str,
+                 temporary_path: str) -> None:
+        self._source_path = source_path
+        self._source_state = source_state
+        self._column_dtypes = {column: np.dtype(dtype) for column, dtype in column_dtypes.items()}
+        self._entry_path = entry_path
+        self._temporary_path = temporary_path
+        self._row_count = 0
+        self._failed = False
+        self._column_files: Dict[str, BinaryIO] = {}
+        os.makedirs(temporary_path)
+        try:
+            for column_index, column in enumerate(self._column_dtypes.keys()):
+                column_file = open(os.path.join(temporary_path, f'{column_index}.npy'), 'wb')
+                self._column_files[column] = column_file
+                column_file.write(self._format_npy_header(self._column_dtypes[column], 0))
+        except OSError:
+            self.discard()
+            raise
+
+    @classmethod
+    def _format_npy_header(cls, dtype: np.dtype, row_count: int) -> bytes:
+        """Formats a version 1.0 ``.npy`` header for a one dimensional array, padded to a fixed size so it can be
+        rewritten in place.
+        """
+        header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (row_count,)})
+        prefix_size = len(np.lib.format.MAGIC_PREFIX) + 4
+        header = header.ljust(cls._NPY_HEADER_SIZE - prefix_size - 1) + '\n'
+        return np.lib.format.MAGIC_PREFIX + bytes([1, 0]) + struct.pack('<H', len(header)) + header.encode('latin1')
+
+    @property
+    def row_count(self) -> int:
+        """Number of rows appended.
+        """
+        return self._row_count
+
+    def append(self, block: Dict[str, np.ndarray]) -> None:
+        """Appends the rows of a parsed block to the entry.
+
+        :param block: A dict from column name to column array, with every selected column.
+        :type block: Dict[str, np.ndarray]
+        """
+        if self._failed:
+            return
+        try:
+            for column, column_file in self._column_files.items():
+                column_file.write(np.ascontiguousarray(block[column], dtype=self._column_dtypes[column]).tobytes())
+        except OSError:
+            self.discard()
+            return
+        if len(self._column_files) > 0:
+            self._row_count += int(np.shape(block[next(iter(self._column_files))])[0])
+
+    def commit(self) -> None:
+        """Completes the column files headers and the entry header, and renames the temporary entry to the entry
+        directory. If the entry can't be renamed, it is discarded.
+        """
+        if self._failed:
+            return
+        try:
+            columns: List[dict] = []
+            for column_index, (column, column_file) in enumerate(self._column_files.items()):
+                column_file.seek(0)
+                column_file.write(self._format_npy_header(self._column_dtypes[column], self._row_count))
+                column_file.close()
+                columns.append({'name': column, 'file': f'{column_index}.npy'})
+            header = {
+                'source': os.path.abspath(self._source_path),
+                'source_state': self._source_state,
+                'row_count': self._row_count,
+                'columns': columns
+            }
+            with open(os.path.join(self._temporary_path, RecordingCache._HEADER_FILE_NAME), 'w') as header_file:
+                json.dump(header, header_file)
+            RecordingCache._evict(self._entry_path)
+            os.replace(self._temporary_path, self._entry_path)
+        except OSError:
+            # Another writer may have just stored the same entry, which is as good as this one
+            self.discard()
+
+    def discard(self) -> None:
+        """Removes the temporary entry, if it wasn't committed.
+        """
+        self._failed = True
+        for column_file in self._column_files.values():
+            column_file.close()
+        RecordingCache._evict(self._temporary_path)
@@ -0,0 +1,94 @@
+from typing import Final, Tuple
+
+import numpy as np
+
+from models.exception.non_compatible_data import NonCompatibleData
+
+
+class RingBuffer:
+    """This class keeps the latest samples of a fixed number of channels in a preallocated array, overwriting the
+    oldest samples when it is full. It is written by a single producer thread and read by any number of consumer
+    threads, without locks, so neither side ever waits for the other.
+
+    The writer announces the range it is about to overwrite before copying the samples, and publishes them only after
+    the copy is done. A reader copies the latest published samples and then discards the ones the writer may have
+    overwritten in the meantime, so a read is never torn, at the cost of returning fewer samples when the writer laps
+    the reader.
+
+    :param channel_count: Number of channels stored.
+    :type channel_count: int
+    :param capacity: Number of samples stored for each channel.
+    :type capacity: int
+    :param dtype: Type of the stored data.
+    :type dtype: str
+    """
+    _MODULE_NAME: Final[str] = 'utils.ring_buffer'
+
+    def __init__(self, channel_count: int, capacity: int, dtype: str = 'float64') -> None:
+        self._capacity = capacity
+        self._data = np.zeros((channel_count, capacity), dtype=dtype)
+        self._written_count = 0
+        self._writing_count = 0
+
+    @property
+    def capacity(self) -> int:
+        """Number of samples stored for each channel.
+        """
+        return self._capacity
+
+    @property
+    def written_count(self) -> int:
+        """Total number of samples written to the buffer, including the overwritten ones.
+        """
+        return self._written_count
+
+    def write(self, samples: np.ndarray) -> None:
+        """Appends samples to the buffer, overwriting the oldest ones. Must be called by a single thread.
+
+        :param samples: Samples to be appended, with one row per channel.
+        :type samples: np.ndarray
+
+        :raises NonCompatibleData: The number of channels is different from the buffer one.
+        """
+        samples = np.asarray(samples, dtype=self._data.dtype)
+        if samples.ndim != 2 or samples.shape[0] != self._data.shape[0]:
+            raise NonCompatibleData(module=self._MODULE_NAME, name='ring_buffer',
+                                    cause=f'shape_{samples.shape}_doesnt_have_{self._data.shape[0]}_channels')
+        sample_count = samples.shape[1]
+        if sample_count == 0:
+            return
+        end_count = self._written_count + sample_count
+        if sample_count > self._capacity:
+            samples = samples[:, -self._capacity:]
+        start_count = end_count - samples.shape[1]
+        self._writing_count = end_count
+        start = start_count % self._capacity
+        first_part = min(samples.shape[1], self._capacity - start)
+        self._data[:, start:start + first_part] = samples[:, :first_part]
+        self._data[:, :samples.shape[1] - first_part] = samples[:, first_part:]
+        self._written_count = end_count
+
+    def read_latest(self, count: int) -> Tuple[np.ndarray, int]:
+        """Copies the latest samples written to the buffer.
+
+        :param count: Maximum number of samples read for each channel.
+        :type count: int
+
+        :return: The samples read, with one row per channel and at most ``count`` columns, and the total number of
+            samples written when they were read.
+        :rtype: Tuple[np.ndarray, int]
+        """
+        end_count = self._written_count
+        start_count = end_count - min(count, end_count, self._capacity)
+        start = start_count % self._capacity
+        end = end_count % self._capacity
+        if end_count - start_count == 0:
+            samples = self._data[:, :0].copy()
+        elif start < end:
+            samples = self._data[:, start:end].copy()
+        else:
+            samples = np.concatenate((self._data[:, start:], self._data[:, :end]), axis=1)
+        overwritten_count = self._writing_count - self._capacity - start_count
+        if overwritten_count > 0:
+            samples = samples[:, overwritten_count:]
+        return samples, end_count
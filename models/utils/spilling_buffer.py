@@ -0,0 +1,149 @@
+import os
+import tempfile
+from typing import Final, List, Tuple
+
+import numpy as np
+
+from models.exception.non_compatible_data import NonCompatibleData
+
+
+class SpillingBuffer:
+    """This class stores a growing array of samples (or epochs) in memory until it reaches a RAM budget. Past that
+    budget the content is moved to a memory-mapped temporary file, and all following samples are appended to that file,
+    so the amount of data stored is limited by the disk space instead of the RAM.
+
+    The file capacity is doubled every time it gets full, so that appending data has an amortized constant cost.
+
+    :param ram_budget_bytes: Maximum number of bytes kept in memory before spilling to disk.
+    :type ram_budget_bytes: int
+    :param spill_directory: Directory where the memory-mapped file is created.
+    :type spill_directory: str
+    :param dtype: Type of the stored data.
+    :type dtype: str
+    """
+    _MODULE_NAME: Final[str] = 'utils.spilling_buffer'
+
+    def __init__(self, ram_budget_bytes: int, spill_directory: str = None, dtype: str = 'float64') -> None:
+        self._ram_budget_bytes = ram_budget_bytes
+        self._spill_directory = spill_directory if spill_directory is not None else tempfile.gettempdir()
+        self._dtype = np.dtype(dtype)
+        self._ram_chunks: List[np.ndarray] = []
+        self._ram_bytes = 0
+        self._sample_shape: Tuple[int, ...] = None
+        self._count = 0
+        self._capacity = 0
+        self._spill_file_path: str = None
+        self._memmap: np.memmap = None
+
+    @property
+    def count(self) -> int:
+        """Number of samples stored in the buffer.
+        """
+        return self._count
+
+    @property
+    def is_spilled(self) -> bool:
+        """Whether the buffer content is stored in a memory-mapped file.
+        """
+        return self._memmap is not None
+
+    def append(self, data: np.ndarray) -> None:
+        """Appends samples to the end of the buffer.
+
+        :param data: Samples to be appended, with the samples in the first axis.
+        :type data: np.ndarray
+
+        :raises NonCompatibleData: The sample shape is different from the already stored samples.
+        """
+        data = np.asarray(data, dtype=self._dtype)
+        if data.shape[0] == 0:
+            return
+        if self._sample_shape is None:
+            self._sample_shape = data.shape[1:]
+        elif data.shape[1:] != self._sample_shape:
+            raise NonCompatibleData(module=self._MODULE_NAME, name='spilling_buffer',
+                                    cause=f'sample_shape_{data.shape[1:]}_differs_from_{self._sample_shape}')
+
+        if self._memmap is None and self._ram_bytes + data.nbytes <= self._ram_budget_bytes:
+            self._ram_chunks.append(data)
+            self._ram_bytes += data.nbytes
+            self._count += data.shape[0]
+            return
+
+        if self._memmap is None:
+            self._spill()
+        self._reserve(self._count + data.shape[0])
+        self._memmap[self._count:self._count + data.shape[0]] = data
+        self._count += data.shape[0]
+
+    def get_array(self) -> np.ndarray:
+        """Returns the buffer content. If the buffer was spilled to disk, the returned array is memory-mapped.
+
+        :return: Stored samples, with the samples in the first axis.
+        :rtype: np.ndarray
+        """
+        if self._memmap is not None:
+            self._memmap.flush()
+            return self._memmap[0:self._count]
+        if len(self._ram_chunks) == 0:
+            return np.empty((0,), dtype=self._dtype)
+        if len(self._ram_chunks) > 1:
+            self._ram_chunks = [np.concatenate(self._ram_chunks)]
+        return self._ram_chunks[0]
+
+    def clear(self) -> None:
+        """Removes all samples from the buffer, deleting the memory-mapped file if it exists.
+        """
+        self._ram_chunks = []
+        self._ram_bytes = 0
+        self._sample_shape = None
+        self._count = 0
+        self._capacity = 0
+        # The mapping is closed when the last reference to it is released, arrays returned by get_array stay valid.
+        self._memmap = None
+        if self._spill_file_path is not None and os.path.exists(self._spill_file_path):
+            try:
+                os.remove(self._spill_file_path)
+            except OSError:
+                # On Windows a file can't be removed while it is still mapped
+                pass
+        self._spill_file_path = None
+
+    def _spill(self) -> None:
+        """Creates the memory-mapped file and moves the samples kept in memory to it. The chunks are moved one at a
+        time, each one released right after being copied, so the memory used never goes past the RAM budget.
+        """
+        if not os.path.exists(self._spill_directory):
+            os.makedirs(self._spill_directory)
+        file_descriptor, self._spill_file_path = tempfile.mkstemp(suffix='.buffer', dir=self._spill_directory)
+        os.close(file_descriptor)
+        self._reserve(max(self._count, 1) * 2)
+        ram_chunks = self._ram_chunks
+        ram_chunks.reverse()
+        self._ram_chunks = []
+        self._ram_bytes = 0
+        position = 0
+        while len(ram_chunks) > 0:
+            chunk = ram_chunks.pop()
+            self._memmap[position:position + chunk.shape[0]] = chunk
+            position += chunk.shape[0]
+            del chunk
+
+    def _reserve(self, sample_count: int) -> None:
+        """Grows the memory-mapped file so that it can hold at least ``sample_count`` samples.
+
+        :param sample_count: Number of samples the file must be able to hold.
+        :type sample_count: int
+        """
+        if sample_count <= self._capacity:
+            return
+        capacity = max(sample_count, self._capacity * 2)
+        if self._memmap is not None:
+            self._memmap.flush()
+            self._memmap = None
+        sample_size = int(np.prod(self._sample_shape, dtype=np.int64)) * self._dtype.itemsize
+        with open(self._spill_file_path, 'r+b') as spill_file:
+            spill_file.truncate(capacity * sample_size)
+        self._memmap = np.memmap(self._spill_file_path, dtype=self._dtype, mode='r+',
+                                 shape=(capacity,) + tuple(self._sample_shape))
+        self._capacity = capacity
@@ -0,0 +1,128 @@
+import hashlib
+import json
+import os
+from typing import Final, Any, Callable, List
+
+import numpy as np
+
+from models.framework_data import FrameworkData
+
+
+class TrainingCache:
+    """This class stores trained processors on disk, keyed by a fingerprint of the training data, the training labels
+    and the node parameters, so that training the same node with the same data again can be skipped. The fingerprint
+    is a BLAKE2b hash computed directly over the data buffers.
+
+    When the total size of the stored processors is greater than the maximum size, the least recently used ones are
+    removed.
+
+    :param directory: Directory where the trained processors are stored.
+    :type directory: str
+    :param maximum_size_bytes: Maximum total size of the stored processors.
+    :type maximum_size_bytes: int
+    """
+    _MODULE_NAME: Final[str] = 'utils.training_cache'
+    _FILE_EXTENSION: Final[str] = '.joblib'
+
+    def __init__(self, directory: str, maximum_size_bytes: int) -> None:
+        self._directory = directory
+        self._maximum_size_bytes = maximum_size_bytes
+        if not os.path.exists(self._directory):
+            os.makedirs(self._directory)
+
+    def fingerprint(self, data: Any, label: Any, parameters: dict) -> str:
+        """Computes the fingerprint of a training.
+
+        :param data: Training data.
+        :type data: FrameworkData or np.ndarray
+        :param label: Training labels.
+        :type label: FrameworkData or np.ndarray
+        :param parameters: Node parameters that change the training result.
+        :type parameters: dict
+
+        :return: The training fingerprint.
+        :rtype: str
+        """
+        hasher = hashlib.blake2b(digest_size=20)
+        hasher.update(json.dumps(parameters, sort_keys=True, default=str).encode())
+        self._update_hash(hasher, data)
+        self._update_hash(hasher, label)
+        return hasher.hexdigest()
+
+    def get(self, fingerprint: str) -> str:
+        """Returns the path of the trained processor stored for a fingerprint, marking it as recently used.
+
+        :param fingerprint: The training fingerprint.
+        :type fingerprint: str
+
+        :return: The trained processor file path, or ``None`` if there's no trained processor for the fingerprint.
+        :rtype: str
+        """
+        file_path = self._get_file_path(fingerprint)
+        if not os.path.exists(file_path):
+            return None
+        os.utime(file_path)
+        return file_path
+
+    def put(self, fingerprint: str, save: Callable[[str], None]) -> None:
+        """Stores a trained processor for a fingerprint, evicting the least recently used processors if the cache
+        becomes bigger than its maximum size.
+
+        :param fingerprint: The training fingerprint.
+        :type fingerprint: str
+        :param save: Function that saves the trained processor in the given path.
+        :type save: Callable[[str], None]
+        """
+        file_path = self._get_file_path(fingerprint)
+        temporary_file_path = f'{file_path}.tmp'
+        save(temporary_file_path)
+        os.replace(temporary_file_path, file_path)
+        self._evict(file_path)
+
+    def _get_file_path(self, fingerprint: str) -> str:
+        return os.path.join(self._directory, f'{fingerprint}{self._FILE_EXTENSION}')
+
+    def _evict(self, keep_file_path: str) -> None:
+        """Removes the least recently used processors until the cache size is not greater than its maximum size.
+
+        :param keep_file_path: Path of a processor that must not be removed.
+        :type keep_file_path: str
+        """
+        entries: List[os.DirEntry] = [entry for entry in os.scandir(self._directory)
+                                      if entry.is_file() and entry.name.endswith(self._FILE_EXTENSION)]
+        entries.sort(key=lambda entry: entry.stat().st_mtime)
+        total_size = sum(entry.stat().st_size for entry in entries)
+        for entry in entries:
+            if total_size <= self._maximum_size_bytes:
+                break
+            if os.path.abspath(entry.path) == os.path.abspath(keep_file_path):
+                continue
+            total_size -= entry.stat().st_size
+            os.remove(entry.path)
+
+    @staticmethod
+    def _update_hash(hasher: Any, value: Any) -> None:
+        """Feeds a value to the hash, hashing the underlying buffer of arrays instead of their representation.
+
+        :param hasher: The hash object.
+        :type hasher: Any
+        :param value: The value to be hashed.
+        :type value: FrameworkData or np.ndarray
+        """
+        if isinstance(value, FrameworkData):
+            for channel in value.channels:
+                hasher.update(channel.encode())
+                TrainingCache._update_hash(hasher, value.get_data_on_channel(channel))
+            return
+        try:
+            array = np.ascontiguousarray(value)
+        except ValueError:
+            # Ragged data, such as epochs with different sizes
+            hasher.update(repr(value).encode())
+            return
+        if array.dtype.hasobject:
+            hasher.update(repr(value).encode())
+            return
+        hasher.update(f'{array.dtype.str}{array.shape}'.encode())
+        if array.size > 0:
+            hasher.update(memoryview(array).cast('B'))